@@ -1,12 +1,18 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Request, Response
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Literal, Optional
 from services.session_service import SessionService
 from services.document_service import DocumentService
 from services.rag_service import RAGService
 from services.question_service import QuestionService
 from services.configuration_service import ConfigurationService
 from services.judge_service import JudgeService
+from services.job_service import JobService
+from services.visualization_service import VisualizationService
+from services.rus_service import RUSService
+from components.metrics import metrics_registry
+from components.profiling import profile_store, PROFILE_MODES
 
 router = APIRouter()
 
@@ -24,21 +30,41 @@ class ConfigurationCreate(BaseModel):
     embedding_model: str
     similarity_metric: str
     num_chunks: int
+    retrieval_scope: str = "document"
+    nprobe: Optional[int] = None
+    embedding_quantization: Optional[str] = None
+    embedding_dimension: Optional[int] = None
+    coarse_dimension: Optional[int] = None
 
 class RunRAG(BaseModel):
     query_llm: str
     api_key: str
     session_id: str
+    bypass_cache: bool = False
+    visualization_mode: Literal["coordinates", "png"] = "coordinates"  # PNGs rendered on request, or during the run
+
+class RUSSweep(BaseModel):
+    session_id: str
+    alphas: List[float] = [0.5]
+    betas: List[float] = [0.4]
+    gammas: List[float] = [0.1]
 
 class RunJudge(BaseModel):
     judge_llm: str
     api_key: str
     session_id: str
+    bypass_cache: bool = False
+    mode: Literal["single", "map_reduce"] = "single"  # one call for the whole session, or per question then combined
 
 @router.get("/")
 async def root():
     return {"message": "Hello world!"}
 
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Pipeline metrics in the Prometheus text exposition format"""
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @router.post("/create/session")
 async def create_session():
     try:
@@ -49,8 +75,7 @@ async def create_session():
 @router.post("/upload/document")
 async def upload_document(file: UploadFile = File(...), session_id: str = Form(...)):
     try:
-        file_content = await file.read()
-        return await DocumentService.save_document(file_content, file.filename, session_id)
+        return await DocumentService.save_upload(file, session_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
 
@@ -73,8 +98,15 @@ async def create_configuration(configuration_data: ConfigurationCreate):
             configuration_data.page_size,
             configuration_data.embedding_model,
             configuration_data.similarity_metric,
-            configuration_data.num_chunks
+            configuration_data.num_chunks,
+            configuration_data.retrieval_scope,
+            configuration_data.nprobe,
+            configuration_data.embedding_quantization,
+            configuration_data.embedding_dimension,
+            configuration_data.coarse_dimension
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
 
@@ -117,16 +149,118 @@ async def get_session(session_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
 
+def profile_mode(request: Request, profile: Optional[str]) -> Optional[str]:
+    """Profiling requested with ?profile=<mode> or an X-Profile: <mode> header, if any"""
+    mode = profile or request.headers.get("X-Profile")
+    if mode and mode not in PROFILE_MODES:
+        raise HTTPException(status_code=400, detail=f"Unknown profile mode: {mode}. Expected one of {', '.join(PROFILE_MODES)}")
+    return mode
+
 @router.post("/run/rag")
-async def run_rag(run_rag_data: RunRAG):
+async def run_rag(run_rag_data: RunRAG, request: Request, response: Response, profile: Optional[str] = None):
+    mode = profile_mode(request, profile)
     try:
-        return await RAGService.run_rag_pipeline(run_rag_data.query_llm, run_rag_data.api_key, run_rag_data.session_id)
+        result, profile_file = await profile_store.profile(mode, run_rag_data.session_id, "rag", RAGService.run_rag_pipeline(
+            run_rag_data.query_llm,
+            run_rag_data.api_key,
+            run_rag_data.session_id,
+            run_rag_data.bypass_cache,
+            visualization_mode=run_rag_data.visualization_mode
+        ))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
+    if profile_file:
+        response.headers["X-Profile-File"] = profile_file
+    return result
 
 @router.post("/run/judge")
-async def run_judge(run_judge_data: RunJudge):
+async def run_judge(run_judge_data: RunJudge, request: Request, response: Response, profile: Optional[str] = None):
+    mode = profile_mode(request, profile)
     try:
-        return await JudgeService.run_judge_pipeline(run_judge_data.judge_llm, run_judge_data.api_key, run_judge_data.session_id)
+        result, profile_file = await profile_store.profile(
+            mode, run_judge_data.session_id, "judge",
+            JudgeService.run_judge_pipeline(
+                run_judge_data.judge_llm, run_judge_data.api_key, run_judge_data.session_id, run_judge_data.bypass_cache, run_judge_data.mode
+            )
+        )
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
+    if profile_file:
+        response.headers["X-Profile-File"] = profile_file
+    return result
+
+@router.get("/profiles/{session_id}")
+async def list_profiles(session_id: str):
+    try:
+        return {"profiles": profile_store.list(session_id)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/profiles/{session_id}/{filename}")
+async def download_profile(session_id: str, filename: str):
+    try:
+        path = profile_store.path(session_id, filename)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, filename=filename, media_type="application/octet-stream")
+
+@router.post("/jobs/rag")
+async def submit_rag_job(run_rag_data: RunRAG):
+    try:
+        job = JobService.submit_rag_job(
+            run_rag_data.query_llm,
+            run_rag_data.api_key,
+            run_rag_data.session_id,
+            run_rag_data.bypass_cache,
+            run_rag_data.visualization_mode
+        )
+        return {"job_id": job.id}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    try:
+        return JobService.get_job(job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    try:
+        JobService.get_job(job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return StreamingResponse(
+        JobService.stream_events(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    try:
+        return JobService.cancel_job(job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.post("/rus/sweep")
+async def sweep_rus(sweep_data: RUSSweep):
+    """Recompute RUS of a session's answers under a grid of alpha / beta / gamma weights"""
+    try:
+        return RUSService.sweep(sweep_data.session_id, sweep_data.alphas, sweep_data.betas, sweep_data.gammas)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
+
+@router.get("/visualization/coordinates")
+async def get_visualization_coordinates(session_id: str, answer_id: str, method: str = "umap"):
+    try:
+        return VisualizationService.get_coordinates(session_id, answer_id, method)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
@@ -0,0 +1,85 @@
+import os
+import random
+import textwrap
+from typing import List
+
+SUBJECTS = ["The company", "Net revenue", "Operating income", "The board", "Management", "The segment",
+            "Gross margin", "Free cash flow", "The subsidiary", "Total debt", "The auditor", "Diluted EPS"]
+VERBS = ["increased", "decreased", "remained stable", "was restated", "exceeded guidance", "was impacted",
+         "improved", "declined", "was reclassified", "grew"]
+OBJECTS = ["compared to the prior year", "due to higher interest expense", "as a result of currency headwinds",
+           "following the acquisition", "driven by volume growth", "after the impairment charge",
+           "in line with the outlook", "because of lower commodity prices", "net of tax effects"]
+
+
+class SyntheticCorpus:
+    """
+    Deterministic filing-like text: pages of paragraphs of sentences, reproducible
+    from the seed so benchmark runs over time see the same input.
+    """
+    def __init__(self, seed: int = 0, paragraphs_per_page: int = 4, sentences_per_paragraph: tuple = (3, 7)):
+        self.seed = seed
+        self.paragraphs_per_page = paragraphs_per_page
+        self.sentences_per_paragraph = sentences_per_paragraph
+
+    def _sentence(self, rng: random.Random) -> str:
+        amount = f"${rng.randint(1, 999)}.{rng.randint(0, 9)} million"
+        return f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} to {amount} {rng.choice(OBJECTS)} in Q{rng.randint(1, 4)} {rng.randint(2015, 2025)}."
+
+    def pages(self, num_pages: int) -> List[str]:
+        rng = random.Random(self.seed)
+        pages = []
+        for _ in range(num_pages):
+            paragraphs = [
+                " ".join(self._sentence(rng) for _ in range(rng.randint(*self.sentences_per_paragraph)))
+                for _ in range(self.paragraphs_per_page)
+            ]
+            pages.append("\n\n".join(paragraphs))
+        return pages
+
+    def text(self, num_pages: int) -> str:
+        return "".join(page + "\n\n" for page in self.pages(num_pages))
+
+    def questions(self, count: int) -> List[str]:
+        rng = random.Random(self.seed + 1)
+        return [f"What drove the change in {rng.choice(SUBJECTS).lower()} in Q{rng.randint(1, 4)} {rng.randint(2015, 2025)}?" for _ in range(count)]
+
+
+def _escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(pages: List[str], path: str, line_width: int = 95, lines_per_page: int = 60) -> str:
+    """
+    Write a minimal text-only PDF (Helvetica, one content stream per page) that
+    PyPDF2 can extract. Text beyond lines_per_page is cut off.
+    """
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for page in pages:
+        lines = []
+        for paragraph in page.split("\n\n"):
+            lines.extend(textwrap.wrap(paragraph, line_width) + [""])
+        body = " T* ".join(f"({_escape(line)}) Tj" for line in lines[:lines_per_page])
+        stream = f"BT /F1 10 Tf 12 TL 40 760 Td {body} ET".encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (" ".join(f"{i} 0 R" for i in page_ids).encode(), len(page_ids))
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, obj in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n" % number + obj + b"\nendobj\n")
+        xref_offset = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset))
+    return path
@@ -0,0 +1,111 @@
+from typing import List
+import numpy as np
+from benchmarks.corpus import SyntheticCorpus
+from benchmarks.timing import BenchmarkResults
+
+CHUNKINGS = [("sentence", 1), ("sentence", 5), ("paragraph", 1), ("paragraph", 3), ("page", 1), ("tokens", 128), ("tokens", 512)]
+METRICS = ["cosine", "euclidean", "jaccard"]
+
+
+def bench_chunking(results: BenchmarkResults, corpus: SyntheticCorpus, num_pages: int, repeats: int) -> None:
+    from components.chunking import DocumentSegments, TOKEN_OVERLAP
+
+    pages = corpus.pages(num_pages)
+    text = corpus.text(num_pages)
+    for strategy, size in CHUNKINGS:
+        overlap = TOKEN_OVERLAP if strategy == "tokens" else 0
+        # Fresh segments each call: the cost of chunking a new document
+        results.measure(
+            "chunking", lambda: DocumentSegments(text, pages).chunk(strategy, size, overlap),
+            repeats=repeats, strategy=strategy, size=size, pages=num_pages
+        )
+    segments = DocumentSegments(text, pages)
+    for strategy, size in CHUNKINGS:
+        overlap = TOKEN_OVERLAP if strategy == "tokens" else 0
+        segments.chunk(strategy, size, overlap)
+        # Reused segments: the cost of each additional size in a sweep
+        results.measure(
+            "chunking_presegmented", lambda: segments.chunk(strategy, size, overlap),
+            repeats=repeats, strategy=strategy, size=size, pages=num_pages
+        )
+
+
+def bench_embeddings(results: BenchmarkResults, corpus: SyntheticCorpus, models: List[str], num_texts: int, batch_sizes: List[int], repeats: int) -> None:
+    from components.chunking import split_sentences
+    from components.embedding import EmbeddingGenerator
+
+    texts = split_sentences(corpus.text(max(1, num_texts // 20 + 1)))[:num_texts]
+    for model in models:
+        for batch_size in batch_sizes:
+            record = results.measure(
+                "embedding", lambda: EmbeddingGenerator.compute_embeddings(texts, model, batch_size),
+                repeats=repeats, model=model, batch_size=batch_size, texts=len(texts)
+            )
+            if record:
+                record["texts_per_s"] = len(texts) / record["median_s"]
+
+
+def bench_similarity(results: BenchmarkResults, seed: int, num_chunks: int, dimension: int, num_queries: int, k: int, repeats: int) -> None:
+    from components.similarity_metrics import SimilarityCalculator, ChunkMatrix
+    from components.quantization import QuantizedEmbeddings, quantize, pack_binary
+    from components.vector_index import CorpusIndex, IVFIndex
+
+    rng = np.random.default_rng(seed)
+    chunks = rng.normal(size=(num_chunks, dimension)).astype(np.float32)
+    queries = rng.normal(size=(num_queries, dimension)).astype(np.float32)
+    shape = {"chunks": num_chunks, "dimension": dimension, "queries": num_queries}
+
+    for metric in METRICS:
+        results.measure("similarity", lambda: SimilarityCalculator.similarity_matrix(queries, chunks, metric), repeats=repeats, metric=metric, **shape)
+        matrix = ChunkMatrix(chunks)
+        SimilarityCalculator.similarity_matrix(queries, matrix, metric)
+        results.measure("similarity_cached_norms", lambda: SimilarityCalculator.similarity_matrix(queries, matrix, metric), repeats=repeats, metric=metric, **shape)
+
+    scores = SimilarityCalculator.cosine_matrix(queries, chunks)
+    results.measure("top_k", lambda: SimilarityCalculator.top_k_indices_batch(scores, k), repeats=repeats, k=k, **shape)
+
+    for quantization in ("float16", "int8"):
+        codes, scales = quantize(chunks, quantization)
+        quantized = QuantizedEmbeddings(quantization, codes, scales, chunks, pack_binary(chunks))
+        results.measure("quantized_search", lambda: quantized.search(queries, "cosine", k), repeats=repeats, quantization=quantization, k=k, **shape)
+
+    ivf = IVFIndex.build(chunks)
+    index = CorpusIndex("benchmark", [num_chunks], chunks, ivf)
+    for nprobe in (4, 16):
+        record = results.measure("ivf_search", lambda: index.search(queries, "cosine", k, nprobe), repeats=repeats, nprobe=nprobe, n_lists=ivf.n_lists, k=k, **shape)
+        if record:
+            record["recall"] = index.recall(queries, "cosine", k, nprobe)
+
+
+def bench_rus(results: BenchmarkResults, seed: int, repeats: int) -> None:
+    from components.utils import calculate_rus, calculate_rus_batch, pad_scores, weight_grid, rus_for_weights
+
+    rng = np.random.default_rng(seed)
+    for k in (5, 10, 20):
+        similarity_scores = rng.uniform(0.2, 0.9, size=(100, k)).tolist()
+        relevance_scores = rng.dirichlet(np.ones(k), size=100).tolist()
+        results.measure(
+            "rus", lambda: [calculate_rus(s, r) for s, r in zip(similarity_scores, relevance_scores)],
+            repeats=repeats, k=k, answers=100
+        )
+        results.measure(
+            "rus_batch", lambda: calculate_rus_batch(*pad_scores(similarity_scores, relevance_scores)),
+            repeats=repeats, k=k, answers=100
+        )
+
+    components = calculate_rus_batch(*pad_scores(similarity_scores, relevance_scores))
+    grid = np.linspace(0, 1, 11)
+    weights = weight_grid(grid, grid, grid)
+    results.measure("rus_weight_sweep", lambda: rus_for_weights(components, weights), repeats=repeats, answers=100, combinations=len(weights))
+
+
+def bench_projections(results: BenchmarkResults, seed: int, num_chunks: int, dimension: int, repeats: int) -> None:
+    from components.projection_cache import Projection
+
+    rng = np.random.default_rng(seed)
+    chunks = rng.normal(size=(num_chunks, dimension)).astype(np.float32)
+    points = rng.normal(size=(2, dimension)).astype(np.float32)
+    for method in ("pca", "umap", "tsne"):
+        results.measure("projection_fit", lambda: Projection.fit(method, chunks), repeats=repeats, method=method, chunks=num_chunks, dimension=dimension)
+        projection = Projection.fit(method, chunks)
+        results.measure("projection_place", lambda: projection.place(points), repeats=repeats, method=method, chunks=num_chunks, dimension=dimension)
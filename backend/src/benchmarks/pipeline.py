@@ -0,0 +1,116 @@
+import hashlib
+import os
+import re
+import time
+from typing import Any, Dict, List
+from unittest import mock
+from benchmarks.corpus import SyntheticCorpus, write_pdf
+from benchmarks.timing import BenchmarkResults
+
+DEFAULT_CONFIGURATIONS = [
+    {"chunking_strategy": "sentence", "sentence_size": 3, "embedding_model": "sentence-transformer", "similarity_metric": "cosine", "num_chunks": 5},
+    {"chunking_strategy": "tokens", "token_size": 256, "embedding_model": "sentence-transformer", "similarity_metric": "cosine", "num_chunks": 5},
+]
+
+
+async def stub_generate_answer(query_llm: str, query: str, context: str, api_key: str, use_cache: bool = True) -> dict:
+    """Deterministic stand-in for the LLM: cites every context chunk with hash-derived relevance"""
+    chunk_numbers = [int(number) for number in re.findall(r"^Chunk (\d+):", context, re.MULTILINE)]
+    weights = [int(hashlib.sha256(f"{query}:{number}".encode()).hexdigest()[:4], 16) % 10 for number in chunk_numbers]
+    total = sum(weights) or 1
+    return {
+        "answer": f"Stub answer to: {query}",
+        "relevance_analysis": [
+            {"chunk_number": number, "relevance_score": round(100 * weight / total)}
+            for number, weight in zip(chunk_numbers, weights)
+        ],
+    }
+
+
+def _stage_timer():
+    from components.evaluation_engine import PipelineProgress
+
+    class StageTimer(PipelineProgress):
+        """Wall time from a stage's first event to its completion"""
+        def __init__(self):
+            self.started: Dict[str, float] = {}
+            self.finished: Dict[str, float] = {}
+
+        def stage(self, name: str, completed: int, total: int) -> None:
+            now = time.perf_counter()
+            self.started.setdefault(name, now)
+            if completed >= total:
+                self.finished[name] = now
+
+        def durations(self) -> Dict[str, float]:
+            return {name: self.finished.get(name, start) - start for name, start in self.started.items()}
+
+    return StageTimer()
+
+
+async def bench_pipeline(
+    results: BenchmarkResults,
+    corpus: SyntheticCorpus,
+    workdir: str,
+    num_documents: int,
+    num_pages: int,
+    num_questions: int,
+    configurations: List[Dict[str, Any]],
+    visualization_mode: str = "coordinates"
+) -> None:
+    """
+    Run run_rag_pipeline end to end against a stubbed LLM, twice: a cold run that
+    extracts, chunks, embeds and projects everything, and a warm run served by the caches.
+    The working directory and RAGService.generate_answer are restored afterwards.
+    """
+    os.makedirs(workdir, exist_ok=True)
+    original_cwd = os.getcwd()
+    # Every store resolves its data/ paths against the working directory
+    os.chdir(workdir)
+    try:
+        from services.rag_service import RAGService
+        with mock.patch.object(RAGService, "generate_answer", staticmethod(stub_generate_answer)):
+            await _run_pipeline(results, corpus, num_documents, num_pages, num_questions, configurations, visualization_mode)
+    finally:
+        os.chdir(original_cwd)
+
+
+async def _run_pipeline(
+    results: BenchmarkResults,
+    corpus: SyntheticCorpus,
+    num_documents: int,
+    num_pages: int,
+    num_questions: int,
+    configurations: List[Dict[str, Any]],
+    visualization_mode: str
+) -> None:
+    from services.rag_service import RAGService
+    from services.session_service import SessionService
+    from services.document_service import DocumentService
+    from services.question_service import QuestionService
+    from services.configuration_service import ConfigurationService
+
+    session = SessionService.create_session()
+    for document_index in range(num_documents):
+        document_corpus = SyntheticCorpus(corpus.seed + 100 + document_index, corpus.paragraphs_per_page, corpus.sentences_per_paragraph)
+        path = write_pdf(document_corpus.pages(num_pages), os.path.join("synthetic", f"filing_{document_index}.pdf"))
+        with open(path, "rb") as f:
+            await DocumentService.save_document(f.read(), os.path.basename(path), session.id)
+    for question in corpus.questions(num_questions):
+        QuestionService.add_question(question, session.id)
+    for configuration in configurations:
+        ConfigurationService.add_configuration(session.id, **configuration)
+
+    params = {
+        "documents": num_documents,
+        "pages": num_pages,
+        "questions": num_questions,
+        "configurations": len(configurations),
+        "visualization_mode": visualization_mode,
+    }
+    for run in ("cold", "warm"):
+        timer = _stage_timer()
+        start = time.perf_counter()
+        output = await RAGService.run_rag_pipeline("stub", "", session.id, progress=timer, visualization_mode=visualization_mode)
+        elapsed = time.perf_counter() - start
+        results.add("pipeline", params={**params, "run": run}, total_s=elapsed, stages_s=timer.durations(), answers=len(output["answers"]))
@@ -0,0 +1,100 @@
+"""
+Benchmark suite. Run from backend/src:
+
+    python -m benchmarks.run --suites chunking similarity rus --output results.json
+
+Every suite runs on seeded synthetic data; results are written as JSON so runs
+can be compared over time. Suites whose dependencies are missing are recorded
+as failed rather than aborting the run.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+import numpy as np
+from benchmarks.corpus import SyntheticCorpus
+from benchmarks.timing import BenchmarkResults
+
+SUITES = ["chunking", "embedding", "similarity", "rus", "projection", "pipeline"]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Retrieval and RUS benchmarks")
+    parser.add_argument("--suites", nargs="+", choices=SUITES, default=SUITES)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--pages", type=int, default=20, help="pages per synthetic document")
+    parser.add_argument("--models", nargs="+", default=["sentence-transformer"])
+    parser.add_argument("--texts", type=int, default=256, help="texts per embedding benchmark")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[8, 32, 128])
+    parser.add_argument("--chunks", type=int, default=20000, help="chunk matrix rows for similarity benchmarks")
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--projection-chunks", type=int, default=500)
+    parser.add_argument("--documents", type=int, default=3, help="documents in the end-to-end benchmark")
+    parser.add_argument("--questions", type=int, default=5)
+    parser.add_argument("--workdir", default=None, help="data directory for the end-to-end benchmark (default: a temp dir)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    output_path = os.path.abspath(args.output)
+    corpus = SyntheticCorpus(seed=args.seed)
+    results = BenchmarkResults()
+
+    from benchmarks import micro, pipeline
+    suites = {
+        "chunking": lambda: micro.bench_chunking(results, corpus, args.pages, args.repeats),
+        "embedding": lambda: micro.bench_embeddings(results, corpus, args.models, args.texts, args.batch_sizes, args.repeats),
+        "similarity": lambda: micro.bench_similarity(results, args.seed, args.chunks, args.dimension, args.queries, args.k, args.repeats),
+        "rus": lambda: micro.bench_rus(results, args.seed, args.repeats),
+        "projection": lambda: micro.bench_projections(results, args.seed, args.projection_chunks, args.dimension, max(1, args.repeats // 2)),
+        "pipeline": lambda: asyncio.run(pipeline.bench_pipeline(
+            results, corpus, args.workdir or tempfile.mkdtemp(prefix="rag-benchmark-"),
+            args.documents, args.pages, args.questions, pipeline.DEFAULT_CONFIGURATIONS
+        )),
+    }
+
+    started_at = time.time()
+    for name in args.suites:
+        try:
+            suites[name]()
+        except Exception as e:
+            results.add(f"suite:{name}", error=f"{type(e).__name__}: {e}", traceback=traceback.format_exc())
+
+    report = {
+        "meta": {
+            "started_at": started_at,
+            "duration_s": time.time() - started_at,
+            "git_commit": git_commit(),
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": results.records,
+    }
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(results.records)} results to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
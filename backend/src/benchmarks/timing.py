@@ -0,0 +1,56 @@
+import statistics
+import time
+import traceback
+from typing import Any, Callable, Dict, List, Optional
+
+
+class BenchmarkResults:
+    """Collects timing records as plain dicts, ready to be dumped as JSON"""
+    def __init__(self):
+        self.records: List[Dict[str, Any]] = []
+
+    def measure(self, name: str, fn: Callable[[], Any], repeats: int = 5, warmup: int = 1, **params) -> Optional[Dict[str, Any]]:
+        """Time fn() repeats times after warmup calls; failures are recorded instead of raised"""
+        try:
+            for _ in range(warmup):
+                fn()
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                fn()
+                timings.append(time.perf_counter() - start)
+        except Exception as e:
+            self.add(name, params=params, error=f"{type(e).__name__}: {e}", traceback=traceback.format_exc())
+            return None
+
+        record = {
+            "name": name,
+            "params": params,
+            "repeats": repeats,
+            "mean_s": statistics.fmean(timings),
+            "median_s": statistics.median(timings),
+            "min_s": min(timings),
+            "max_s": max(timings),
+            "stdev_s": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        }
+        self.records.append(record)
+        print(BenchmarkResults.summary(record))
+        return record
+
+    def add(self, name: str, **values) -> None:
+        """Record a single measured value (e.g. a one-off end-to-end run) or a failure"""
+        record = {"name": name, **values}
+        self.records.append(record)
+        print(BenchmarkResults.summary(record))
+
+    @staticmethod
+    def summary(record: Dict[str, Any]) -> str:
+        """The progress line printed for a record; the JSON output keeps every field"""
+        label = f"{record['name']} {record.get('params', {})}"
+        if "error" in record:
+            return f"{label}: failed ({record['error']})"
+        if "median_s" in record:
+            return f"{label}: median {record['median_s'] * 1000:.2f} ms"
+        if "total_s" in record:
+            return f"{label}: {record['total_s']:.2f} s"
+        return label
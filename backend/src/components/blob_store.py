@@ -0,0 +1,82 @@
+import os
+import sqlite3
+import threading
+from typing import Optional
+
+
+class BlobStore:
+    """
+    Content-addressed file storage: each distinct upload is stored once under its
+    sha256 and reference counted across the sessions that use it.
+    """
+    def __init__(self, root: str = "data/blobs", db_path: str = "data/blobs.sqlite"):
+        self.root = root
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS blobs (
+                    content_hash TEXT PRIMARY KEY,
+                    path TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    ref_count INTEGER NOT NULL
+                )"""
+            )
+        return self._conn
+
+    def blob_path(self, content_hash: str, extension: str) -> str:
+        return os.path.join(self.root, content_hash[:2], f"{content_hash}.{extension}")
+
+    def add(self, tmp_path: str, content_hash: str, extension: str) -> str:
+        """
+        Take ownership of tmp_path as the blob for content_hash, or discard it if the
+        content is already stored. Increments the reference count and returns the blob path.
+        """
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT path FROM blobs WHERE content_hash = ?", (content_hash,)).fetchone()
+            if row is not None and os.path.exists(row[0]):
+                os.remove(tmp_path)
+                with conn:
+                    conn.execute("UPDATE blobs SET ref_count = ref_count + 1 WHERE content_hash = ?", (content_hash,))
+                return row[0]
+
+            path = self.blob_path(content_hash, extension)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO blobs (content_hash, path, size, ref_count) VALUES (?, ?, ?, 1)",
+                    (content_hash, path, os.path.getsize(path))
+                )
+            return path
+
+    def release(self, content_hash: str) -> None:
+        """Drop one reference; the file is deleted once no session uses it"""
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT path, ref_count FROM blobs WHERE content_hash = ?", (content_hash,)).fetchone()
+            if row is None:
+                return
+            path, ref_count = row
+            with conn:
+                if ref_count > 1:
+                    conn.execute("UPDATE blobs SET ref_count = ref_count - 1 WHERE content_hash = ?", (content_hash,))
+                    return
+                conn.execute("DELETE FROM blobs WHERE content_hash = ?", (content_hash,))
+            if os.path.exists(path):
+                os.remove(path)
+
+    def ref_count(self, content_hash: str) -> int:
+        with self._lock:
+            row = self._connection().execute("SELECT ref_count FROM blobs WHERE content_hash = ?", (content_hash,)).fetchone()
+        return row[0] if row else 0
+
+
+blob_store = BlobStore()
@@ -0,0 +1,33 @@
+import json
+import os
+from typing import List, Optional
+
+
+class ChunkStore:
+    """
+    Chunk lists keyed by (content hash, strategy, size, overlap). Chunking does not
+    depend on the embedding model, so every model embedding a document reuses them.
+    """
+    def __init__(self, root: str = "data/chunks"):
+        self.root = root
+
+    def _path(self, content_hash: str, strategy: str, size: int, overlap: int) -> str:
+        return os.path.join(self.root, content_hash[:2], content_hash, f"{strategy}-{size}-{overlap}.json")
+
+    def get(self, content_hash: str, strategy: str, size: int, overlap: int = 0) -> Optional[List[str]]:
+        path = self._path(content_hash, strategy, size, overlap)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def put(self, content_hash: str, strategy: str, size: int, overlap: int, chunks: List[str]) -> None:
+        path = self._path(content_hash, strategy, size, overlap)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(chunks, f)
+        os.replace(tmp_path, path)
+
+
+chunk_store = ChunkStore()
@@ -1,4 +1,6 @@
 import re
+from functools import cached_property, lru_cache
+from typing import List, Optional
 import nltk
 from nltk.tokenize import sent_tokenize
 try:
@@ -7,46 +9,54 @@ except LookupError:
     nltk.download('punkt')
 import tiktoken
 
-def chunk_by_sentence(text, size=1):
-    """Split text into chunks by sentence, with each chunk containing size sentences"""
-    sentences = sent_tokenize(text)
-    chunks = []
-    for i in range(0, len(sentences), size):
-        chunk = " ".join(sentences[i:i + size])
-        chunks.append(chunk)
-    return chunks
+# Token overlap between consecutive token chunks
+TOKEN_OVERLAP = 20
 
-def chunk_by_paragraph(text, size=1):
-    """Split text into chunks by paragraph, with each chunk containing size paragraphs"""
+@lru_cache(maxsize=None)
+def get_encoding(encoding_name: str = "cl100k_base") -> tiktoken.Encoding:
+    """tiktoken encodings are loaded once per process"""
+    return tiktoken.get_encoding(encoding_name)
+
+def split_sentences(text: str) -> List[str]:
+    return sent_tokenize(text)
+
+def split_paragraphs(text: str) -> List[str]:
     # Split by double newlines or more to separate paragraphs
     paragraphs = re.split(r'\n\s*\n', text)
     # Filter out empty paragraphs and strip whitespace
-    paragraphs = [p.strip() for p in paragraphs if p.strip()]
-    
-    chunks = []
-    for i in range(0, len(paragraphs), size):
-        chunk = "\n\n".join(paragraphs[i:i + size])
-        chunks.append(chunk)
-    return chunks
+    return [p.strip() for p in paragraphs if p.strip()]
+
+def group_units(units: List[str], size: int, separator: str) -> List[str]:
+    """Join consecutive runs of size units into chunks"""
+    return [separator.join(units[i:i + size]) for i in range(0, len(units), size)]
+
+def chunk_by_sentence(text, size=1, sentences: Optional[List[str]] = None):
+    """Split text into chunks by sentence, with each chunk containing size sentences"""
+    if sentences is None:
+        sentences = split_sentences(text)
+    return group_units(sentences, size, " ")
+
+def chunk_by_paragraph(text, size=1, paragraphs: Optional[List[str]] = None):
+    """Split text into chunks by paragraph, with each chunk containing size paragraphs"""
+    if paragraphs is None:
+        paragraphs = split_paragraphs(text)
+    return group_units(paragraphs, size, "\n\n")
 
 def chunk_by_page(text, page_texts, size=1):
     """Return chunks by page, with each chunk containing size pages"""
-    chunks = []
-    for i in range(0, len(page_texts), size):
-        chunk = "\n\n".join(page_texts[i:i + size])
-        chunks.append(chunk)
-    return chunks
+    return group_units(page_texts, size, "\n\n")
 
 def num_tokens_from_string(string: str, encoding_name: str = "cl100k_base") -> int:
     """Returns the number of tokens in a text string."""
-    encoding = tiktoken.get_encoding(encoding_name)
+    encoding = get_encoding(encoding_name)
     num_tokens = len(encoding.encode(string))
     return num_tokens
 
-def chunk_by_tokens(text, token_size=256, overlap=20, encoding_name="cl100k_base"):
+def chunk_by_tokens(text, token_size=256, overlap=TOKEN_OVERLAP, encoding_name="cl100k_base", tokens: Optional[List[int]] = None):
     """Split text into chunks of approximately token_size tokens with optional overlap"""
-    encoding = tiktoken.get_encoding(encoding_name)
-    tokens = encoding.encode(text)
+    encoding = get_encoding(encoding_name)
+    if tokens is None:
+        tokens = encoding.encode(text)
     
     chunks = []
     i = 0
@@ -62,4 +72,37 @@ def chunk_by_tokens(text, token_size=256, overlap=20, encoding_name="cl100k_base
         # Move to next chunk, considering overlap
         i += token_size - overlap
     
-    return chunks
\ No newline at end of file
+    return chunks
+
+class DocumentSegments:
+    """
+    Sentence, paragraph and token segmentation of one document, each computed on
+    first use, so chunking the same document at several sizes segments it once.
+    """
+    def __init__(self, full_text: str, pages: List[str], encoding_name: str = "cl100k_base"):
+        self.full_text = full_text
+        self.pages = pages
+        self.encoding_name = encoding_name
+
+    @cached_property
+    def sentences(self) -> List[str]:
+        return split_sentences(self.full_text)
+
+    @cached_property
+    def paragraphs(self) -> List[str]:
+        return split_paragraphs(self.full_text)
+
+    @cached_property
+    def tokens(self) -> List[int]:
+        return get_encoding(self.encoding_name).encode(self.full_text)
+
+    def chunk(self, strategy: str, size: int, overlap: int = 0) -> List[str]:
+        if strategy == "sentence":
+            return chunk_by_sentence(self.full_text, size=size, sentences=self.sentences)
+        elif strategy == "paragraph":
+            return chunk_by_paragraph(self.full_text, size=size, paragraphs=self.paragraphs)
+        elif strategy == "page":
+            return chunk_by_page(self.full_text, self.pages, size=size)
+        elif strategy == "tokens":
+            return chunk_by_tokens(self.full_text, token_size=size, overlap=overlap, encoding_name=self.encoding_name, tokens=self.tokens)
+        return []
@@ -1,41 +1,126 @@
-from sentence_transformers import SentenceTransformer
-from transformers import BertModel, BertTokenizer, DistilBertModel, DistilBertTokenizer, GPT2Model, GPT2Tokenizer, T5Tokenizer, T5Model
-from typing import List, Tuple
+import os
+import time
+from typing import Iterator, List, Optional, Tuple
+import numpy as np
+from components.model_registry import ModelRegistry, model_registry
+from components.embedding_cache import embedding_cache, hash_text
+from components.inference_backend import model_variant
+from components.metrics import EMBEDDING_BATCH_SECONDS, EMBEDDING_CACHE_REQUESTS, TEXTS_EMBEDDED
+
+# Texts per forward pass; override with EMBEDDING_BATCH_SIZE
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+
+SENTENCE_TRANSFORMER_MODELS = ("sentence-transformer", "fine-tuned-financial")
+# Hidden state used as the embedding: the first ([CLS]) token, or the last real token for GPT-2.
+# Changing a model's pooling needs a new entry in inference_backend.EMBEDDING_REVISIONS.
+TRANSFORMER_POOLING = {"bert": "cls", "roberta": "cls", "distilbert": "cls", "gpt2": "last"}
+
+
+def length_buckets(lengths: List[int], batch_size: int) -> List[np.ndarray]:
+    """Indices grouped into batches of similar length, so each batch pads as little as possible"""
+    order = np.argsort(np.asarray(lengths), kind="stable")
+    return [order[start:start + batch_size] for start in range(0, len(order), batch_size)]
+
 
 class EmbeddingGenerator:
-    sentence_transformer = SentenceTransformer("all-MiniLM-L6-v2", device = "cpu")
-    bert_tokenizer = BertTokenizer.from_pretrained("bert-base-uncased")
-    bert_model = BertModel.from_pretrained("bert-base-uncased")
-    distilbert_tokenizer = DistilBertTokenizer.from_pretrained("distilbert-base-uncased")
-    distilbert_model = DistilBertModel.from_pretrained("distilbert-base-uncased")
-    gpt2_tokenizer = GPT2Tokenizer.from_pretrained("gpt2")
-    gpt2_tokenizer.pad_token = gpt2_tokenizer.eos_token 
-    gpt2_model = GPT2Model.from_pretrained("gpt2")
-    fine_tuned_model = SentenceTransformer("philschmid/bge-base-financial-matryoshka")
+    # Models are loaded lazily on first use and evicted under the registry's memory budget
+    registry = model_registry
+    cache = embedding_cache
+
+    @staticmethod
+    def get_embeddings(texts: List[str], model_name: str, use_cache: bool = True) -> np.ndarray:
+        """Return a float32 matrix of embeddings for texts, running inference only for texts not already cached"""
+        if not use_cache:
+            return EmbeddingGenerator.compute_embeddings(texts, model_name)
+
+        cache_name = model_variant(model_name)
+        text_hashes = [hash_text(text) for text in texts]
+        cached = EmbeddingGenerator.cache.get_many(cache_name, text_hashes)
+
+        # Embed each missing text once, even if it appears several times
+        missing = {}
+        for text, text_hash in zip(texts, text_hashes):
+            if text_hash not in cached and text_hash not in missing:
+                missing[text_hash] = text
+        EMBEDDING_CACHE_REQUESTS.inc(len(set(text_hashes)) - len(missing), model=cache_name, result="hit")
+        EMBEDDING_CACHE_REQUESTS.inc(len(missing), model=cache_name, result="miss")
+
+        # Batches are cached as they finish, so an interrupted run keeps its progress
+        missing_hashes = list(missing.keys())
+        for indices, batch_embeddings in EmbeddingGenerator.stream_embeddings(list(missing.values()), model_name):
+            batch_hashes = [missing_hashes[i] for i in indices]
+            EmbeddingGenerator.cache.put_many(cache_name, batch_hashes, batch_embeddings)
+            cached.update(zip(batch_hashes, batch_embeddings))
+
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.stack([cached[text_hash] for text_hash in text_hashes]).astype(np.float32, copy=False)
 
     @staticmethod
-    def get_embeddings(texts: List[str], model_name: str) -> List[List[float]]:
-        embeddings = []
-        if model_name == "sentence-transformer":
-            embeddings = EmbeddingGenerator.sentence_transformer.encode(texts).tolist()
-        elif model_name == "bert":
-            inputs = EmbeddingGenerator.bert_tokenizer(texts, padding=True, truncation=True, return_tensors="pt")
-            outputs = EmbeddingGenerator.bert_model(**inputs)
-            embeddings = outputs.last_hidden_state[:, 0, :].detach().numpy().tolist()
-        elif model_name == "roberta":
-            inputs = EmbeddingGenerator.roberta_tokenizer(texts, padding=True, truncation=True, return_tensors="pt")
-            outputs = EmbeddingGenerator.roberta_model(**inputs)
-            embeddings = outputs.last_hidden_state[:, 0, :].detach().numpy().tolist()
-        elif model_name == "distilbert":
-            inputs = EmbeddingGenerator.distilbert_tokenizer(texts, padding=True, truncation=True, return_tensors="pt")
-            outputs = EmbeddingGenerator.distilbert_model(**inputs)
-            embeddings = outputs.last_hidden_state[:, 0, :].detach().numpy().tolist()
-        elif model_name == "gpt2":
-            inputs = EmbeddingGenerator.gpt2_tokenizer(texts, padding=True, truncation=True, return_tensors="pt")
-            outputs = EmbeddingGenerator.gpt2_model(**inputs)
-            embeddings = outputs.last_hidden_state[:, -1, :].detach().numpy().tolist()
-        elif model_name == "fine-tuned-financial":
-            embeddings = EmbeddingGenerator.fine_tuned_model.encode(texts).tolist()
-        else:
+    def compute_embeddings(
+        texts: List[str], model_name: str, batch_size: Optional[int] = None, registry: Optional[ModelRegistry] = None
+    ) -> np.ndarray:
+        """Embed texts in length-bucketed batches and return them in their original order"""
+        embeddings = None
+        for indices, batch_embeddings in EmbeddingGenerator.stream_embeddings(texts, model_name, batch_size, registry):
+            if embeddings is None:
+                embeddings = np.empty((len(texts), batch_embeddings.shape[1]), dtype=np.float32)
+            embeddings[indices] = batch_embeddings
+        return embeddings if embeddings is not None else np.empty((0, 0), dtype=np.float32)
+
+    @staticmethod
+    def stream_embeddings(
+        texts: List[str], model_name: str, batch_size: Optional[int] = None, registry: Optional[ModelRegistry] = None
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Yield (indices, float32 embeddings) one batch at a time. Batches hold texts of
+        similar length, so they arrive out of order; indices refer to positions in texts.
+        Models come from registry, or the shared EmbeddingGenerator.registry by default.
+        """
+        batch_size = batch_size or EMBEDDING_BATCH_SIZE
+        registry = registry or EmbeddingGenerator.registry
+        if model_name not in SENTENCE_TRANSFORMER_MODELS and model_name not in TRANSFORMER_POOLING:
             raise ValueError(f"Unknown embedding model: {model_name}")
-        return embeddings
\ No newline at end of file
+        if not texts:
+            return
+
+        if model_name in SENTENCE_TRANSFORMER_MODELS:
+            model = registry.get(model_name)["model"]
+            for indices in length_buckets([len(text) for text in texts], batch_size):
+                batch = [texts[i] for i in indices]
+                started = time.perf_counter()
+                vectors = model.encode(batch, batch_size=batch_size, convert_to_numpy=True).astype(np.float32)
+                EmbeddingGenerator.record_batch(model_name, len(indices), started)
+                yield indices, vectors
+            return
+
+        import torch
+        bundle = registry.get(model_name)
+        tokenizer, model = bundle["tokenizer"], bundle["model"]
+        pooling = TRANSFORMER_POOLING[model_name]
+
+        # Tokenize once without padding; each batch is padded only to its own longest text
+        encodings = tokenizer(texts, truncation=True)
+        lengths = [len(input_ids) for input_ids in encodings["input_ids"]]
+        with torch.inference_mode():
+            for indices in length_buckets(lengths, batch_size):
+                started = time.perf_counter()
+                inputs = tokenizer.pad(
+                    {name: [encodings[name][i] for i in indices] for name in encodings.keys()},
+                    return_tensors="pt"
+                )
+                hidden_states = model(**inputs).last_hidden_state
+                if pooling == "cls":
+                    vectors = hidden_states[:, 0, :]
+                else:
+                    last_tokens = inputs["attention_mask"].sum(dim=1) - 1
+                    vectors = hidden_states[torch.arange(len(indices)), last_tokens]
+                vectors = vectors.float().numpy()
+                EmbeddingGenerator.record_batch(model_name, len(indices), started)
+                yield indices, vectors
+
+    @staticmethod
+    def record_batch(model_name: str, batch_length: int, started: float) -> None:
+        model = model_variant(model_name)
+        EMBEDDING_BATCH_SECONDS.observe(time.perf_counter() - started, model=model)
+        TEXTS_EMBEDDED.inc(batch_length, model=model)
@@ -0,0 +1,89 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+import numpy as np
+from components.inference_backend import retired_variants
+
+
+def hash_text(text: str) -> str:
+    """Return the content hash used to key a chunk's embedding"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Disk-backed cache of embeddings keyed by (model name, sha256 of the text).
+    Vectors are stored as float32 blobs in a SQLite database.
+    """
+    def __init__(self, db_path: str = "data/embedding_cache.sqlite", retired_models: Optional[List[str]] = None):
+        self.db_path = db_path
+        self.retired_models = retired_models or []
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS embeddings (
+                    model_name TEXT NOT NULL,
+                    text_hash TEXT NOT NULL,
+                    dim INTEGER NOT NULL,
+                    vector BLOB NOT NULL,
+                    PRIMARY KEY (model_name, text_hash)
+                )"""
+            )
+            if self.retired_models:
+                # Vectors cached under a model's pre-revision name would never be read again
+                placeholders = ",".join("?" * len(self.retired_models))
+                with self._conn:
+                    self._conn.execute(f"DELETE FROM embeddings WHERE model_name IN ({placeholders})", self.retired_models)
+        return self._conn
+
+    def get_many(self, model_name: str, text_hashes: List[str]) -> Dict[str, np.ndarray]:
+        """Return the cached vectors for the given hashes, skipping misses"""
+        found = {}
+        unique_hashes = list(dict.fromkeys(text_hashes))
+        with self._lock:
+            conn = self._connection()
+            # Stay below SQLite's bound-parameter limit
+            for start in range(0, len(unique_hashes), 500):
+                batch = unique_hashes[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model_name = ? AND text_hash IN ({placeholders})",
+                    [model_name, *batch]
+                ).fetchall()
+                for text_hash, vector in rows:
+                    found[text_hash] = np.frombuffer(vector, dtype=np.float32)
+        return found
+
+    def put_many(self, model_name: str, text_hashes: List[str], vectors: List[List[float]]) -> None:
+        """Store vectors for the given hashes in a single transaction"""
+        rows = []
+        for text_hash, vector in zip(text_hashes, vectors):
+            vector = np.asarray(vector, dtype=np.float32)
+            rows.append((model_name, text_hash, vector.shape[0], vector.tobytes()))
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model_name, text_hash, dim, vector) VALUES (?, ?, ?, ?)",
+                    rows
+                )
+
+    def clear(self, model_name: Optional[str] = None) -> None:
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                if model_name is None:
+                    conn.execute("DELETE FROM embeddings")
+                else:
+                    conn.execute("DELETE FROM embeddings WHERE model_name = ?", (model_name,))
+
+
+embedding_cache = EmbeddingCache(retired_models=retired_variants())
@@ -0,0 +1,149 @@
+import asyncio
+import multiprocessing
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Iterable, List, Optional
+from components.metrics import WORKER_RESIDENT_MEMORY, merge_recorded, run_recorded
+
+
+def _workers_from_env() -> int:
+    value = os.getenv("RAG_PROCESS_WORKERS")
+    if value is not None:
+        return max(0, int(value))
+    return min(4, os.cpu_count() or 1)
+
+
+def _model_threads_from_env() -> int:
+    return max(1, int(os.getenv("RAG_MODEL_THREADS", "1")))
+
+
+def _llm_concurrency_from_env() -> int:
+    return max(1, int(os.getenv("RAG_LLM_CONCURRENCY", "20")))
+
+
+async def gather_or_cancel(*awaitables: Awaitable) -> List[Any]:
+    """
+    asyncio.gather that cancels the remaining awaitables as soon as one fails,
+    then re-raises that failure, so no sibling keeps calling an LLM for a failed run.
+    """
+    tasks = [asyncio.ensure_future(awaitable) for awaitable in awaitables]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+class PipelineProgress:
+    """
+    Receives progress events from a running pipeline. The base class ignores them;
+    background jobs subclass it to record progress and stream results.
+    """
+    def stage(self, name: str, completed: int, total: int) -> None:
+        pass
+
+    def result(self, index: int, result: Any) -> None:
+        pass
+
+
+class StageCounter:
+    """Counts finished work units of a stage and reports them to the progress listener"""
+    def __init__(self, progress: PipelineProgress, stage: str, total: int):
+        self.progress = progress
+        self.stage = stage
+        self.total = total
+        self.completed = 0
+        progress.stage(stage, 0, total)
+
+    def __call__(self) -> None:
+        self.completed += 1
+        self.progress.stage(self.stage, self.completed, self.total)
+
+
+class EvaluationEngine:
+    """
+    Runs independent evaluation work units concurrently.
+    CPU-bound stages go to a process pool (or threads when process_workers is 0),
+    I/O-bound stages go through a bounded asyncio pool. Results keep submission order.
+    Stages that run an embedding model stay on a few threads of the server process,
+    so each model is loaded once and EMBEDDING_MODEL_MEMORY_BUDGET_MB bounds it
+    for the whole server rather than per worker process.
+    """
+    def __init__(self, process_workers: Optional[int] = None, io_concurrency: Optional[int] = None, model_threads: Optional[int] = None):
+        self.process_workers = _workers_from_env() if process_workers is None else process_workers
+        self.io_concurrency = _llm_concurrency_from_env() if io_concurrency is None else io_concurrency
+        self.model_threads = _model_threads_from_env() if model_threads is None else model_threads
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._model_executor: Optional[ThreadPoolExecutor] = None
+        # asyncio primitives bind to the loop they are first used on; each loop gets its own
+        self._io_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+    def _process_pool(self) -> Optional[ProcessPoolExecutor]:
+        if self.process_workers == 0:
+            return None
+        if self._executor is None:
+            # spawn keeps torch / BLAS thread state out of the workers
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.process_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def run_cpu(self, fn: Callable, *args) -> Any:
+        """Run a picklable function in the process pool; metrics it records are merged back here"""
+        pool = self._process_pool()
+        if pool is None:
+            return await asyncio.to_thread(fn, *args)
+        result, metric_deltas, worker_memory = await asyncio.get_running_loop().run_in_executor(pool, run_recorded, fn, *args)
+        merge_recorded(metric_deltas, worker_memory)
+        return result
+
+    async def run_model(self, fn: Callable, *args) -> Any:
+        """Run model-bound work (embedding) on the server's model threads; torch parallelizes within each call"""
+        if self._model_executor is None:
+            self._model_executor = ThreadPoolExecutor(max_workers=self.model_threads, thread_name_prefix="embedding")
+        return await asyncio.get_running_loop().run_in_executor(self._model_executor, fn, *args)
+
+    async def run_io(self, fn: Callable, *args) -> Any:
+        """Run a blocking or async I/O call with bounded concurrency"""
+        loop = asyncio.get_running_loop()
+        if loop not in self._io_semaphores:
+            self._io_semaphores[loop] = asyncio.Semaphore(self.io_concurrency)
+        async with self._io_semaphores[loop]:
+            if asyncio.iscoroutinefunction(fn):
+                return await fn(*args)
+            return await asyncio.to_thread(fn, *args)
+
+    async def map_cpu(self, fn: Callable, args_list: Iterable[tuple], on_done: Optional[Callable[[], None]] = None) -> List[Any]:
+        return await self._gather([self.run_cpu(fn, *args) for args in args_list], on_done)
+
+    async def map_model(self, fn: Callable, args_list: Iterable[tuple], on_done: Optional[Callable[[], None]] = None) -> List[Any]:
+        return await self._gather([self.run_model(fn, *args) for args in args_list], on_done)
+
+    @staticmethod
+    async def _gather(coroutines: List[Awaitable], on_done: Optional[Callable[[], None]]) -> List[Any]:
+        """Await all coroutines, returning results in order and calling on_done as each one finishes"""
+        if on_done is None:
+            return await gather_or_cancel(*coroutines)
+
+        async def tracked(coroutine):
+            result = await coroutine
+            on_done()
+            return result
+
+        return await gather_or_cancel(*(tracked(coroutine) for coroutine in coroutines))
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            WORKER_RESIDENT_MEMORY.clear()
+        if self._model_executor is not None:
+            self._model_executor.shutdown(wait=False, cancel_futures=True)
+            self._model_executor = None
+
+
+evaluation_engine = EvaluationEngine()
@@ -1,8 +1,11 @@
-from typing import List
+from typing import List, Optional, Tuple
 import json
 from dotenv import load_dotenv
 from google import genai
 import openai
+from components.llm_scheduler import llm_scheduler, estimate_tokens
+from components.llm_cache import llm_cache
+from components.metrics import LLM_CACHE_REQUESTS, LLM_TOKENS
 
 # Load environment variables from .env file
 load_dotenv()
@@ -17,18 +20,10 @@ def format_context_for_llm(chunks: List[str]) -> str:
 
     return f"CONTEXT:\n{context}\n\nBased on the above context, "
 
-def generate_gemini_response(query: str, context: str, api_key: str) -> dict:
-    """
-    Generate a JSON-formatted response from Google Gemini API based on the query and context.
-    Returns a dictionary with 'answer' and 'relevance_analysis' keys.
-    """
-    if not api_key:
-        return {"error": "Gemini API key not found. Please set GEMINI_API_KEY in your environment variables."}
-
-    client = genai.Client(api_key=api_key)
-    
+def build_gemini_prompt(query: str, context: str) -> str:
+    """Build the JSON-answer prompt sent to Gemini"""
     # Structure the prompt to request JSON format explicitly
-    prompt = f"""{context}
+    return f"""{context}
 
 Based purely on the above context, respond with a valid JSON object containing:
 
@@ -56,32 +51,12 @@ JSON RESPONSE FORMAT:
 ]
 }}
 """
-    
-    # Set response format to JSON
-    response = client.models.generate_content(
-        model="gemini-2.0-flash",
-        contents=prompt,
-        config={
-            "response_mime_type": "application/json",
-        }
-    )
-    
-    return json.loads(response.text)
-        
-def generate_openai_response(query: str, context: str, api_key: str) -> dict:
-    """
-    Generate a JSON-formatted response from OpenAI API based on the query and context.
-    Returns a dictionary with 'answer' and 'relevance_analysis' keys.
-    """
-    try:
-        if not api_key:
-            return {"error": "OpenAI API key not found. Please set OPENAI_API_KEY in your environment variables."}
-        
-        client = openai.OpenAI(api_key=api_key)
-        
-        # Structure the system and user messages to request JSON format
-        system_message = f"""You are a helpful assistant that can answer questions based on the provided context."""
-        user_message = f"""{context}
+
+def build_openai_messages(query: str, context: str) -> Tuple[str, str]:
+    """Build the system and user messages sent to OpenAI"""
+    # Structure the system and user messages to request JSON format
+    system_message = f"""You are a helpful assistant that can answer questions based on the provided context."""
+    user_message = f"""{context}
 
 Based purely on the above context, respond with a valid JSON object containing:
 
@@ -110,6 +85,43 @@ JSON RESPONSE FORMAT:
   ]
 }}
 """
+    return system_message, user_message
+
+def generate_gemini_response(query: str, context: str, api_key: str) -> dict:
+    """
+    Generate a JSON-formatted response from Google Gemini API based on the query and context.
+    Returns a dictionary with 'answer' and 'relevance_analysis' keys.
+    """
+    if not api_key:
+        return {"error": "Gemini API key not found. Please set GEMINI_API_KEY in your environment variables."}
+
+    client = genai.Client(api_key=api_key)
+    
+    prompt = build_gemini_prompt(query, context)
+    
+    # Set response format to JSON
+    response = client.models.generate_content(
+        model="gemini-2.0-flash",
+        contents=prompt,
+        config={
+            "response_mime_type": "application/json",
+        }
+    )
+    
+    return json.loads(response.text)
+        
+def generate_openai_response(query: str, context: str, api_key: str) -> dict:
+    """
+    Generate a JSON-formatted response from OpenAI API based on the query and context.
+    Returns a dictionary with 'answer' and 'relevance_analysis' keys.
+    """
+    try:
+        if not api_key:
+            return {"error": "OpenAI API key not found. Please set OPENAI_API_KEY in your environment variables."}
+        
+        client = openai.OpenAI(api_key=api_key)
+        
+        system_message, user_message = build_openai_messages(query, context)
         
         # Call the OpenAI API with JSON response format
         response = client.chat.completions.create(
@@ -160,6 +172,47 @@ Recommendations
 }}
 """
 
+question_judge_prompt = """## Input Data
+{input_data}
+
+## Input Format
+- "question": the question every configuration answered
+- "configurations": configuration id -> its settings
+- "answers": answer id -> answer text (identical answers are listed once)
+- "results": one entry per configuration (and document, if several), with "answer" referencing an answer id,
+  "rus" = [RUS, Normalized DCR, Similarity-Relevance Correlation, Wasted Similarity Penalty] and
+  "chunks" = [chunk number, similarity score, relevance score] per retrieved chunk
+
+## Evaluation Guidelines
+- Judge only this question. Compare how well each configuration retrieved and used its chunks, and the answers' information coverage.
+- RUS rewards ranking relevant chunks first, similarity scores that predict relevance and little similarity wasted on irrelevant chunks.
+
+## JSON Output Format
+{{
+    "best_configuration": "id of the best configuration for this question",
+    "ranking": ["configuration ids from best to worst"],
+    "rationale": "one or two sentences on why, without repeating numbers"
+}}
+"""
+
+reduce_judge_prompt = """## Input Data
+{input_data}
+
+## Input Format
+- "configurations": configuration id -> its settings
+- "verdicts": one per question, each naming the best configuration, a ranking and a rationale, judged independently
+
+## Evaluation Guidelines
+- Combine the per-question verdicts into an overall judgement. Weigh configurations that win consistently over ones that win once.
+- Analyze both the retrieval and generation components and the patterns behind the verdicts.
+
+## JSON Output Format
+{{
+    "recommendation": "keep it brief, list best configuration details i.e. chunking strategy, embedding model, similarity metric, num chunks, etc.",
+    "analysis": ["insights about the data", "whatever you think is important to know. dont throw numbers, just explain the metrics in a way that is easy to understand", 'keep it relevant, explain why you made the recommendation, short and concise']
+}}
+"""
+
 
 def generate_judge_openai_response(api_key: str, input_data) -> dict:
     """
@@ -204,6 +257,153 @@ def generate_judge_gemini_response(api_key: str, input_data) -> dict:
         return {"error": f"Error: {str(e)}"}
 
 
+def cached_llm_response(cache_key: str, use_cache: bool) -> Optional[dict]:
+    """Return a cached response unless the caller asked to bypass the cache"""
+    if not use_cache:
+        return None
+    cached = llm_cache.get(cache_key)
+    LLM_CACHE_REQUESTS.inc(result="hit" if cached is not None else "miss")
+    return cached
+
+def record_token_usage(provider: str, response) -> None:
+    """Count the prompt and completion tokens an API response reports"""
+    if provider == "openai":
+        usage = getattr(response, "usage", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", None)
+        completion_tokens = getattr(usage, "completion_tokens", None)
+    else:
+        usage = getattr(response, "usage_metadata", None)
+        prompt_tokens = getattr(usage, "prompt_token_count", None)
+        completion_tokens = getattr(usage, "candidates_token_count", None)
+    if prompt_tokens:
+        LLM_TOKENS.inc(prompt_tokens, provider=provider, kind="prompt")
+    if completion_tokens:
+        LLM_TOKENS.inc(completion_tokens, provider=provider, kind="completion")
+
+async def generate_gemini_response_async(query: str, context: str, api_key: str, use_cache: bool = True) -> dict:
+    """
+    Async variant of generate_gemini_response, scheduled under the Gemini rate limits.
+    Responses are cached by (model, prompt, params); use_cache=False forces a fresh call.
+    """
+    if not api_key:
+        return {"error": "Gemini API key not found. Please set GEMINI_API_KEY in your environment variables."}
+
+    prompt = build_gemini_prompt(query, context)
+    config = {"response_mime_type": "application/json"}
+    cache_key = llm_cache.make_key("gemini-2.0-flash", prompt, config)
+    cached = cached_llm_response(cache_key, use_cache)
+    if cached is not None:
+        return cached
 
-    
+    client = genai.Client(api_key=api_key)
+    response = await llm_scheduler.call(
+        "gemini",
+        lambda: client.aio.models.generate_content(
+            model="gemini-2.0-flash",
+            contents=prompt,
+            config=config
+        ),
+        estimated_tokens=estimate_tokens(prompt)
+    )
+
+    record_token_usage("gemini", response)
+    result = json.loads(response.text)
+    llm_cache.put(cache_key, "gemini-2.0-flash", result)
+    return result
+
+async def generate_openai_response_async(query: str, context: str, api_key: str, use_cache: bool = True) -> dict:
+    """
+    Async variant of generate_openai_response, scheduled under the OpenAI rate limits.
+    Responses are cached by (model, prompt, params); use_cache=False forces a fresh call.
+    """
+    try:
+        if not api_key:
+            return {"error": "OpenAI API key not found. Please set OPENAI_API_KEY in your environment variables."}
+
+        system_message, user_message = build_openai_messages(query, context)
+        messages = [
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": user_message}
+        ]
+        params = {"response_format": {"type": "json_object"}, "temperature": 0.2}
+        cache_key = llm_cache.make_key("gpt-4o-mini", messages, params)
+        cached = cached_llm_response(cache_key, use_cache)
+        if cached is not None:
+            return cached
+
+        # SDK-level retries are disabled; the scheduler owns backoff
+        client = openai.AsyncOpenAI(api_key=api_key, max_retries=0)
+        response = await llm_scheduler.call(
+            "openai",
+            lambda: client.chat.completions.create(model="gpt-4o-mini", messages=messages, **params),
+            estimated_tokens=estimate_tokens(system_message, user_message)
+        )
+
+        record_token_usage("openai", response)
+        result = json.loads(response.choices[0].message.content)
+        llm_cache.put(cache_key, "gpt-4o-mini", result)
+        return result
+
+    except Exception as e:
+        return {"error": f"Error: {str(e)}"}
+
+async def generate_judge_openai_response_async(api_key: str, input_data, use_cache: bool = True, prompt_template: str = user_prompt) -> dict:
+    """
+    Async variant of generate_judge_openai_response.
+    prompt_template selects the judge step (user_prompt, question_judge_prompt or reduce_judge_prompt).
+    """
+    try:
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt_template.format(input_data=input_data)}
+        ]
+        params = {"response_format": {"type": "json_object"}, "temperature": 0.2}
+        cache_key = llm_cache.make_key("gpt-4o-mini", messages, params)
+        cached = cached_llm_response(cache_key, use_cache)
+        if cached is not None:
+            return cached
+
+        client = openai.AsyncOpenAI(api_key=api_key, max_retries=0)
+        response = await llm_scheduler.call(
+            "openai",
+            lambda: client.chat.completions.create(model="gpt-4o-mini", messages=messages, **params),
+            estimated_tokens=estimate_tokens(*(message["content"] for message in messages))
+        )
+
+        record_token_usage("openai", response)
+        result = json.loads(response.choices[0].message.content)
+        llm_cache.put(cache_key, "gpt-4o-mini", result)
+        return result
+    except Exception as e:
+        return {"error": f"Error: {str(e)}"}
+
+async def generate_judge_gemini_response_async(api_key: str, input_data, use_cache: bool = True, prompt_template: str = user_prompt) -> dict:
+    """
+    Async variant of generate_judge_gemini_response.
+    prompt_template selects the judge step (user_prompt, question_judge_prompt or reduce_judge_prompt).
+    """
+    try:
+        contents = system_prompt + "\n\n" + prompt_template.format(input_data=input_data)
+        config = {"response_mime_type": "application/json"}
+        cache_key = llm_cache.make_key("gemini-2.0-flash", contents, config)
+        cached = cached_llm_response(cache_key, use_cache)
+        if cached is not None:
+            return cached
+
+        client = genai.Client(api_key=api_key)
+        response = await llm_scheduler.call(
+            "gemini",
+            lambda: client.aio.models.generate_content(
+                model="gemini-2.0-flash",
+                contents=contents,
+                config=config
+            ),
+            estimated_tokens=estimate_tokens(contents)
+        )
 
+        record_token_usage("gemini", response)
+        result = json.loads(response.text)
+        llm_cache.put(cache_key, "gemini-2.0-flash", result)
+        return result
+    except Exception as e:
+        return {"error": f"Error: {str(e)}"}
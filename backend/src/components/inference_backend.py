@@ -0,0 +1,142 @@
+import os
+import sys
+from typing import Any, Callable, Dict, List
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# "torch" runs the fp32 models as loaded; "quantized" uses int8 dynamic quantization of linear layers
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+QUANTIZABLE_MODELS = ("bert", "roberta", "distilbert", "gpt2")
+QUANTIZED_MODEL_DIR = os.getenv("QUANTIZED_MODEL_DIR", "data/models/quantized")
+
+
+def uses_quantized_backend(model_name: str) -> bool:
+    return EMBEDDING_BACKEND == "quantized" and model_name in QUANTIZABLE_MODELS
+
+
+# Models whose embeddings changed definition; the revision keeps vectors cached before the change from being reused
+EMBEDDING_REVISIONS = {"gpt2": "last-token"}
+
+
+def model_variant(model_name: str) -> str:
+    """Name that embeddings are cached and stored under; quantized models and revised poolings get their own"""
+    name = f"{model_name}:{EMBEDDING_REVISIONS[model_name]}" if model_name in EMBEDDING_REVISIONS else model_name
+    return f"{name}+int8" if uses_quantized_backend(model_name) else name
+
+
+def retired_variants() -> List[str]:
+    """Names that revised models were cached under before their revision; nothing reads them any more"""
+    return [name for model_name in EMBEDDING_REVISIONS for name in (model_name, f"{model_name}+int8")]
+
+
+def configure_threads() -> None:
+    """Apply EMBEDDING_NUM_THREADS / EMBEDDING_INTEROP_THREADS to torch"""
+    import torch
+    threads = os.getenv("EMBEDDING_NUM_THREADS")
+    if threads:
+        torch.set_num_threads(int(threads))
+    interop_threads = os.getenv("EMBEDDING_INTEROP_THREADS")
+    if interop_threads:
+        try:
+            torch.set_num_interop_threads(int(interop_threads))
+        except RuntimeError:
+            # Can only be set before the first parallel region of the process
+            pass
+
+
+def _conv1d_to_linear(model: Any) -> Any:
+    """GPT-2 uses transformers' Conv1D (x @ W + b); swap it for nn.Linear so it can be quantized"""
+    import torch
+    for name, module in list(model.named_children()):
+        if type(module).__name__ == "Conv1D":
+            in_features, out_features = module.weight.shape
+            linear = torch.nn.Linear(in_features, out_features)
+            linear.weight.data = module.weight.data.t().contiguous()
+            linear.bias.data = module.bias.data
+            setattr(model, name, linear)
+        else:
+            _conv1d_to_linear(module)
+    return model
+
+
+def quantize_bundle(bundle: Dict[str, Any]) -> Dict[str, Any]:
+    import torch
+    model = _conv1d_to_linear(bundle["model"].eval())
+    quantized = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return {**bundle, "model": quantized}
+
+
+def quantized_loader(model_name: str, loader: Callable[[], Dict[str, Any]], artifact_dir: str = QUANTIZED_MODEL_DIR) -> Callable[[], Dict[str, Any]]:
+    """
+    Loader for the int8 variant of a model. The quantized bundle (model and tokenizer)
+    is saved under artifact_dir on first load, so later loads skip the fp32 weights
+    and the conversion.
+    """
+    def load() -> Dict[str, Any]:
+        import torch
+        path = os.path.join(artifact_dir, f"{model_name}.pt")
+        if os.path.exists(path):
+            return torch.load(path, weights_only=False)
+        bundle = quantize_bundle(loader())
+        os.makedirs(artifact_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        torch.save(bundle, tmp_path)
+        os.replace(tmp_path, path)
+        return bundle
+    return load
+
+
+def backend_loaders(loaders: Dict[str, Callable[[], Dict[str, Any]]]) -> Dict[str, Callable[[], Dict[str, Any]]]:
+    """Wrap the model loaders for the configured backend and thread settings"""
+    def with_threads(loader: Callable[[], Dict[str, Any]]) -> Callable[[], Dict[str, Any]]:
+        def load() -> Dict[str, Any]:
+            configure_threads()
+            return loader()
+        return load
+
+    return {
+        name: with_threads(quantized_loader(name, loader) if uses_quantized_backend(name) else loader)
+        for name, loader in loaders.items()
+    }
+
+
+def parity_check(model_name: str, texts: List[str], queries: List[str], k: int = 5) -> Dict[str, float]:
+    """
+    Compare the int8 model against fp32 on the same texts: cosine drift of each
+    embedding and the overlap of the top-k texts retrieved for each query.
+    """
+    from components.model_registry import MODEL_LOADERS, ModelRegistry
+    from components.embedding import EmbeddingGenerator
+    from components.similarity_metrics import SimilarityCalculator
+
+    # Private registries, so the check neither swaps nor evicts the server's models
+    fp32 = ModelRegistry({model_name: MODEL_LOADERS[model_name]})
+    int8 = ModelRegistry({model_name: quantized_loader(model_name, MODEL_LOADERS[model_name])})
+    fp32_texts = EmbeddingGenerator.compute_embeddings(texts, model_name, registry=fp32)
+    fp32_queries = EmbeddingGenerator.compute_embeddings(queries, model_name, registry=fp32)
+    int8_texts = EmbeddingGenerator.compute_embeddings(texts, model_name, registry=int8)
+    int8_queries = EmbeddingGenerator.compute_embeddings(queries, model_name, registry=int8)
+
+    drift = 1 - np.einsum("ij,ij->i", fp32_texts, int8_texts) / (
+        np.linalg.norm(fp32_texts, axis=1) * np.linalg.norm(int8_texts, axis=1)
+    )
+    fp32_top = SimilarityCalculator.top_k_indices_batch(SimilarityCalculator.cosine_matrix(fp32_queries, fp32_texts), k)
+    int8_top = SimilarityCalculator.top_k_indices_batch(SimilarityCalculator.cosine_matrix(int8_queries, int8_texts), k)
+    overlap = [len(np.intersect1d(a, b)) / max(1, len(a)) for a, b in zip(fp32_top, int8_top)]
+
+    return {
+        "mean_cosine_drift": float(drift.mean()),
+        "max_cosine_drift": float(drift.max()),
+        "top_k_overlap": float(np.mean(overlap)),
+        "k": k,
+    }
+
+
+if __name__ == "__main__":
+    # python -m components.inference_backend <model> <text file>
+    # Paragraphs are the corpus; the first sentences of the first 20 are the queries
+    with open(sys.argv[2], "r", encoding="utf-8") as f:
+        paragraphs = [p.strip() for p in f.read().split("\n\n") if p.strip()]
+    print(parity_check(sys.argv[1], paragraphs, [p.split(". ")[0] for p in paragraphs[:20]]))
@@ -0,0 +1,104 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class LLMResponseCache:
+    """
+    Persistent cache of parsed LLM responses keyed by a hash of the model,
+    the fully rendered prompt and the generation parameters.
+    Entries expire after ttl_seconds; least recently used entries are evicted
+    once the stored responses exceed max_bytes.
+    """
+    def __init__(self, db_path: str = "data/llm_cache.sqlite", ttl_seconds: Optional[float] = None, max_bytes: Optional[int] = None):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS responses (
+                    cache_key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+        return self._conn
+
+    @staticmethod
+    def make_key(model: str, prompt: Any, params: Dict[str, Any]) -> str:
+        payload = json.dumps({"model": model, "prompt": prompt, "params": params}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, cache_key: str) -> Optional[dict]:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT response, created_at FROM responses WHERE cache_key = ?", (cache_key,)).fetchone()
+            if row is None:
+                return None
+            response, created_at = row
+            with conn:
+                if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                    conn.execute("DELETE FROM responses WHERE cache_key = ?", (cache_key,))
+                    return None
+                conn.execute("UPDATE responses SET accessed_at = ? WHERE cache_key = ?", (now, cache_key))
+        return json.loads(response)
+
+    def put(self, cache_key: str, model: str, response: dict) -> None:
+        serialized = json.dumps(response)
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (cache_key, model, response, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (cache_key, model, serialized, len(serialized), now, now)
+                )
+                self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        if self.ttl_seconds is not None:
+            conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        if self.max_bytes is None:
+            return
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Walk entries from least recently used and drop until under budget
+        to_delete = []
+        for cache_key, size in conn.execute("SELECT cache_key, size FROM responses ORDER BY accessed_at ASC"):
+            if total <= self.max_bytes:
+                break
+            to_delete.append((cache_key,))
+            total -= size
+        conn.executemany("DELETE FROM responses WHERE cache_key = ?", to_delete)
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM responses")
+
+
+llm_cache = LLMResponseCache(
+    ttl_seconds=float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+    max_bytes=int(float(os.getenv("LLM_CACHE_MAX_MB", "256")) * 1024 * 1024)
+)
@@ -0,0 +1,144 @@
+import asyncio
+import os
+import random
+import time
+import weakref
+from typing import Any, Awaitable, Callable, Dict
+from dotenv import load_dotenv
+from components.metrics import LLM_REQUEST_SECONDS, LLM_REQUESTS, LLM_RETRIES
+
+load_dotenv()
+
+# Default quotas per provider; override with e.g. OPENAI_RPM / OPENAI_TPM / GEMINI_RPM / GEMINI_TPM
+DEFAULT_LIMITS = {
+    "openai": {"rpm": 500, "tpm": 200000},
+    "gemini": {"rpm": 1000, "tpm": 1000000},
+}
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+def estimate_tokens(*texts: str) -> int:
+    """Rough token estimate (about 4 characters per token) used for TPM budgeting"""
+    return sum(len(text or "") for text in texts) // 4 + 1
+
+
+class TokenBucket:
+    """Async token bucket that refills continuously at rate_per_minute"""
+    def __init__(self, rate_per_minute: float):
+        self.capacity = float(rate_per_minute)
+        self.tokens = float(rate_per_minute)
+        self.rate_per_second = rate_per_minute / 60.0
+        self.updated_at = time.monotonic()
+        # One lock per event loop: asyncio primitives bind to the loop they are first used on
+        self._locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_second)
+        self.updated_at = now
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        # Requests larger than the bucket are clamped so they can still run, just alone
+        amount = min(amount, self.capacity)
+        loop = asyncio.get_running_loop()
+        if loop not in self._locks:
+            self._locks[loop] = asyncio.Lock()
+        async with self._locks[loop]:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate_per_second)
+
+
+class ProviderLimiter:
+    """Requests-per-minute and tokens-per-minute buckets for one provider"""
+    def __init__(self, rpm: float, tpm: float):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+
+    async def acquire(self, estimated_tokens: int) -> None:
+        await self.requests.acquire(1)
+        await self.tokens.acquire(estimated_tokens)
+
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits, server errors, timeouts and connection failures are retried"""
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    status_code = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if isinstance(status_code, int):
+        return status_code in RETRYABLE_STATUS_CODES
+    # SDK connection/timeout errors carry no status code
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+class LLMScheduler:
+    """
+    Bounded-concurrency scheduler for async LLM calls with per-provider
+    rate limits, per-call timeouts and exponential backoff on transient errors.
+    """
+    def __init__(
+        self,
+        max_concurrency: int = 20,
+        timeout_seconds: float = 120.0,
+        max_retries: int = 5,
+        base_delay_seconds: float = 1.0,
+        max_delay_seconds: float = 30.0
+    ):
+        self.max_concurrency = max_concurrency
+        self.timeout_seconds = timeout_seconds
+        self.max_retries = max_retries
+        self.base_delay_seconds = base_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self._limiters: Dict[str, ProviderLimiter] = {}
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+    def limiter(self, provider: str) -> ProviderLimiter:
+        if provider not in self._limiters:
+            defaults = DEFAULT_LIMITS.get(provider, {"rpm": 60, "tpm": 100000})
+            rpm = float(os.getenv(f"{provider.upper()}_RPM", defaults["rpm"]))
+            tpm = float(os.getenv(f"{provider.upper()}_TPM", defaults["tpm"]))
+            self._limiters[provider] = ProviderLimiter(rpm, tpm)
+        return self._limiters[provider]
+
+    def backoff_delay(self, attempt: int) -> float:
+        delay = min(self.max_delay_seconds, self.base_delay_seconds * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def call(self, provider: str, request: Callable[[], Awaitable[Any]], estimated_tokens: int = 1) -> Any:
+        """Run request() under the provider's quota, retrying transient failures"""
+        # Semaphores bind to the loop they are first used on, so each event loop gets its own
+        loop = asyncio.get_running_loop()
+        if loop not in self._semaphores:
+            self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        semaphore = self._semaphores[loop]
+
+        attempt = 0
+        while True:
+            await self.limiter(provider).acquire(estimated_tokens)
+            try:
+                async with semaphore:
+                    started = time.perf_counter()
+                    response = await asyncio.wait_for(request(), timeout=self.timeout_seconds)
+                LLM_REQUEST_SECONDS.observe(time.perf_counter() - started, provider=provider, outcome="success")
+                LLM_REQUESTS.inc(provider=provider, outcome="success")
+                return response
+            except Exception as e:
+                LLM_REQUEST_SECONDS.observe(time.perf_counter() - started, provider=provider, outcome="error")
+                if attempt >= self.max_retries or not is_retryable(e):
+                    LLM_REQUESTS.inc(provider=provider, outcome="error")
+                    raise
+                LLM_RETRIES.inc(provider=provider)
+                await asyncio.sleep(self.backoff_delay(attempt))
+                attempt += 1
+
+
+# Same variable as the evaluation engine's I/O slots, so one setting bounds concurrent LLM calls
+llm_scheduler = LLMScheduler(
+    max_concurrency=max(1, int(os.getenv("RAG_LLM_CONCURRENCY", "20"))),
+    timeout_seconds=float(os.getenv("LLM_TIMEOUT_SECONDS", "120")),
+    max_retries=int(os.getenv("LLM_MAX_RETRIES", "5"))
+)
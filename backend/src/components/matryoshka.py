@@ -0,0 +1,50 @@
+from typing import Tuple
+import numpy as np
+from components.similarity_metrics import SimilarityCalculator, as_query_matrix
+
+# Models trained so that embedding prefixes of these lengths stay meaningful
+MATRYOSHKA_DIMENSIONS = {
+    "fine-tuned-financial": [64, 128, 256, 512, 768],
+}
+
+
+def supports_dimension(model_name: str, dimension: int) -> bool:
+    return dimension in MATRYOSHKA_DIMENSIONS.get(model_name, [])
+
+
+def truncate_embeddings(embeddings, dimension: int) -> np.ndarray:
+    """Keep the first dimension values of each embedding and renormalize to unit length"""
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    prefix = np.array(matrix[..., :dimension], dtype=np.float32)
+    norms = np.linalg.norm(prefix, axis=-1, keepdims=True)
+    return np.divide(prefix, norms, out=np.zeros_like(prefix), where=norms > 0)
+
+
+def coarse_to_fine_search(
+    query_embeddings,
+    chunk_embeddings,
+    similarity_metric: str,
+    k: int,
+    coarse_dimension: int,
+    rescore_factor: int = 4
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Scan all chunks on a short renormalized prefix, then rescore the k * rescore_factor
+    best candidates per query with the full stored embeddings. Returns the QxN
+    similarity matrix (exact for the rescored entries) and the Qxk top chunk ids.
+    """
+    queries = as_query_matrix(query_embeddings)
+    similarity_matrix = SimilarityCalculator.similarity_matrix(
+        truncate_embeddings(queries, coarse_dimension),
+        truncate_embeddings(chunk_embeddings, coarse_dimension),
+        similarity_metric
+    )
+    candidates = SimilarityCalculator.top_k_indices_batch(similarity_matrix, k * rescore_factor)
+
+    top_indices = np.empty((len(queries), min(k, similarity_matrix.shape[1])), dtype=np.int64)
+    for i, query_candidates in enumerate(candidates):
+        rows = np.sort(query_candidates)
+        exact = SimilarityCalculator.similarity_matrix(queries[i], np.asarray(chunk_embeddings[rows]), similarity_metric)[0]
+        similarity_matrix[i, rows] = exact
+        top_indices[i] = rows[SimilarityCalculator.top_k_indices(exact, k)]
+    return similarity_matrix, top_indices
@@ -0,0 +1,288 @@
+import functools
+import os
+import resource
+import sys
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Seconds; spans fast in-process stages up to LLM calls and whole pipeline runs
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{_escape(extra[1])}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """A named metric with a fixed set of label names; one series per label combination"""
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._series: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._series.get(self._key(labels), 0.0)
+
+    def take(self) -> Dict[Tuple[str, ...], float]:
+        with self._lock:
+            series, self._series = self._series, {}
+        return series
+
+    def merge(self, series: Dict[Tuple[str, ...], float]) -> None:
+        with self._lock:
+            for key, value in series.items():
+                self._series[key] = self._series.get(key, 0.0) + value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted(self._series.items())
+        return self.header() + [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in series]
+
+
+class Gauge(Metric):
+    """A value set directly, or read from a callback at scrape time"""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, label_names)
+        self._function: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series = {}
+
+    def set_function(self, function: Callable[[], Any]) -> None:
+        """function returns a number, or a {label values tuple: number} dict for labelled gauges"""
+        self._function = function
+
+    def render(self) -> List[str]:
+        if self._function is not None:
+            try:
+                values = self._function()
+            except Exception:
+                values = {}
+            series = sorted(values.items()) if isinstance(values, dict) else [((), values)]
+        else:
+            with self._lock:
+                series = sorted(self._series.items())
+        return self.header() + [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in series]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._series.get(key, ([0] * len(self.buckets), 0.0))
+            counts[bisect_left(self.buckets, value)] += 1
+            self._series[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def take(self) -> Dict[Tuple[str, ...], Tuple[List[int], float]]:
+        with self._lock:
+            series, self._series = self._series, {}
+        return series
+
+    def merge(self, series: Dict[Tuple[str, ...], Tuple[List[int], float]]) -> None:
+        with self._lock:
+            for key, (counts, total) in series.items():
+                current_counts, current_total = self._series.get(key, ([0] * len(self.buckets), 0.0))
+                self._series[key] = ([a + b for a, b in zip(current_counts, counts)], current_total + total)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, (list(counts), total)) for key, (counts, total) in self._series.items())
+        lines = self.header()
+        for key, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, ('le', _format_value(bound)))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Process-wide metrics rendered in the Prometheus text exposition format.
+    Worker processes record into their own registry; take_deltas() / merge_deltas()
+    carry their counters and histograms back to the server process.
+    """
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Any:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, label_names))
+
+    def gauge(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, label_names))
+
+    def histogram(self, name: str, documentation: str, label_names: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, label_names, buckets))
+
+    def take_deltas(self) -> Dict[str, Any]:
+        """Counter and histogram values recorded since the last call, resetting them"""
+        deltas = {}
+        for name, metric in self._metrics.items():
+            if isinstance(metric, (Counter, Histogram)):
+                series = metric.take()
+                if series:
+                    deltas[name] = series
+        return deltas
+
+    def merge_deltas(self, deltas: Dict[str, Any]) -> None:
+        for name, series in deltas.items():
+            metric = self._metrics.get(name)
+            if isinstance(metric, (Counter, Histogram)):
+                metric.merge(series)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def resident_memory_bytes() -> float:
+    """Current resident set size from /proc, or the peak RSS where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return float(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE"))
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+        return float(peak if sys.platform == "darwin" else peak * 1024)
+
+
+metrics_registry = MetricsRegistry()
+
+STAGE_SECONDS = metrics_registry.histogram(
+    "rag_stage_duration_seconds", "Time spent in one stage of a pipeline", ("pipeline", "stage")
+)
+PIPELINE_SECONDS = metrics_registry.histogram(
+    "rag_pipeline_duration_seconds", "End-to-end duration of a pipeline run", ("pipeline", "status")
+)
+PAGES_EXTRACTED = metrics_registry.counter("rag_pdf_pages_extracted_total", "PDF pages parsed")
+DOCUMENT_UPLOADS = metrics_registry.counter("rag_document_uploads_total", "Uploaded documents", ("result",))
+EMBEDDING_BATCH_SECONDS = metrics_registry.histogram(
+    "rag_embedding_batch_duration_seconds", "Model inference time of one embedding batch", ("model",)
+)
+TEXTS_EMBEDDED = metrics_registry.counter("rag_texts_embedded_total", "Texts (chunks, queries, answers) run through a model", ("model",))
+EMBEDDING_CACHE_REQUESTS = metrics_registry.counter(
+    "rag_embedding_cache_requests_total", "Embedding cache lookups of distinct texts", ("model", "result")
+)
+MODEL_LOAD_SECONDS = metrics_registry.histogram("rag_model_load_duration_seconds", "Time to load an embedding model", ("model",))
+# Only observed when RAG_INDEX_MEASURE_RECALL=1, since each observation costs an exact search
+CORPUS_INDEX_RECALL = metrics_registry.histogram(
+    "rag_corpus_index_recall", "Recall@k of a corpus index search against exact search", ("similarity_metric",),
+    buckets=(0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 0.99, 1.0)
+)
+LLM_REQUEST_SECONDS = metrics_registry.histogram(
+    "rag_llm_request_duration_seconds", "Latency of one LLM API attempt", ("provider", "outcome")
+)
+LLM_REQUESTS = metrics_registry.counter("rag_llm_requests_total", "LLM calls by final outcome", ("provider", "outcome"))
+LLM_RETRIES = metrics_registry.counter("rag_llm_retries_total", "LLM attempts retried after a transient error", ("provider",))
+LLM_TOKENS = metrics_registry.counter("rag_llm_tokens_total", "Tokens reported by the LLM APIs", ("provider", "kind"))
+LLM_CACHE_REQUESTS = metrics_registry.counter("rag_llm_cache_requests_total", "LLM response cache lookups", ("result",))
+# Embedding models only run in the server process (worker processes never load one)
+MODELS_LOADED = metrics_registry.gauge("rag_embedding_models_loaded", "Embedding models resident in the server process")
+MODEL_RESIDENT_BYTES = metrics_registry.gauge(
+    "rag_embedding_model_resident_bytes", "Estimated parameter memory of the embedding models loaded in the server process"
+)
+RESIDENT_MEMORY = metrics_registry.gauge("process_resident_memory_bytes", "Resident memory of the server process")
+RESIDENT_MEMORY.set_function(resident_memory_bytes)
+WORKER_RESIDENT_MEMORY = metrics_registry.gauge(
+    "rag_worker_resident_memory_bytes", "Resident memory of each worker process, as of its last finished task", ("pid",)
+)
+
+
+def run_recorded(fn: Callable, *args) -> Tuple[Any, Dict[str, Any], Tuple[int, float]]:
+    """
+    Run fn in a worker process. Returns its result, the metrics it recorded and
+    the worker's (pid, resident memory) for the server to report.
+    """
+    result = fn(*args)
+    return result, metrics_registry.take_deltas(), (os.getpid(), resident_memory_bytes())
+
+
+def merge_recorded(metric_deltas: Dict[str, Any], worker_memory: Tuple[int, float]) -> None:
+    """Fold what run_recorded returned from a worker into the server's metrics"""
+    metrics_registry.merge_deltas(metric_deltas)
+    pid, resident_bytes = worker_memory
+    WORKER_RESIDENT_MEMORY.set(resident_bytes, pid=pid)
+
+
+def timed_pipeline(pipeline: str) -> Callable:
+    """Decorator recording the duration and outcome of an async pipeline entry point"""
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            status = "error"
+            try:
+                result = await fn(*args, **kwargs)
+                status = "success"
+                return result
+            finally:
+                PIPELINE_SECONDS.observe(time.perf_counter() - started, pipeline=pipeline, status=status)
+        return wrapper
+    return decorator
@@ -0,0 +1,153 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+from dotenv import load_dotenv
+from components.inference_backend import backend_loaders
+from components.metrics import MODEL_LOAD_SECONDS, MODELS_LOADED, MODEL_RESIDENT_BYTES
+
+load_dotenv()
+
+
+def _load_sentence_transformer(name: str) -> Dict[str, Any]:
+    from sentence_transformers import SentenceTransformer
+    return {"model": SentenceTransformer(name, device="cpu")}
+
+
+def _load_bert() -> Dict[str, Any]:
+    from transformers import BertModel, BertTokenizer
+    return {
+        "tokenizer": BertTokenizer.from_pretrained("bert-base-uncased"),
+        "model": BertModel.from_pretrained("bert-base-uncased"),
+    }
+
+
+def _load_roberta() -> Dict[str, Any]:
+    from transformers import RobertaModel, RobertaTokenizer
+    return {
+        "tokenizer": RobertaTokenizer.from_pretrained("roberta-base"),
+        "model": RobertaModel.from_pretrained("roberta-base"),
+    }
+
+
+def _load_distilbert() -> Dict[str, Any]:
+    from transformers import DistilBertModel, DistilBertTokenizer
+    return {
+        "tokenizer": DistilBertTokenizer.from_pretrained("distilbert-base-uncased"),
+        "model": DistilBertModel.from_pretrained("distilbert-base-uncased"),
+    }
+
+
+def _load_gpt2() -> Dict[str, Any]:
+    from transformers import GPT2Model, GPT2Tokenizer
+    tokenizer = GPT2Tokenizer.from_pretrained("gpt2")
+    tokenizer.pad_token = tokenizer.eos_token
+    return {"tokenizer": tokenizer, "model": GPT2Model.from_pretrained("gpt2")}
+
+
+MODEL_LOADERS: Dict[str, Callable[[], Dict[str, Any]]] = {
+    "sentence-transformer": lambda: _load_sentence_transformer("all-MiniLM-L6-v2"),
+    "bert": _load_bert,
+    "roberta": _load_roberta,
+    "distilbert": _load_distilbert,
+    "gpt2": _load_gpt2,
+    "fine-tuned-financial": lambda: _load_sentence_transformer("philschmid/bge-base-financial-matryoshka"),
+}
+
+
+def estimate_model_bytes(model: Any) -> int:
+    """Estimate the resident size of a torch module from its parameters and buffers"""
+    try:
+        tensors = list(model.parameters()) + list(model.buffers())
+    except AttributeError:
+        return 0
+    size = sum(t.numel() * t.element_size() for t in tensors)
+    # Dynamically quantized linear layers keep their int8 weights outside parameters()
+    for name, value in model.state_dict().items():
+        if "_packed_params" in name and isinstance(value, tuple):
+            size += sum(t.numel() * t.element_size() for t in value if hasattr(t, "numel"))
+    return size
+
+
+class ModelRegistry:
+    """
+    Loads embedding models on first use and keeps them in memory under a budget.
+    Least recently used models are evicted once the budget is exceeded.
+    """
+    def __init__(self, loaders: Dict[str, Callable[[], Dict[str, Any]]], memory_budget_mb: Optional[float] = None):
+        self.loaders = loaders
+        self.memory_budget_bytes = int(memory_budget_mb * 1024 * 1024) if memory_budget_mb else None
+        self._models: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+
+    def get(self, model_name: str) -> Dict[str, Any]:
+        """Return the loaded model bundle, loading (and evicting others) if needed"""
+        if model_name not in self.loaders:
+            raise ValueError(f"Unknown embedding model: {model_name}")
+
+        with self._lock:
+            if model_name in self._models:
+                self._models.move_to_end(model_name)
+                return self._models[model_name]
+            load_lock = self._load_locks.setdefault(model_name, threading.Lock())
+
+        # Loading holds only this model's lock, so lookups of loaded models never wait on it
+        with load_lock:
+            with self._lock:
+                if model_name in self._models:
+                    self._models.move_to_end(model_name)
+                    return self._models[model_name]
+
+            started = time.perf_counter()
+            bundle = self.loaders[model_name]()
+            MODEL_LOAD_SECONDS.observe(time.perf_counter() - started, model=model_name)
+            size = estimate_model_bytes(bundle["model"])
+
+            with self._lock:
+                self._models[model_name] = bundle
+                self._sizes[model_name] = size
+                self._evict(keep=model_name)
+            return bundle
+
+    def _evict(self, keep: str) -> None:
+        """Drop least recently used models until the budget is respected"""
+        if self.memory_budget_bytes is None:
+            return
+        while self.resident_bytes() > self.memory_budget_bytes and len(self._models) > 1:
+            oldest = next(iter(self._models))
+            if oldest == keep:
+                break
+            self.unload(oldest)
+
+    def unload(self, model_name: str) -> None:
+        with self._lock:
+            self._models.pop(model_name, None)
+            self._sizes.pop(model_name, None)
+
+    def resident_bytes(self) -> int:
+        return sum(self._sizes.values())
+
+    def loaded_models(self) -> List[str]:
+        return list(self._models.keys())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "loaded_models": self.loaded_models(),
+                "resident_bytes": self.resident_bytes(),
+                "model_bytes": dict(self._sizes),
+                "memory_budget_bytes": self.memory_budget_bytes,
+            }
+
+
+def _budget_from_env() -> Optional[float]:
+    value = os.getenv("EMBEDDING_MODEL_MEMORY_BUDGET_MB")
+    return float(value) if value else None
+
+
+model_registry = ModelRegistry(backend_loaders(MODEL_LOADERS), memory_budget_mb=_budget_from_env())
+MODELS_LOADED.set_function(lambda: len(model_registry.loaded_models()))
+MODEL_RESIDENT_BYTES.set_function(model_registry.resident_bytes)
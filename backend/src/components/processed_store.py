@@ -0,0 +1,158 @@
+import fcntl
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+import numpy as np
+from models.processed_document import ProcessedDocument
+from components.quantization import QUANTIZATIONS, QuantizedEmbeddings, pack_binary, quantize
+
+# Fields that identify a processed document; anything else is payload
+KEY_FIELDS = ["content_hash", "chunking_strategy", "token_size", "sentence_size", "paragraph_size", "page_size", "embedding_model"]
+
+
+def processed_key(**fields) -> str:
+    """Build the storage key for a (document, chunking, model) combination"""
+    payload = json.dumps({field: fields.get(field) for field in KEY_FIELDS}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class ProcessedDocumentStore:
+    """
+    Stores processed documents as one directory per (document, chunking, model).
+    Entries are keyed by the document's content hash, so a changed file never hits a stale entry.
+    Each entry holds chunks.json and a float32 embeddings.npy which is memory-mapped on load.
+    A small index.json maps keys to entry metadata for O(1) lookup.
+    """
+    def __init__(self, root: str = "data/processed"):
+        self.root = root
+        self.index_path = os.path.join(root, "index.json")
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[str, Dict[str, Any]]] = None
+
+    def _load_index(self, reload: bool = False) -> Dict[str, Dict[str, Any]]:
+        if self._index is None or reload:
+            os.makedirs(self.root, exist_ok=True)
+            if os.path.exists(self.index_path):
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    self._index = json.load(f)
+            else:
+                self._index = {}
+        return self._index
+
+    @contextmanager
+    def _index_lock(self) -> Iterator[None]:
+        """Exclusive across threads and worker processes, so index updates are never lost"""
+        with self._lock:
+            os.makedirs(self.root, exist_ok=True)
+            with open(self.index_path + ".lock", "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write_index(self) -> None:
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self.index_path)
+
+    @staticmethod
+    def remove_legacy_file(path: str = "data/processed_documents.json") -> bool:
+        """
+        Delete the single-file store used before per-entry directories. Its entries are
+        keyed by file name rather than content hash, so they cannot be imported; those
+        documents are re-embedded once on their next run. Returns True if a file was removed.
+        """
+        if not os.path.exists(path):
+            return False
+        os.remove(path)
+        return True
+
+    def get(self, **fields) -> Optional[ProcessedDocument]:
+        """Return the processed document for the given key fields, or None"""
+        return self.get_by_key(processed_key(**fields))
+
+    def get_by_key(self, key: str) -> Optional[ProcessedDocument]:
+        with self._lock:
+            metadata = self._load_index().get(key)
+            if metadata is None:
+                # Another worker process may have added the entry since the index was read
+                metadata = self._load_index(reload=True).get(key)
+        if metadata is None:
+            return None
+
+        entry_dir = os.path.join(self.root, key)
+        with open(os.path.join(entry_dir, "chunks.json"), "r", encoding="utf-8") as f:
+            chunks = json.load(f)
+        embeddings = np.load(os.path.join(entry_dir, "embeddings.npy"), mmap_mode="r")
+
+        return ProcessedDocument(**metadata, chunks=chunks, embeddings=embeddings)
+
+    def get_quantized(self, key: str, quantization: str) -> Optional[QuantizedEmbeddings]:
+        """
+        Compact codes of an entry's embeddings, written next to embeddings.npy on first
+        use and memory-mapped afterwards. Returns None if the entry does not exist.
+        """
+        entry_dir = os.path.join(self.root, key)
+        full_path = os.path.join(entry_dir, "embeddings.npy")
+        if not os.path.exists(full_path):
+            return None
+        codes_path = os.path.join(entry_dir, f"embeddings.{quantization}.npy")
+        scales_path = os.path.join(entry_dir, f"scales.{quantization}.npy")
+        binary_path = os.path.join(entry_dir, "binary.npy")
+        full_embeddings = np.load(full_path, mmap_mode="r")
+
+        if not os.path.exists(binary_path):
+            self._save_array(binary_path, pack_binary(full_embeddings))
+        if not os.path.exists(codes_path):
+            codes, scales = quantize(full_embeddings, quantization)
+            if scales is not None:
+                self._save_array(scales_path, scales)
+            # Codes are written last: their presence marks a complete entry
+            self._save_array(codes_path, codes)
+
+        codes = np.load(codes_path, mmap_mode="r")
+        scales = np.load(scales_path) if os.path.exists(scales_path) else None
+        binary = np.load(binary_path, mmap_mode="r")
+        return QuantizedEmbeddings(quantization, codes, scales, full_embeddings, binary)
+
+    @staticmethod
+    def _save_array(path: str, array: np.ndarray) -> None:
+        tmp_path = f"{path}.{os.getpid()}.tmp.npy"
+        np.save(tmp_path, array)
+        os.replace(tmp_path, path)
+
+    def put(self, processed_document: ProcessedDocument) -> None:
+        """Persist a processed document and register it in the index"""
+        with self._index_lock():
+            self._load_index(reload=True)
+            self._put_unlocked(processed_document)
+            self._write_index()
+
+    def _put_unlocked(self, processed_document: ProcessedDocument) -> None:
+        metadata = processed_document.model_dump(exclude={"full_text", "pages", "chunks", "embeddings"})
+        key = processed_key(**metadata)
+        entry_dir = os.path.join(self.root, key)
+        os.makedirs(entry_dir, exist_ok=True)
+
+        # Files are replaced atomically: readers may hold the previous embeddings.npy memory-mapped
+        chunks_path = os.path.join(entry_dir, "chunks.json")
+        tmp_path = f"{chunks_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(processed_document.chunks or [], f)
+        os.replace(tmp_path, chunks_path)
+        self._save_array(os.path.join(entry_dir, "embeddings.npy"), np.asarray(processed_document.embeddings, dtype=np.float32))
+        # Quantized codes derived from a previous write are rebuilt on demand
+        derived = ["binary.npy"] + [f"{prefix}.{quantization}.npy" for quantization in QUANTIZATIONS for prefix in ("embeddings", "scales")]
+        for name in derived:
+            if os.path.exists(os.path.join(entry_dir, name)):
+                os.remove(os.path.join(entry_dir, name))
+
+        self._index[key] = metadata
+
+
+processed_store = ProcessedDocumentStore()
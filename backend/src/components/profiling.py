@@ -0,0 +1,149 @@
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Awaitable, Dict, List, Optional, Tuple
+
+# "cprofile": deterministic, event-loop thread only, saved as pstats
+# "sampling": stacks of every thread sampled periodically, saved as a speedscope profile
+PROFILE_MODES = ("cprofile", "sampling")
+PROFILE_EXTENSIONS = {"cprofile": "pstats", "sampling": "speedscope.json"}
+SAMPLING_INTERVAL_SECONDS = float(os.getenv("PROFILE_SAMPLING_INTERVAL_MS", "5")) / 1000
+
+
+class StackSampler:
+    """
+    Samples the Python stack of every thread (except its own) at a fixed interval.
+    Covers work offloaded with asyncio.to_thread, which cProfile on the event loop misses.
+    """
+    def __init__(self, interval: float = SAMPLING_INTERVAL_SECONDS):
+        self.interval = interval
+        self.frames: List[Dict[str, Any]] = []
+        self._frame_ids: Dict[Tuple[str, str, int], int] = {}
+        self.samples: Dict[int, List[Tuple[List[int], float]]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.started_at = 0.0
+        self.ended_at = 0.0
+
+    def _frame_id(self, frame) -> int:
+        code = frame.f_code
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        if key not in self._frame_ids:
+            self._frame_ids[key] = len(self.frames)
+            self.frames.append({"name": code.co_name, "file": code.co_filename, "line": code.co_firstlineno})
+        return self._frame_ids[key]
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._frame_id(frame))
+                    frame = frame.f_back
+                # speedscope stacks run from the root to the leaf
+                self.samples.setdefault(thread_id, []).append((stack[::-1], now - last))
+            last = now
+
+    def start(self) -> None:
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.ended_at = time.perf_counter()
+
+    def speedscope(self, name: str) -> Dict[str, Any]:
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        profiles = []
+        for thread_id, samples in self.samples.items():
+            profiles.append({
+                "type": "sampled",
+                "name": thread_names.get(thread_id, f"thread-{thread_id}"),
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": self.ended_at - self.started_at,
+                "samples": [stack for stack, _ in samples],
+                "weights": [weight for _, weight in samples],
+            })
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "rag-backend",
+            "shared": {"frames": self.frames},
+            "profiles": profiles,
+        }
+
+
+class ProfileStore:
+    """Profiles of individual requests, saved under data/profiles/<session_id>/"""
+    def __init__(self, root: str = "data/profiles"):
+        self.root = root
+
+    def session_dir(self, session_id: str) -> str:
+        if os.path.basename(session_id) != session_id or session_id in ("", ".", ".."):
+            raise ValueError(f"Invalid session id: {session_id}")
+        return os.path.join(self.root, session_id)
+
+    def path(self, session_id: str, filename: str) -> Optional[str]:
+        """Path of a saved profile, or None if it does not exist"""
+        if os.path.basename(filename) != filename:
+            return None
+        path = os.path.join(self.session_dir(session_id), filename)
+        return path if os.path.isfile(path) else None
+
+    def list(self, session_id: str) -> List[str]:
+        directory = self.session_dir(session_id)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(os.listdir(directory))
+
+    def new_path(self, session_id: str, name: str, mode: str) -> str:
+        directory = self.session_dir(session_id)
+        os.makedirs(directory, exist_ok=True)
+        timestamp = time.strftime("%Y%m%d-%H%M%S")
+        return os.path.join(directory, f"{name}-{timestamp}-{os.urandom(3).hex()}.{PROFILE_EXTENSIONS[mode]}")
+
+    async def profile(self, mode: Optional[str], session_id: str, name: str, coroutine: Awaitable) -> Tuple[Any, Optional[str]]:
+        """
+        Await coroutine, profiled when mode is set. Returns (result, profile file name);
+        with no mode the coroutine is awaited directly and nothing is recorded.
+        """
+        if not mode:
+            return await coroutine, None
+        if mode not in PROFILE_MODES:
+            coroutine.close()
+            raise ValueError(f"Unknown profile mode: {mode}. Expected one of {', '.join(PROFILE_MODES)}")
+
+        path = self.new_path(session_id, name, mode)
+        if mode == "cprofile":
+            # Only the event-loop thread is traced, including other requests it serves meanwhile
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                result = await coroutine
+            finally:
+                profiler.disable()
+                profiler.dump_stats(path)
+        else:
+            sampler = StackSampler()
+            sampler.start()
+            try:
+                result = await coroutine
+            finally:
+                sampler.stop()
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(sampler.speedscope(f"{name} {session_id}"), f)
+        return result, os.path.basename(path)
+
+
+profile_store = ProfileStore()
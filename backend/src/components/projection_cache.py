@@ -0,0 +1,157 @@
+import fcntl
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Iterator, Optional
+import joblib
+import numpy as np
+from sklearn.decomposition import PCA
+from sklearn.manifold import TSNE
+import umap
+
+
+# UMAP needs at least this many points to fit and transform; below it every method uses a linear layout
+MIN_FIT_CHUNKS = 4
+
+
+class LinearLayout:
+    """Projection onto the chunks' principal directions, for corpora too small to fit a reducer"""
+    def __init__(self, chunk_embeddings: np.ndarray):
+        self.mean = chunk_embeddings.mean(axis=0)
+        _, _, directions = np.linalg.svd(chunk_embeddings - self.mean, full_matrices=False)
+        # n chunks span at most n - 1 directions; a single chunk sits at the origin
+        self.components = directions[:min(2, len(chunk_embeddings) - 1)]
+
+    def transform(self, points: np.ndarray) -> np.ndarray:
+        coords = np.zeros((len(points), 2), dtype=np.float32)
+        coords[:, :len(self.components)] = (points - self.mean) @ self.components.T
+        return coords
+
+
+class Projection:
+    """
+    A 2D projection fitted once on a document's chunk embeddings.
+    New points (queries, responses) are placed without refitting.
+    Only t-SNE, which has no transform, keeps the chunk embeddings for placement.
+    """
+    def __init__(self, method: str, chunk_coords: np.ndarray, reducer=None, chunk_embeddings: Optional[np.ndarray] = None):
+        self.method = method
+        self.chunk_coords = chunk_coords
+        self.reducer = reducer
+        self.chunk_embeddings = chunk_embeddings
+
+    @staticmethod
+    def fit(method: str, chunk_embeddings) -> "Projection":
+        if method not in ("pca", "umap", "tsne"):
+            raise ValueError(f"Unknown projection method: {method}")
+        chunk_embeddings = np.asarray(chunk_embeddings, dtype=np.float32)
+        n_chunks = len(chunk_embeddings)
+
+        if n_chunks < MIN_FIT_CHUNKS:
+            reducer = LinearLayout(chunk_embeddings)
+            return Projection(method, reducer.transform(chunk_embeddings), reducer)
+        if method == "pca":
+            reducer = PCA(n_components=min(2, n_chunks, chunk_embeddings.shape[1]))
+            return Projection(method, reducer.fit_transform(chunk_embeddings), reducer)
+        elif method == "umap":
+            n_neighbors = min(15, max(5, n_chunks // 4), max(2, n_chunks - 1))
+            reducer = umap.UMAP(n_components=2, n_neighbors=n_neighbors, min_dist=0.1, metric='cosine', random_state=42)
+            return Projection(method, reducer.fit_transform(chunk_embeddings), reducer)
+        # t-SNE has no transform; new points are placed from their nearest chunks
+        perplexity = min(30, max(5, n_chunks // 4), n_chunks - 1)
+        tsne = TSNE(n_components=2, perplexity=perplexity, random_state=42, max_iter=1000)
+        return Projection(method, tsne.fit_transform(chunk_embeddings), chunk_embeddings=chunk_embeddings)
+
+    def place(self, points) -> np.ndarray:
+        """Project new points into the fitted 2D space"""
+        points = np.atleast_2d(np.asarray(points, dtype=np.float32))
+        if self.reducer is not None:
+            return self.reducer.transform(points)
+        return self._place_by_neighbors(points)
+
+    def _place_by_neighbors(self, points: np.ndarray, k: int = 10) -> np.ndarray:
+        """Similarity-weighted average of the k most cosine-similar chunks' coordinates"""
+        chunk_norms = np.linalg.norm(self.chunk_embeddings, axis=1)
+        point_norms = np.linalg.norm(points, axis=1)
+        denominator = np.outer(point_norms, chunk_norms)
+        dots = points @ self.chunk_embeddings.T
+        similarities = np.divide(dots, denominator, out=np.zeros_like(dots), where=denominator > 0)
+
+        k = min(k, similarities.shape[1])
+        neighbors = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+        neighbor_similarities = np.take_along_axis(similarities, neighbors, axis=1)
+        weights = np.exp((neighbor_similarities - neighbor_similarities.max(axis=1, keepdims=True)) * 10)
+        weights /= weights.sum(axis=1, keepdims=True)
+        return np.einsum("ij,ijk->ik", weights, self.chunk_coords[neighbors])
+
+
+class ProjectionCache:
+    """
+    Fitted projections per (processed document, method), kept in a small in-memory
+    LRU and persisted under data/projections so other workers and restarts reuse them.
+    """
+    def __init__(self, root: str = "data/projections", max_entries: int = 32):
+        self.root = root
+        self.max_entries = max_entries
+        self._projections: "OrderedDict[str, Projection]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, key: str, method: str) -> str:
+        return os.path.join(self.root, key, f"{method}.joblib")
+
+    def get(self, key: str, method: str, chunk_embeddings) -> Projection:
+        """
+        The projection of key's chunks, fitted on first use. chunk_embeddings may be a
+        function returning them, so they are only loaded when a fit is needed. The
+        first fit of a key is serialized across threads and worker processes; the
+        others wait and load the saved result.
+        """
+        cache_key = f"{key}/{method}"
+        with self._lock:
+            if cache_key in self._projections:
+                self._projections.move_to_end(cache_key)
+                return self._projections[cache_key]
+
+        projection = self._load(key, method)
+        if projection is None:
+            with self._fit_lock(key, method):
+                projection = self._load(key, method)
+                if projection is None:
+                    if callable(chunk_embeddings):
+                        chunk_embeddings = chunk_embeddings()
+                    projection = Projection.fit(method, chunk_embeddings)
+                    self._save(key, method, projection)
+
+        with self._lock:
+            self._projections[cache_key] = projection
+            while len(self._projections) > self.max_entries:
+                self._projections.popitem(last=False)
+        return projection
+
+    @contextmanager
+    def _fit_lock(self, key: str, method: str) -> Iterator[None]:
+        path = self._path(key, method)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self, key: str, method: str) -> Optional[Projection]:
+        path = self._path(key, method)
+        if not os.path.exists(path):
+            return None
+        return joblib.load(path)
+
+    def _save(self, key: str, method: str, projection: Projection) -> None:
+        path = self._path(key, method)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + f".{os.getpid()}.tmp"
+        joblib.dump(projection, tmp_path)
+        os.replace(tmp_path, path)
+
+
+projection_cache = ProjectionCache()
@@ -0,0 +1,132 @@
+from typing import Optional, Tuple
+import numpy as np
+from components.similarity_metrics import SimilarityCalculator, ChunkMatrix, as_query_matrix
+
+QUANTIZATIONS = ["float16", "int8"]
+
+
+def pack_binary(embeddings) -> np.ndarray:
+    """Median-thresholded bits of each row (as used by Jaccard), packed 8 per byte"""
+    return np.packbits(SimilarityCalculator.binarize(np.asarray(embeddings, dtype=np.float32)), axis=1)
+
+
+def quantize(embeddings, quantization: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Compact codes for a float32 matrix: float16, or int8 with one scale per vector
+    (max |value| / 127). Returns (codes, scales); scales is None for float16.
+    """
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    if quantization == "float16":
+        return matrix.astype(np.float16), None
+    elif quantization == "int8":
+        scales = np.abs(matrix).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    raise ValueError(f"Unknown quantization: {quantization}")
+
+
+class QuantizedEmbeddings:
+    """
+    Chunk embeddings searched through their compact codes. Candidates are selected on
+    the codes and the top ones rescored against the full-precision matrix, which is
+    memory-mapped so only the rescored rows are read.
+    """
+    def __init__(
+        self,
+        quantization: str,
+        codes: np.ndarray,
+        scales: Optional[np.ndarray],
+        full_embeddings,
+        binary: Optional[np.ndarray] = None,
+        block_size: int = 16384
+    ):
+        self.quantization = quantization
+        self.codes = codes
+        self.scales = scales
+        self.full_embeddings = full_embeddings
+        # Packed median-thresholded bits of the full-precision rows, for exact Jaccard
+        self.binary = binary
+        self.block_size = block_size
+        self._squared_norms = None
+
+    def __len__(self) -> int:
+        return self.codes.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def _blocks(self):
+        """(start, float32 block) pairs, so decoding never materializes the whole matrix"""
+        for start in range(0, len(self), self.block_size):
+            yield start, self.codes[start:start + self.block_size].astype(np.float32)
+
+    @property
+    def squared_norms(self) -> np.ndarray:
+        if self._squared_norms is None:
+            squared_norms = np.empty(len(self), dtype=np.float32)
+            for start, block in self._blocks():
+                squared_norms[start:start + len(block)] = np.einsum("ij,ij->i", block, block)
+            if self.scales is not None:
+                squared_norms *= self.scales ** 2
+            self._squared_norms = squared_norms
+        return self._squared_norms
+
+    def dots(self, queries: np.ndarray) -> np.ndarray:
+        dots = np.empty((len(queries), len(self)), dtype=np.float32)
+        for start, block in self._blocks():
+            dots[:, start:start + len(block)] = queries @ block.T
+        if self.scales is not None:
+            dots *= self.scales[None, :]
+        return dots
+
+    def similarity_matrix(self, query_embeddings, similarity_metric: str = "cosine") -> np.ndarray:
+        """Approximate QxN similarity computed on the codes"""
+        queries = as_query_matrix(query_embeddings)
+        if similarity_metric == "jaccard" and self.binary is not None:
+            return self.jaccard_matrix(queries)
+        if similarity_metric == "jaccard":
+            scores = np.empty((len(queries), len(self)), dtype=np.float32)
+            for start, block in self._blocks():
+                scores[:, start:start + len(block)] = SimilarityCalculator.jaccard_matrix(queries, block)
+            return scores
+
+        dots = self.dots(queries)
+        query_squared_norms = np.einsum("ij,ij->i", queries, queries)
+        if similarity_metric == "euclidean":
+            squared_distances = query_squared_norms[:, None] + self.squared_norms[None, :] - 2 * dots
+            return 1 / (1 + np.sqrt(np.maximum(squared_distances, 0)))
+        denominator = np.outer(np.sqrt(query_squared_norms), np.sqrt(self.squared_norms))
+        return np.divide(dots, denominator, out=np.zeros_like(dots), where=denominator > 0)
+
+    def jaccard_matrix(self, queries: np.ndarray) -> np.ndarray:
+        """Exact Jaccard similarity from the packed bits, unpacked one block at a time"""
+        dimensions = self.codes.shape[1]
+        query_binary = SimilarityCalculator.binarize(queries).astype(np.float32)
+        query_counts = query_binary.sum(axis=1)
+        scores = np.empty((len(queries), len(self)), dtype=np.float32)
+        for start in range(0, len(self), self.block_size):
+            chunk_binary = np.unpackbits(self.binary[start:start + self.block_size], axis=1, count=dimensions).astype(np.float32)
+            intersection = query_binary @ chunk_binary.T
+            union = query_counts[:, None] + chunk_binary.sum(axis=1)[None, :] - intersection
+            # Two empty sets are considered identical, matching scipy's jaccard
+            scores[:, start:start + len(chunk_binary)] = np.divide(intersection, union, out=np.ones_like(intersection), where=union > 0)
+        return scores
+
+    def search(self, query_embeddings, similarity_metric: str, k: int, rescore_factor: int = 4) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        QxN similarity matrix and Qxk top chunk ids. The k * rescore_factor best
+        candidates per query are rescored exactly; their entries hold exact scores.
+        """
+        queries = as_query_matrix(query_embeddings)
+        similarity_matrix = self.similarity_matrix(queries, similarity_metric)
+        candidates = SimilarityCalculator.top_k_indices_batch(similarity_matrix, k * rescore_factor)
+
+        top_indices = np.empty((len(queries), min(k, len(self))), dtype=np.int64)
+        for i, query_candidates in enumerate(candidates):
+            rows = np.sort(query_candidates)
+            exact = SimilarityCalculator.similarity_matrix(queries[i], ChunkMatrix(self.full_embeddings[rows]), similarity_metric)[0]
+            similarity_matrix[i, rows] = exact
+            top_indices[i] = rows[SimilarityCalculator.top_k_indices(exact, k)]
+        return similarity_matrix, top_indices
@@ -0,0 +1,185 @@
+import glob
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+from pydantic import BaseModel
+from models.configuration import Configuration
+from models.document import Document
+from models.llm_response import LLMResponse
+from models.question import Question
+from models.session import Session
+
+# Entity tables share one layout: a row per item, ordered by position within its session
+ENTITY_TABLES = {
+    "documents": Document,
+    "questions": Question,
+    "configurations": Configuration,
+    "answers": LLMResponse,
+}
+
+
+class SessionStore:
+    """
+    SQLite (WAL) store for sessions with one table per entity, so adding or
+    removing an item writes a single row instead of rewriting the whole session.
+    Mutations of one session are serialized by a per-session lock.
+    """
+    def __init__(self, db_path: str = "data/sessions.sqlite", legacy_dir: str = "data"):
+        self.db_path = db_path
+        self.legacy_dir = legacy_dir
+        self._local = threading.local()
+        self._session_locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._schema_ready = False
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+            if not self._schema_ready:
+                self._create_schema(conn)
+        return conn
+
+    def _create_schema(self, conn: sqlite3.Connection) -> None:
+        conn.execute("CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, created_at REAL NOT NULL)")
+        for table in ENTITY_TABLES:
+            conn.execute(
+                f"""CREATE TABLE IF NOT EXISTS {table} (
+                    session_id TEXT NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+                    id TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (session_id, id)
+                )"""
+            )
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_position ON {table} (session_id, position)")
+        self._schema_ready = True
+
+    def session_lock(self, session_id: str) -> threading.Lock:
+        with self._locks_guard:
+            if session_id not in self._session_locks:
+                self._session_locks[session_id] = threading.Lock()
+            return self._session_locks[session_id]
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def create_session(self, session_id: str) -> None:
+        with self._transaction() as conn:
+            conn.execute("INSERT INTO sessions (id, created_at) VALUES (?, ?)", (session_id, time.time()))
+
+    def session_exists(self, session_id: str) -> bool:
+        row = self._connection().execute("SELECT 1 FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        if row is not None:
+            return True
+        # Sessions written before the SQLite store are imported on first access
+        return self.import_json_session(session_id)
+
+    def get_session(self, session_id: str) -> Optional[Session]:
+        if not self.session_exists(session_id):
+            return None
+        conn = self._connection()
+        session = Session(id=session_id)
+        for table, model in ENTITY_TABLES.items():
+            rows = conn.execute(
+                f"SELECT data FROM {table} WHERE session_id = ? ORDER BY position", (session_id,)
+            ).fetchall()
+            setattr(session, table, [model.model_validate_json(data) for (data,) in rows])
+        return session
+
+    def add_item(self, session_id: str, table: str, item_id: str, item: BaseModel, position: Optional[int] = None) -> None:
+        """Insert (or replace) one item; appended to the end unless a position is given"""
+        if not self.session_exists(session_id):
+            raise FileNotFoundError(f"Session {session_id} not found")
+        with self.session_lock(session_id), self._transaction() as conn:
+            if position is None:
+                position = conn.execute(
+                    f"SELECT COALESCE(MAX(position) + 1, 0) FROM {table} WHERE session_id = ?", (session_id,)
+                ).fetchone()[0]
+            conn.execute(
+                f"INSERT OR REPLACE INTO {table} (session_id, id, position, data) VALUES (?, ?, ?, ?)",
+                (session_id, item_id, position, item.model_dump_json())
+            )
+
+    def update_item(self, session_id: str, table: str, item_id: str, item: BaseModel) -> bool:
+        """Replace an existing item's data in place, keeping its position; returns False if it does not exist"""
+        with self.session_lock(session_id), self._transaction() as conn:
+            cursor = conn.execute(
+                f"UPDATE {table} SET data = ? WHERE session_id = ? AND id = ?",
+                (item.model_dump_json(), session_id, item_id)
+            )
+            return cursor.rowcount > 0
+
+    def delete_item(self, session_id: str, table: str, item_id: str) -> bool:
+        """Delete one item; returns False if it did not exist"""
+        return self.pop_item(session_id, table, item_id) is not None
+
+    def pop_item(self, session_id: str, table: str, item_id: str) -> Optional[BaseModel]:
+        """Delete one item and return it, or None if it did not exist"""
+        if not self.session_exists(session_id):
+            raise FileNotFoundError(f"Session {session_id} not found")
+        with self.session_lock(session_id), self._transaction() as conn:
+            row = conn.execute(
+                f"SELECT data FROM {table} WHERE session_id = ? AND id = ?", (session_id, item_id)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(f"DELETE FROM {table} WHERE session_id = ? AND id = ?", (session_id, item_id))
+            return ENTITY_TABLES[table].model_validate_json(row[0])
+
+    def clear_items(self, session_id: str, table: str) -> None:
+        with self.session_lock(session_id), self._transaction() as conn:
+            conn.execute(f"DELETE FROM {table} WHERE session_id = ?", (session_id,))
+
+    def _write_session(self, conn: sqlite3.Connection, session: Session) -> None:
+        conn.execute("INSERT OR IGNORE INTO sessions (id, created_at) VALUES (?, ?)", (session.id, time.time()))
+        for table in ENTITY_TABLES:
+            rows = []
+            for position, item in enumerate(getattr(session, table)):
+                item_id = getattr(item, "id", None) or f"{table}-{position}"
+                rows.append((session.id, item_id, position, item.model_dump_json()))
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {table} (session_id, id, position, data) VALUES (?, ?, ?, ?)", rows
+            )
+
+    def import_json_session(self, session_id: str) -> bool:
+        """Import data/session_<id>.json if it exists; returns True if the session was imported"""
+        path = os.path.join(self.legacy_dir, f"session_{session_id}.json")
+        if not os.path.exists(path):
+            return False
+        with open(path, "r", encoding="utf-8") as f:
+            session = Session.model_validate_json(f.read())
+        session.id = session_id
+        with self.session_lock(session_id), self._transaction() as conn:
+            self._write_session(conn, session)
+        return True
+
+    def migrate_json_sessions(self) -> List[str]:
+        """Import every legacy JSON session not yet in the database"""
+        imported = []
+        for path in glob.glob(os.path.join(self.legacy_dir, "session_*.json")):
+            session_id = os.path.basename(path)[len("session_"):-len(".json")]
+            row = self._connection().execute("SELECT 1 FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            if row is None and self.import_json_session(session_id):
+                imported.append(session_id)
+        return imported
+
+
+session_store = SessionStore()
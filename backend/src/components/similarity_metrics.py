@@ -1,61 +1,179 @@
 import numpy as np
-from typing import List, Tuple
-from sklearn.metrics.pairwise import cosine_similarity
-from scipy.spatial.distance import euclidean, jaccard
+from typing import List, Tuple, Union
+
+class ChunkMatrix:
+    """
+    Float32 chunk embedding matrix with the per-chunk norms and median-thresholded
+    binary codes precomputed once, so every query can be scored with matrix operations.
+    """
+    def __init__(self, chunk_embeddings):
+        self.matrix = np.asarray(chunk_embeddings, dtype=np.float32)
+        if self.matrix.ndim == 1:
+            self.matrix = self.matrix.reshape(1, -1)
+        self._norms = None
+        self._squared_norms = None
+        self._binary = None
+
+    @property
+    def norms(self) -> np.ndarray:
+        if self._norms is None:
+            self._norms = np.sqrt(self.squared_norms)
+        return self._norms
+
+    @property
+    def squared_norms(self) -> np.ndarray:
+        if self._squared_norms is None:
+            self._squared_norms = np.einsum("ij,ij->i", self.matrix, self.matrix)
+        return self._squared_norms
+
+    @property
+    def binary(self) -> np.ndarray:
+        if self._binary is None:
+            self._binary = SimilarityCalculator.binarize(self.matrix)
+        return self._binary
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+
+def as_chunk_matrix(chunk_embeddings: Union[ChunkMatrix, List[np.ndarray], np.ndarray]) -> ChunkMatrix:
+    if isinstance(chunk_embeddings, ChunkMatrix):
+        return chunk_embeddings
+    return ChunkMatrix(chunk_embeddings)
+
+
+def as_query_matrix(query_embeddings) -> np.ndarray:
+    queries = np.asarray(query_embeddings, dtype=np.float32)
+    if queries.ndim == 1:
+        queries = queries.reshape(1, -1)
+    return queries
+
 
 class SimilarityCalculator:
+    @staticmethod
+    def binarize(embeddings: np.ndarray) -> np.ndarray:
+        """Threshold each row at its own median value"""
+        return embeddings > np.median(embeddings, axis=1, keepdims=True)
+
+    @staticmethod
+    def cosine_matrix(query_embeddings, chunk_embeddings) -> np.ndarray:
+        """
+        Cosine similarity between Q query embeddings and N chunks as a QxN matrix.
+        """
+        chunks = as_chunk_matrix(chunk_embeddings)
+        queries = as_query_matrix(query_embeddings)
+        query_norms = np.linalg.norm(queries, axis=1)
+        denominator = np.outer(query_norms, chunks.norms)
+        dots = queries @ chunks.matrix.T
+        return np.divide(dots, denominator, out=np.zeros_like(dots), where=denominator > 0)
+
+    @staticmethod
+    def euclidean_matrix(query_embeddings, chunk_embeddings) -> np.ndarray:
+        """
+        Similarity based on Euclidean distance, 1 / (1 + distance), as a QxN matrix.
+        """
+        chunks = as_chunk_matrix(chunk_embeddings)
+        queries = as_query_matrix(query_embeddings)
+        query_squared_norms = np.einsum("ij,ij->i", queries, queries)
+        squared_distances = query_squared_norms[:, None] + chunks.squared_norms[None, :] - 2 * (queries @ chunks.matrix.T)
+        return 1 / (1 + np.sqrt(np.maximum(squared_distances, 0)))
+
+    @staticmethod
+    def jaccard_matrix(query_embeddings, chunk_embeddings) -> np.ndarray:
+        """
+        Jaccard similarity of median-thresholded embeddings as a QxN matrix.
+        """
+        chunks = as_chunk_matrix(chunk_embeddings)
+        query_binary = SimilarityCalculator.binarize(as_query_matrix(query_embeddings)).astype(np.float32)
+        chunk_binary = chunks.binary.astype(np.float32)
+        intersection = query_binary @ chunk_binary.T
+        union = query_binary.sum(axis=1)[:, None] + chunk_binary.sum(axis=1)[None, :] - intersection
+        # Two empty sets are considered identical, matching scipy's jaccard
+        return np.divide(intersection, union, out=np.ones_like(intersection), where=union > 0)
+
+    @staticmethod
+    def similarity_matrix(query_embeddings, chunk_embeddings, similarity_metric: str = "cosine") -> np.ndarray:
+        """
+        Calculate a QxN similarity matrix based on the specified metric.
+        """
+        if similarity_metric == "euclidean":
+            return SimilarityCalculator.euclidean_matrix(query_embeddings, chunk_embeddings)
+        elif similarity_metric == "jaccard":
+            return SimilarityCalculator.jaccard_matrix(query_embeddings, chunk_embeddings)
+        else:
+            return SimilarityCalculator.cosine_matrix(query_embeddings, chunk_embeddings)
+
     @staticmethod
     def calculate_cosine_similarity(query_embedding: np.ndarray, chunk_embeddings: List[np.ndarray]) -> List[float]:
         """
         Calculate cosine similarity between query embedding and chunk embeddings.
         """
-        query_embedding = np.array(query_embedding).reshape(1, -1)
-        chunk_embeddings = np.array(chunk_embeddings)
-        return cosine_similarity(query_embedding, chunk_embeddings)[0].tolist()
+        return SimilarityCalculator.cosine_matrix(query_embedding, chunk_embeddings)[0].tolist()
 
     @staticmethod
     def calculate_euclidean_similarity(query_embedding: np.ndarray, chunk_embeddings: List[np.ndarray]) -> List[float]:
         """
         Calculate similarity based on Euclidean distance.
         """
-        query_embedding = np.array(query_embedding)
-        return [1 / (1 + euclidean(query_embedding, np.array(chunk_emb))) for chunk_emb in chunk_embeddings]
+        return SimilarityCalculator.euclidean_matrix(query_embedding, chunk_embeddings)[0].tolist()
 
     @staticmethod
     def calculate_jaccard_similarity(query_embedding: np.ndarray, chunk_embeddings: List[np.ndarray]) -> List[float]:
         """
         Calculate Jaccard similarity by thresholding embeddings at their median values.
         """
-        query_binary = query_embedding > np.median(query_embedding)
-        similarities = []
-        for chunk_emb in chunk_embeddings:
-            chunk_binary = np.array(chunk_emb) > np.median(chunk_emb)
-            similarities.append(1 - jaccard(query_binary, chunk_binary))
-        return similarities
+        return SimilarityCalculator.jaccard_matrix(query_embedding, chunk_embeddings)[0].tolist()
 
     @staticmethod
-    def get_similarity_scores(query_embedding: np.ndarray, 
-                              chunk_embeddings: List[np.ndarray], 
+    def get_similarity_scores(query_embedding: np.ndarray,
+                              chunk_embeddings: List[np.ndarray],
                               similarity_metric: str = "cosine") -> List[float]:
         """
         Calculate similarity scores based on the specified metric.
         """
-        if similarity_metric == "cosine":
-            return SimilarityCalculator.calculate_cosine_similarity(query_embedding, chunk_embeddings)
-        elif similarity_metric == "euclidean":
-            return SimilarityCalculator.calculate_euclidean_similarity(query_embedding, chunk_embeddings)
-        elif similarity_metric == "jaccard":
-            return SimilarityCalculator.calculate_jaccard_similarity(query_embedding, chunk_embeddings)
-        else:
-            return SimilarityCalculator.calculate_cosine_similarity(query_embedding, chunk_embeddings)
+        return SimilarityCalculator.similarity_matrix(query_embedding, chunk_embeddings, similarity_metric)[0].tolist()
+
+    @staticmethod
+    def top_k_indices(similarity_scores, k: int = 5) -> np.ndarray:
+        """
+        Indices of the k highest scores in descending order, ties broken by the lower
+        chunk index like a stable sort. The k-th score is found with a partition; only
+        chunks scoring at least that much are sorted.
+        """
+        scores = np.asarray(similarity_scores)
+        k = min(k, scores.shape[0])
+        if k <= 0:
+            return np.array([], dtype=np.int64)
+        kth_score = -np.partition(-scores, k - 1)[k - 1]
+        # Every chunk tied with the k-th score is a candidate, so the lowest indices win the tie
+        candidates = np.flatnonzero(scores >= kth_score)
+        return candidates[np.lexsort((candidates, -scores[candidates]))][:k]
+
+    @staticmethod
+    def top_k_indices_batch(score_matrix, k: int = 5) -> np.ndarray:
+        """
+        Row-wise top-k of a QxN score matrix, returned as a Qxk matrix of chunk indices.
+        Ordered like top_k_indices, including its tie-breaking.
+        """
+        scores = np.asarray(score_matrix)
+        k = min(k, scores.shape[1])
+        if k <= 0:
+            return np.empty((scores.shape[0], 0), dtype=np.int64)
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+        order = np.lexsort((candidates, -candidate_scores), axis=1)
+        top_indices = np.take_along_axis(candidates, order, axis=1)
+        # argpartition picks arbitrarily among chunks tied with the k-th score; those rows are redone
+        kth_scores = candidate_scores.min(axis=1, keepdims=True)
+        for row in np.flatnonzero((scores >= kth_scores).sum(axis=1) > k):
+            top_indices[row] = SimilarityCalculator.top_k_indices(scores[row], k)
+        return top_indices
 
     @staticmethod
-    def get_top_k_chunks(chunks: List[str], similarity_scores: List[float], k: int = 5) -> List[Tuple[int, str, float]]:
+    def get_top_k_chunks(chunks: List[str], similarity_scores: List[float], k: int = 5) -> List[Tuple[int, Tuple[str, float]]]:
         """
         Retrieve top k chunks based on similarity scores.
-        Returns a list of tuples containing (original_chunk_index, chunk_text, similarity_score)
+        Returns a list of tuples containing (original_chunk_index, (chunk_text, similarity_score))
         """
-        # Create list of (index, chunk, score) tuples
-        chunk_data = list(enumerate(zip(chunks, similarity_scores)))
-        # Sort by score in descending order and take top k
-        return sorted(chunk_data, key=lambda x: x[1][1], reverse=True)[:k]
+        top_indices = SimilarityCalculator.top_k_indices(similarity_scores, k)
+        return [(int(i), (chunks[i], float(similarity_scores[i]))) for i in top_indices]
@@ -0,0 +1,42 @@
+import hashlib
+import json
+import os
+from typing import List, Optional
+
+def hash_file(file_path: str, block_size: int = 1024 * 1024) -> str:
+    """sha256 of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ExtractedTextCache:
+    """
+    Extracted page texts keyed by the sha256 of the source file, so every
+    chunking strategy and configuration reuses a single PDF parse.
+    """
+    def __init__(self, root: str = "data/extracted_text"):
+        self.root = root
+
+    def _path(self, content_hash: str) -> str:
+        return os.path.join(self.root, f"{content_hash}.json")
+
+    def get(self, content_hash: str) -> Optional[List[str]]:
+        path = self._path(content_hash)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)["pages"]
+
+    def put(self, content_hash: str, pages: List[str]) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(content_hash)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"pages": pages}, f)
+        os.replace(tmp_path, path)
+
+
+extracted_text_cache = ExtractedTextCache()
@@ -28,4 +28,97 @@ def calculate_rus(similarity_scores, relevance_scores, alpha=0.5, beta=0.4, gamm
         "Normalized_DCR": normalized_dcr,
         "Scaled_Correlation": scaled_corr,
         "Wasted_Similarity_Penalty": waste_penalty
-    }
\ No newline at end of file
+    }
+
+def pad_scores(similarity_lists, relevance_lists):
+    """
+    Stack per-answer score lists of different lengths into padded (answers x max_chunks)
+    arrays. Returns (similarity, relevance, mask); mask marks the real entries.
+    """
+    lengths = np.array([len(scores) for scores in relevance_lists], dtype=np.int64)
+    width = int(lengths.max()) if len(lengths) else 0
+    mask = np.arange(width)[None, :] < lengths[:, None]
+    similarity = np.zeros((len(lengths), width), dtype=np.float64)
+    relevance = np.zeros((len(lengths), width), dtype=np.float64)
+    similarity[mask] = np.concatenate([np.asarray(scores, dtype=np.float64) for scores in similarity_lists]) if width else []
+    relevance[mask] = np.concatenate([np.asarray(scores, dtype=np.float64) for scores in relevance_lists]) if width else []
+    return similarity, relevance, mask
+
+
+def dcg_batch(relevance, mask):
+    discounts = 1 / np.log2(np.arange(relevance.shape[1]) + 2)
+    return (np.where(mask, relevance, 0) * discounts).sum(axis=1)
+
+
+def average_ranks(values, mask):
+    """Row-wise 1-based ranks of the masked entries, ties sharing their average rank (as scipy's rankdata)"""
+    n_rows, width = values.shape
+    keyed = np.where(mask, values, np.inf)
+    order = np.argsort(keyed, axis=1, kind="stable")
+    sorted_values = np.take_along_axis(keyed, order, axis=1)
+    # Number the runs of equal values globally; a new run starts at each row start too
+    starts = np.ones((n_rows, width), dtype=bool)
+    starts[:, 1:] = sorted_values[:, 1:] != sorted_values[:, :-1]
+    groups = np.cumsum(starts.ravel()) - 1
+    positions = np.tile(np.arange(1, width + 1, dtype=np.float64), n_rows)
+    mean_positions = np.bincount(groups, weights=positions) / np.bincount(groups)
+    ranks = np.empty((n_rows, width), dtype=np.float64)
+    np.put_along_axis(ranks, order, mean_positions[groups].reshape(n_rows, width), axis=1)
+    return np.where(mask, ranks, 0)
+
+
+def spearman_batch(x, y, mask):
+    """Row-wise Spearman correlation over the masked entries; NaN where it is undefined"""
+    counts = mask.sum(axis=1)
+    x_ranks, y_ranks = average_ranks(x, mask), average_ranks(y, mask)
+    safe_counts = np.maximum(counts, 1)
+    x_centered = np.where(mask, x_ranks - (x_ranks.sum(axis=1) / safe_counts)[:, None], 0)
+    y_centered = np.where(mask, y_ranks - (y_ranks.sum(axis=1) / safe_counts)[:, None], 0)
+    denominator = np.sqrt((x_centered ** 2).sum(axis=1) * (y_centered ** 2).sum(axis=1))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = (x_centered * y_centered).sum(axis=1) / denominator
+    corr[(denominator == 0) | (counts < 2)] = np.nan
+    return np.clip(corr, -1, 1)
+
+
+def calculate_rus_batch(similarity, relevance, mask=None, alpha=0.5, beta=0.4, gamma=0.1):
+    """
+    calculate_rus for many answers at once, on padded (answers x chunks) arrays.
+    Returns the same keys as calculate_rus, each an array with one value per answer.
+    """
+    similarity = np.asarray(similarity, dtype=np.float64)
+    relevance = np.asarray(relevance, dtype=np.float64)
+    mask = np.ones(relevance.shape, dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+
+    ideal_relevance = -np.sort(-np.where(mask, relevance, -np.inf), axis=1)
+    ideal_dcr = dcg_batch(np.where(np.isfinite(ideal_relevance), ideal_relevance, 0), mask)
+    actual_dcr = dcg_batch(relevance, mask)
+    normalized_dcr = np.divide(actual_dcr, ideal_dcr, out=np.zeros_like(actual_dcr), where=ideal_dcr > 0)
+
+    scaled_corr = (spearman_batch(similarity, relevance, mask) + 1) / 2
+
+    total_similarity = np.where(mask, similarity, 0).sum(axis=1)
+    wasted_similarity = np.where(mask & (relevance == 0), similarity, 0).sum(axis=1)
+    waste_penalty = np.divide(wasted_similarity, total_similarity, out=np.zeros_like(total_similarity), where=total_similarity > 0)
+
+    return {
+        "RUS": alpha * normalized_dcr + beta * scaled_corr - gamma * waste_penalty,
+        "Normalized_DCR": normalized_dcr,
+        "Scaled_Correlation": scaled_corr,
+        "Wasted_Similarity_Penalty": waste_penalty
+    }
+
+
+def weight_grid(alphas, betas, gammas):
+    """Every (alpha, beta, gamma) combination as a (combinations x 3) array"""
+    return np.array(np.meshgrid(alphas, betas, gammas, indexing="ij")).reshape(3, -1).T
+
+
+def rus_for_weights(components, weights):
+    """
+    RUS of every answer under every weight combination in one product.
+    components is calculate_rus_batch's output, weights a (combinations x 3) array of
+    (alpha, beta, gamma); returns an (answers x combinations) array.
+    """
+    stacked = np.stack([components["Normalized_DCR"], components["Scaled_Correlation"], -components["Wasted_Similarity_Penalty"]], axis=1)
+    return stacked @ np.asarray(weights, dtype=np.float64).T
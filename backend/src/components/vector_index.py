@@ -0,0 +1,226 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+from components.similarity_metrics import SimilarityCalculator, ChunkMatrix
+
+DEFAULT_NPROBE = int(os.getenv("RAG_INDEX_NPROBE", "8"))
+# Corpora smaller than this are always searched exactly
+MIN_INDEX_SIZE = int(os.getenv("RAG_INDEX_MIN_CHUNKS", "2048"))
+
+
+def corpus_key(processed_keys: Sequence[str]) -> str:
+    """Key of a corpus made of the given processed-document entries, in order"""
+    return hashlib.sha256("\n".join(processed_keys).encode("utf-8")).hexdigest()[:32]
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+def assign_to_centroids(vectors: np.ndarray, centroids: np.ndarray, batch_size: int = 8192) -> np.ndarray:
+    """Index of the most similar (unit) centroid for every (unit) vector"""
+    assignments = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), batch_size):
+        assignments[start:start + batch_size] = np.argmax(vectors[start:start + batch_size] @ centroids.T, axis=1)
+    return assignments
+
+
+def spherical_kmeans(vectors: np.ndarray, n_clusters: int, n_iter: int = 20, seed: int = 42, sample_size: int = 50000) -> np.ndarray:
+    """
+    k-means on the unit sphere (cosine), trained on a sample of at most sample_size
+    normalized vectors. Empty clusters are re-seeded from random training points.
+    """
+    rng = np.random.default_rng(seed)
+    train = vectors if len(vectors) <= sample_size else vectors[rng.choice(len(vectors), sample_size, replace=False)]
+    centroids = train[rng.choice(len(train), n_clusters, replace=False)].copy()
+
+    for _ in range(n_iter):
+        assignments = assign_to_centroids(train, centroids)
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=n_clusters)
+        sums = np.zeros_like(centroids)
+        present = counts > 0
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[present]
+        sums[present] = np.add.reduceat(train[order], starts, axis=0)
+        if not present.all():
+            sums[~present] = train[rng.choice(len(train), int((~present).sum()), replace=False)]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+class IVFIndex:
+    """
+    Inverted-file index: a k-means coarse quantizer over normalized vectors and, per
+    centroid, the ids of the vectors assigned to it (stored CSR-style as offsets + ids).
+    """
+    def __init__(self, centroids: np.ndarray, list_offsets: np.ndarray, list_ids: np.ndarray):
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_ids = list_ids
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    @staticmethod
+    def build(vectors: np.ndarray, n_lists: Optional[int] = None, seed: int = 42) -> "IVFIndex":
+        unit_vectors = normalize_rows(np.asarray(vectors, dtype=np.float32))
+        if n_lists is None:
+            n_lists = int(np.sqrt(len(unit_vectors)))
+        n_lists = max(1, min(n_lists, len(unit_vectors)))
+        centroids = spherical_kmeans(unit_vectors, n_lists, seed=seed)
+        assignments = assign_to_centroids(unit_vectors, centroids)
+        list_ids = np.argsort(assignments, kind="stable").astype(np.int64)
+        list_offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=n_lists))]).astype(np.int64)
+        return IVFIndex(centroids, list_offsets, list_ids)
+
+    def candidates(self, query: np.ndarray, nprobe: int, min_candidates: int = 0) -> np.ndarray:
+        """
+        Sorted ids of the vectors in the nprobe lists closest to the query. Further lists
+        are probed, closest first, until there are at least min_candidates ids.
+        """
+        similarities = normalize_rows(query.reshape(1, -1))[0] @ self.centroids.T
+        order = np.argsort(-similarities, kind="stable")
+        # Lists needed to reach min_candidates, counting down the closest-first order
+        reach = int(np.searchsorted(np.cumsum(np.diff(self.list_offsets)[order]), min_candidates)) + 1
+        lists = order[:min(max(nprobe, reach), self.n_lists)]
+        return np.sort(np.concatenate([self.list_ids[self.list_offsets[i]:self.list_offsets[i + 1]] for i in lists]))
+
+    def save(self, directory: str) -> None:
+        os.makedirs(directory, exist_ok=True)
+        for name in ("centroids", "list_offsets", "list_ids"):
+            path = os.path.join(directory, f"{name}.npy")
+            tmp_path = f"{path}.{os.getpid()}.tmp.npy"
+            np.save(tmp_path, getattr(self, name))
+            os.replace(tmp_path, path)
+
+    @staticmethod
+    def load(directory: str) -> Optional["IVFIndex"]:
+        paths = [os.path.join(directory, f"{name}.npy") for name in ("centroids", "list_offsets", "list_ids")]
+        if not all(os.path.exists(path) for path in paths):
+            return None
+        return IVFIndex(*(np.load(path) for path in paths))
+
+
+class CorpusIndex:
+    """
+    All chunks of a set of documents for one (chunking, model) pair, searchable as a
+    single corpus. Uses the IVF index when one was built, exact search otherwise.
+    Global chunk ids follow document order; locate() maps them back to (document
+    position, chunk). The index is shared by every session with the same processed
+    entries, so it holds no session's document ids.
+    """
+    def __init__(self, key: str, chunk_counts: List[int], embeddings: np.ndarray, ivf: Optional[IVFIndex] = None):
+        self.key = key
+        self.offsets = np.concatenate([[0], np.cumsum(chunk_counts)]).astype(np.int64)
+        self.matrix = ChunkMatrix(embeddings)
+        self.ivf = ivf
+
+    def __len__(self) -> int:
+        return len(self.matrix)
+
+    def locate(self, chunk_ids) -> Tuple[np.ndarray, np.ndarray]:
+        """(document position, chunk index within the document) of global chunk ids"""
+        chunk_ids = np.asarray(chunk_ids, dtype=np.int64)
+        documents = np.searchsorted(self.offsets, chunk_ids, side="right") - 1
+        return documents, chunk_ids - self.offsets[documents]
+
+    def exact_search(self, query_embeddings, similarity_metric: str, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Full QxN similarity matrix and the Qxk top chunk ids"""
+        similarity_matrix = SimilarityCalculator.similarity_matrix(query_embeddings, self.matrix, similarity_metric)
+        return similarity_matrix, SimilarityCalculator.top_k_indices_batch(similarity_matrix, k)
+
+    def search(self, query_embeddings, similarity_metric: str, k: int, nprobe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        QxN similarity matrix and Qxk top chunk ids. With the IVF index only the chunks
+        in the nprobe closest lists (more if those hold fewer than k chunks) are scored,
+        exactly; all other entries are 0.
+        """
+        nprobe = nprobe or DEFAULT_NPROBE
+        # The coarse quantizer is cosine-based, so Jaccard over binary codes is always exact
+        if self.ivf is None or nprobe >= self.ivf.n_lists or similarity_metric == "jaccard":
+            return self.exact_search(query_embeddings, similarity_metric, k)
+
+        queries = np.asarray(query_embeddings, dtype=np.float32).reshape(-1, self.matrix.matrix.shape[1])
+        similarity_matrix = np.zeros((len(queries), len(self)), dtype=np.float32)
+        top_indices = np.empty((len(queries), min(k, len(self))), dtype=np.int64)
+        for i, query in enumerate(queries):
+            candidates = self.ivf.candidates(query, nprobe, min_candidates=top_indices.shape[1])
+            scores = self._score_candidates(query, candidates, similarity_metric)
+            similarity_matrix[i, candidates] = scores
+            top_indices[i] = candidates[SimilarityCalculator.top_k_indices(scores, k)]
+        return similarity_matrix, top_indices
+
+    def _score_candidates(self, query: np.ndarray, candidates: np.ndarray, similarity_metric: str) -> np.ndarray:
+        """Exact cosine or Euclidean similarity to a subset of chunks, reusing the cached norms"""
+        dots = self.matrix.matrix[candidates] @ query
+        if similarity_metric == "euclidean":
+            squared_distances = query @ query + self.matrix.squared_norms[candidates] - 2 * dots
+            return 1 / (1 + np.sqrt(np.maximum(squared_distances, 0)))
+        denominator = np.linalg.norm(query) * self.matrix.norms[candidates]
+        return np.divide(dots, denominator, out=np.zeros_like(dots), where=denominator > 0)
+
+    def recall(self, query_embeddings, similarity_metric: str, k: int, nprobe: Optional[int] = None) -> float:
+        """Mean fraction of the exact top-k that search() also returns"""
+        _, approximate = self.search(query_embeddings, similarity_metric, k, nprobe)
+        _, exact = self.exact_search(query_embeddings, similarity_metric, k)
+        if exact.size == 0:
+            return 1.0
+        hits = [len(np.intersect1d(a, e)) / len(e) for a, e in zip(approximate, exact)]
+        return float(np.mean(hits))
+
+
+class CorpusIndexStore:
+    """
+    Corpus indexes persisted next to the processed embeddings under data/processed/corpus/<key>.
+    Only the IVF arrays and a manifest are stored; the chunk embeddings stay in the
+    per-document entries and are stacked on load.
+    """
+    def __init__(self, root: str = "data/processed/corpus", max_entries: int = 8):
+        self.root = root
+        self.max_entries = max_entries
+        self._indexes: "OrderedDict[str, CorpusIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _manifest_path(self, key: str) -> str:
+        return os.path.join(self.root, key, "manifest.json")
+
+    def get(self, processed_keys: List[str], embeddings: List[np.ndarray]) -> CorpusIndex:
+        """Load the corpus index for these entries, building and persisting it if needed"""
+        key = corpus_key(processed_keys)
+        with self._lock:
+            if key in self._indexes:
+                self._indexes.move_to_end(key)
+                return self._indexes[key]
+
+        stacked = np.concatenate([np.asarray(matrix, dtype=np.float32) for matrix in embeddings])
+        chunk_counts = [len(matrix) for matrix in embeddings]
+        ivf = IVFIndex.load(os.path.join(self.root, key))
+        if ivf is None and len(stacked) >= MIN_INDEX_SIZE:
+            ivf = IVFIndex.build(stacked)
+            ivf.save(os.path.join(self.root, key))
+        if not os.path.exists(self._manifest_path(key)):
+            os.makedirs(os.path.dirname(self._manifest_path(key)), exist_ok=True)
+            with open(self._manifest_path(key), "w", encoding="utf-8") as f:
+                json.dump({"processed_keys": processed_keys, "chunk_counts": chunk_counts}, f)
+
+        index = CorpusIndex(key, chunk_counts, stacked, ivf)
+        with self._lock:
+            self._indexes[key] = index
+            while len(self._indexes) > self.max_entries:
+                self._indexes.popitem(last=False)
+        return index
+
+    def manifest(self, key: str) -> Optional[dict]:
+        if not os.path.exists(self._manifest_path(key)):
+            return None
+        with open(self._manifest_path(key), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+
+corpus_index_store = CorpusIndexStore()
@@ -8,6 +8,7 @@ import base64
 import os
 from datetime import datetime
 from pathlib import Path
+from components.projection_cache import projection_cache
 
 def ensure_directory_exists(path):
     """Ensure that the directory exists, creating it if necessary."""
@@ -53,7 +54,39 @@ def plot_embeddings_multi(embeddings_2d, top_chunk_indices, title, x_axis_label,
 
     return str(output_path)
 
-def PCA_visualization(chunks_embs, query_emb, response_emb, top_indices, session_id, question_id):
+# Projection methods in the order answers list them: UMAP, tSNE, PCA
+PROJECTION_METHODS = ["umap", "tsne", "pca"]
+
+PLOT_LABELS = {
+    "pca": ("PCA Projection", "PCA Component 1", "PCA Component 2"),
+    "tsne": ("t-SNE Projection", "t-SNE Component 1", "t-SNE Component 2"),
+    "umap": ("UMAP Projection", "UMAP Component 1", "UMAP Component 2"),
+}
+
+def project_with_cache(method, chunks_embs, query_emb, response_emb, projection_key):
+    """Chunk coordinates from the cached projection plus the placed query and response"""
+    projection = projection_cache.get(projection_key, method, chunks_embs)
+    placed = projection.place(np.vstack([query_emb, response_emb]))
+    return np.vstack([projection.chunk_coords, placed])
+
+def place_query_and_response(chunks_embs, query_emb, response_emb, projection_key):
+    """
+    2D query and response coordinates for every projection method, without rendering.
+    chunks_embs may be a function returning the embeddings; it is only called to fit a projection.
+    """
+    placed = {}
+    for method in PROJECTION_METHODS:
+        projection = projection_cache.get(projection_key, method, chunks_embs)
+        placed[method] = projection.place(np.vstack([query_emb, response_emb])).astype(np.float32)
+    return placed
+
+def render_projection_plot(method, chunk_coords, placed, top_indices, output_path):
+    """Render a PNG from precomputed chunk coordinates and placed query/response points"""
+    title, x_axis_label, y_axis_label = PLOT_LABELS[method]
+    embeddings_2d = np.vstack([chunk_coords, placed])
+    return plot_embeddings_multi(embeddings_2d, top_indices, title, x_axis_label, y_axis_label, output_path)
+
+def PCA_visualization(chunks_embs, query_emb, response_emb, top_indices, session_id, question_id, projection_key=None):
     # Create visualization directory if it doesn't exist
     vis_dir = Path("data") / "visualizations" / session_id
     vis_dir.mkdir(parents=True, exist_ok=True)
@@ -62,11 +95,14 @@ def PCA_visualization(chunks_embs, query_emb, response_emb, top_indices, session
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     output_path = vis_dir / f"pca_{question_id}_{timestamp}.png"
     
-    pca = PCA(n_components=2)
-    embeddings_2d = pca.fit_transform(np.vstack([chunks_embs, query_emb, response_emb]))
+    if projection_key:
+        embeddings_2d = project_with_cache("pca", chunks_embs, query_emb, response_emb, projection_key)
+    else:
+        pca = PCA(n_components=2)
+        embeddings_2d = pca.fit_transform(np.vstack([chunks_embs, query_emb, response_emb]))
     return plot_embeddings_multi(embeddings_2d, top_indices, "PCA Projection", "PCA Component 1", "PCA Component 2", str(output_path))
 
-def tSNE_visualization(chunks_embs, query_emb, response_emb, top_indices, session_id, question_id):
+def tSNE_visualization(chunks_embs, query_emb, response_emb, top_indices, session_id, question_id, projection_key=None):
     # Create visualization directory if it doesn't exist
     vis_dir = Path("data") / "visualizations" / session_id
     vis_dir.mkdir(parents=True, exist_ok=True)
@@ -75,12 +111,15 @@ def tSNE_visualization(chunks_embs, query_emb, response_emb, top_indices, sessio
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     output_path = vis_dir / f"tsne_{question_id}_{timestamp}.png"
     
-    perplexity = min(30, max(5, len(chunks_embs) // 4))
-    tsne = TSNE(n_components=2, perplexity=perplexity, random_state=42, n_iter=1000)
-    embeddings_2d = tsne.fit_transform(np.vstack([chunks_embs, query_emb, response_emb]))
+    if projection_key:
+        embeddings_2d = project_with_cache("tsne", chunks_embs, query_emb, response_emb, projection_key)
+    else:
+        perplexity = min(30, max(5, len(chunks_embs) // 4))
+        tsne = TSNE(n_components=2, perplexity=perplexity, random_state=42, n_iter=1000)
+        embeddings_2d = tsne.fit_transform(np.vstack([chunks_embs, query_emb, response_emb]))
     return plot_embeddings_multi(embeddings_2d, top_indices, "t-SNE Projection", "t-SNE Component 1", "t-SNE Component 2", str(output_path))
 
-def UMAP_visualization(chunks_embs, query_emb, response_emb, top_indices, session_id, question_id):
+def UMAP_visualization(chunks_embs, query_emb, response_emb, top_indices, session_id, question_id, projection_key=None):
     # Create visualization directory if it doesn't exist
     vis_dir = Path("data") / "visualizations" / session_id
     vis_dir.mkdir(parents=True, exist_ok=True)
@@ -89,7 +128,10 @@ def UMAP_visualization(chunks_embs, query_emb, response_emb, top_indices, sessio
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     output_path = vis_dir / f"umap_{question_id}_{timestamp}.png"
     
-    n_neighbors = min(15, max(5, len(chunks_embs) // 4))
-    reducer = umap.UMAP(n_components=2, n_neighbors=n_neighbors, min_dist=0.1, metric='cosine', random_state=42)
-    embeddings_2d = reducer.fit_transform(np.vstack([chunks_embs, query_emb, response_emb]))
+    if projection_key:
+        embeddings_2d = project_with_cache("umap", chunks_embs, query_emb, response_emb, projection_key)
+    else:
+        n_neighbors = min(15, max(5, len(chunks_embs) // 4))
+        reducer = umap.UMAP(n_components=2, n_neighbors=n_neighbors, min_dist=0.1, metric='cosine', random_state=42)
+        embeddings_2d = reducer.fit_transform(np.vstack([chunks_embs, query_emb, response_emb]))
     return plot_embeddings_multi(embeddings_2d, top_indices, "UMAP Projection", "UMAP Component 1", "UMAP Component 2", str(output_path))
@@ -2,9 +2,15 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
+import asyncio
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
 from api.routes import router
+from services.visualization_service import VisualizationService
+from components.session_store import session_store
+from components.processed_store import processed_store
+from components.evaluation_engine import evaluation_engine
 
 # Create data directories if they don't exist
 data_dir = Path("data")
@@ -16,7 +22,18 @@ documents_dir.mkdir(exist_ok=True)
 visualizations_dir = data_dir / "visualizations"
 visualizations_dir.mkdir(exist_ok=True)
 
-app = FastAPI(root_path='/api')
+# Import sessions saved as data/session_<id>.json before the SQLite store existed
+session_store.migrate_json_sessions()
+# processed_documents.json predates the per-entry processed store and is no longer read
+processed_store.remove_legacy_file()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Stop the worker processes and model threads with the server
+    evaluation_engine.shutdown()
+
+app = FastAPI(root_path='/api', lifespan=lifespan)
 
 # List of allowed origins
 origins = [
@@ -42,7 +59,14 @@ app.add_middleware(
 async def get_visualization(session_id: str, filename: str):
     file_path = visualizations_dir / session_id / filename
     if not file_path.exists():
-        raise HTTPException(status_code=404, detail="Visualization not found")
+        # Plots of coordinate-mode answers are rendered on first request
+        try:
+            rendered_path = await asyncio.to_thread(VisualizationService.render_plot, session_id, filename)
+        except ValueError:
+            rendered_path = None
+        if rendered_path is None:
+            raise HTTPException(status_code=404, detail="Visualization not found")
+        file_path = Path(rendered_path)
     return FileResponse(str(file_path))
 
 # Mount the visualizations directory as a static directory
@@ -12,4 +12,14 @@ class Configuration(BaseModel):
     page_size: Optional[int] = None
     embedding_model: Optional[str] = None
     similarity_metric: Optional[str] = None
-    num_chunks: Optional[int] = None
\ No newline at end of file
+    num_chunks: Optional[int] = None
+    # "document" retrieves from each document separately, "corpus" from all documents at once
+    retrieval_scope: Optional[str] = "document"
+    # Inverted lists probed by the corpus index (None uses RAG_INDEX_NPROBE)
+    nprobe: Optional[int] = None
+    # Compact representation searched before exact rescoring: None (float32), "float16" or "int8"
+    embedding_quantization: Optional[str] = None
+    # Matryoshka models only: embeddings are truncated to this many dimensions and renormalized
+    embedding_dimension: Optional[int] = None
+    # Scan this many leading dimensions first and rescore the best candidates with all of them
+    coarse_dimension: Optional[int] = None
\ No newline at end of file
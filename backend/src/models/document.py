@@ -10,5 +10,7 @@ class Document(BaseModel):
     file_size: Optional[int]
     file_extension: Optional[str]
     session_id: Optional[str]
+    # sha256 of the file content; documents and everything derived from them are keyed by it
+    content_hash: Optional[str] = None
     
 
@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from typing import Dict, Optional
+
+class StageProgress(BaseModel):
+    completed: int = 0
+    total: int = 0
+
+class Job(BaseModel):
+    id: str
+    session_id: str
+    kind: str
+    status: str = "pending"  # pending, running, completed, failed, cancelled
+    stages: Dict[str, StageProgress] = {}
+    error: Optional[str] = None
+    created_at: float
+    finished_at: Optional[float] = None
@@ -1,11 +1,12 @@
 from pydantic import BaseModel
-from typing import List
+from typing import Dict, List, Optional
 
 class Chunk(BaseModel):
     chunk_number: int
     text: str
     relevance_score: float
     similarity_score: float
+    document_id: Optional[str] = None
 
 class RUSMetrics(BaseModel):
     rus: float
@@ -13,10 +14,21 @@ class RUSMetrics(BaseModel):
     scaled_correlation: float
     wasted_similarity_penalty: float
 
+class VisualizationCoordinates(BaseModel):
+    # Chunk coordinates are shared per processed document and served by projection_key
+    projection_key: str
+    # method -> [[query_x, query_y], [response_x, response_y]]
+    points: Dict[str, List[List[float]]]
+    top_chunk_indices: List[int]
+
 class LLMResponse(BaseModel):
+    id: Optional[str] = None
     question: str
     answer: str
     chunks: List[Chunk]
     visualization_plot: List[str]
     rus_metrics: RUSMetrics
-    
\ No newline at end of file
+    question_id: Optional[str] = None
+    configuration_id: Optional[str] = None
+    document_id: Optional[str] = None
+    visualization: Optional[VisualizationCoordinates] = None
@@ -1,13 +1,17 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, ConfigDict
+from typing import Any, Optional
 
 class ProcessedDocument(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     id: Optional[str]
     file_name: Optional[str]
-    full_text: Optional[str]
-    pages: Optional[list]
+    content_hash: Optional[str] = None
+    full_text: Optional[str] = None
+    pages: Optional[list] = None
     chunks: Optional[list]
-    embeddings: Optional[list]
+    # float32 matrix (memory-mapped when loaded from the processed store)
+    embeddings: Optional[Any]
     chunking_strategy: Optional[str]
     token_size: Optional[int]
     sentence_size: Optional[int]
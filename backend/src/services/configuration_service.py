@@ -1,7 +1,11 @@
 from models.configuration import Configuration
-from models.session import Session
+from components.session_store import session_store
+from components.matryoshka import supports_dimension
+from components.quantization import QUANTIZATIONS
 import uuid
 
+RETRIEVAL_SCOPES = ["document", "corpus"]
+
 class ConfigurationService:
     @staticmethod
     def add_configuration(
@@ -13,9 +17,32 @@ class ConfigurationService:
         page_size: int = None,
         embedding_model: str = None,
         similarity_metric: str = None,
-        num_chunks: int = None
+        num_chunks: int = None,
+        retrieval_scope: str = "document",
+        nprobe: int = None,
+        embedding_quantization: str = None,
+        embedding_dimension: int = None,
+        coarse_dimension: int = None
     ) -> Configuration:
         """Add a configuration to a session"""
+        if retrieval_scope not in RETRIEVAL_SCOPES:
+            raise ValueError(f"Unknown retrieval scope: {retrieval_scope}. Expected one of {', '.join(RETRIEVAL_SCOPES)}")
+        if embedding_quantization and embedding_quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown embedding quantization: {embedding_quantization}. Expected one of {', '.join(QUANTIZATIONS)}")
+        # Corpus search runs on its own index, and quantized search does its own rescoring;
+        # neither would apply the other options, so those combinations are rejected
+        if retrieval_scope == "corpus" and embedding_quantization:
+            raise ValueError("Embedding quantization is not supported with corpus retrieval")
+        if retrieval_scope == "corpus" and coarse_dimension:
+            raise ValueError("Coarse dimension is not supported with corpus retrieval")
+        if embedding_quantization and coarse_dimension:
+            raise ValueError("Coarse dimension cannot be combined with embedding quantization")
+        if embedding_dimension and not supports_dimension(embedding_model, embedding_dimension):
+            raise ValueError(f"Embedding model {embedding_model} does not support dimension {embedding_dimension}")
+        if coarse_dimension and not supports_dimension(embedding_model, coarse_dimension):
+            raise ValueError(f"Embedding model {embedding_model} does not support dimension {coarse_dimension}")
+        if coarse_dimension and embedding_dimension and coarse_dimension >= embedding_dimension:
+            raise ValueError("Coarse dimension must be smaller than the embedding dimension")
         configuration = Configuration(
             id=str(uuid.uuid4()),
             session_id=session_id,
@@ -26,16 +53,16 @@ class ConfigurationService:
             page_size=page_size,
             embedding_model=embedding_model,
             similarity_metric=similarity_metric,
-            num_chunks=num_chunks
+            num_chunks=num_chunks,
+            retrieval_scope=retrieval_scope,
+            nprobe=nprobe,
+            embedding_quantization=embedding_quantization,
+            embedding_dimension=embedding_dimension,
+            coarse_dimension=coarse_dimension
         )
 
         try:
-            with open(f"data/session_{session_id}.json", "r") as f:
-                session = Session.model_validate_json(f.read())
-                session.configurations.append(configuration)
-
-            with open(f"data/session_{session_id}.json", "w") as f:
-                f.write(session.model_dump_json(indent=4))
+            session_store.add_item(session_id, "configurations", configuration.id, configuration)
 
             return configuration
         except FileNotFoundError:
@@ -47,16 +74,8 @@ class ConfigurationService:
     def delete_configuration(configuration_id: str, session_id: str) -> None:
         """Delete a configuration from a session"""
         try:
-            with open(f"data/session_{session_id}.json", "r") as f:
-                session = Session.model_validate_json(f.read())
-                original_length = len(session.configurations)
-                session.configurations = [config for config in session.configurations if config.id != configuration_id]
-                
-                if len(session.configurations) == original_length:
-                    raise ValueError(f"Configuration {configuration_id} not found in session {session_id}")
-
-            with open(f"data/session_{session_id}.json", "w") as f:
-                f.write(session.model_dump_json(indent=4))
+            if not session_store.delete_item(session_id, "configurations", configuration_id):
+                raise ValueError(f"Configuration {configuration_id} not found in session {session_id}")
         except FileNotFoundError:
             raise ValueError(f"Session {session_id} not found")
         except Exception as e:
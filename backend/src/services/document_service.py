@@ -1,75 +1,165 @@
+import asyncio
+import hashlib
 import os
 import PyPDF2
-from typing import Tuple, List
+from typing import Optional, Tuple, List
+from fastapi import UploadFile
 from models.document import Document
-from models.session import Session
+from components.blob_store import blob_store
+from components.session_store import session_store
+from components.text_cache import extracted_text_cache, hash_file
+from components.evaluation_engine import evaluation_engine
+from components.metrics import DOCUMENT_UPLOADS, PAGES_EXTRACTED, STAGE_SECONDS
 import uuid
 
 class DocumentService:
     @staticmethod
-    def process_document(file_path: str) -> Tuple[str, List[str]]:
+    def extract_pages(file_path: str, start: int, end: int) -> List[str]:
+        """Extract the text of pages [start, end) (runs in a worker process)"""
+        with STAGE_SECONDS.time(pipeline="document", stage="pdf_parse"):
+            pdf_reader = PyPDF2.PdfReader(file_path)
+            pages = [pdf_reader.pages[page_num].extract_text() for page_num in range(start, end)]
+        PAGES_EXTRACTED.inc(len(pages))
+        return pages
+
+    @staticmethod
+    def page_ranges(file_path: str, num_workers: int) -> List[Tuple[int, int]]:
+        """Split a PDF into contiguous page ranges, a few per worker to balance uneven pages"""
+        num_pages = len(PyPDF2.PdfReader(file_path).pages)
+        range_size = max(1, -(-num_pages // max(1, num_workers * 4)))
+        return [(start, min(start + range_size, num_pages)) for start in range(0, num_pages, range_size)]
+
+    @staticmethod
+    def content_hash(document: Document) -> str:
+        """
+        The document's content hash. Documents uploaded before hashing get it computed
+        from the file once and saved to their record.
+        """
+        if not document.content_hash:
+            document.content_hash = hash_file(document.file_path)
+            if document.session_id:
+                session_store.update_item(document.session_id, "documents", document.id, document)
+        return document.content_hash
+
+    @staticmethod
+    async def extract_document(file_path: str, content_hash: Optional[str] = None) -> str:
+        """
+        Make sure the document's pages are in the extracted-text cache, extracting
+        page ranges in parallel on the process pool. Returns the content hash.
+        """
+        if content_hash is None:
+            content_hash = await asyncio.to_thread(hash_file, file_path)
+        if extracted_text_cache.get(content_hash) is not None:
+            return content_hash
+
+        ranges = await asyncio.to_thread(DocumentService.page_ranges, file_path, evaluation_engine.process_workers)
+        page_groups = await evaluation_engine.map_cpu(
+            DocumentService.extract_pages, [(file_path, start, end) for start, end in ranges]
+        )
+        extracted_text_cache.put(content_hash, [page for group in page_groups for page in group])
+        return content_hash
+
+    @staticmethod
+    def process_document(file_path: str, content_hash: Optional[str] = None) -> Tuple[str, List[str]]:
         """Process a PDF document and return its full text and pages"""
-        pdf_reader = PyPDF2.PdfReader(file_path)
-        
-        full_text = ""
-        pages = []
+        if content_hash is None:
+            content_hash = hash_file(file_path)
+        pages = extracted_text_cache.get(content_hash)
 
-        for page_num in range(len(pdf_reader.pages)):
-            page = pdf_reader.pages[page_num]
-            page_text = page.extract_text()
-            pages.append(page_text)
-            full_text += page_text + "\n\n"
+        if pages is None:
+            pdf_reader = PyPDF2.PdfReader(file_path)
+            pages = DocumentService.extract_pages(file_path, 0, len(pdf_reader.pages))
+            extracted_text_cache.put(content_hash, pages)
 
+        full_text = "".join(page_text + "\n\n" for page_text in pages)
         return full_text, pages
 
     @staticmethod
-    async def save_document(file_content: bytes, filename: str, session_id: str) -> Document:
-        """Save a document and create a Document object"""
-        # Ensure the documents directory exists
-        if not os.path.exists("data/documents"):
-            os.makedirs("data/documents")
+    def add_document(tmp_path: str, content_hash: str, file_size: int, filename: str, session_id: str) -> Document:
+        """
+        Register an uploaded file (already written to tmp_path) with the session.
+        The content is stored once in the blob store; re-uploading a file the session
+        already has returns the existing document.
+        """
+        if not session_store.session_exists(session_id):
+            os.remove(tmp_path)
+            raise FileNotFoundError(f"Session {session_id} not found")
+
+        file_extension = filename.split(".")[-1]
+        file_path = blob_store.add(tmp_path, content_hash, file_extension)
 
-        # Save the file if it doesn't exist
-        file_path = f"data/documents/{filename}"
-        with open(file_path, "wb") as f:
-            f.write(file_content)
+        session = session_store.get_session(session_id)
+        for existing in session.documents:
+            if existing.content_hash == content_hash:
+                blob_store.release(content_hash)
+                DOCUMENT_UPLOADS.inc(result="duplicate")
+                return existing
 
-        # Create a new Document object
         document = Document(
             id=str(uuid.uuid4()),
             file_name=filename,
             file_path=file_path,
             file_type="application/pdf",  # Assuming PDF for now
-            file_size=len(file_content),
-            file_extension=filename.split(".")[-1],
+            file_size=file_size,
+            file_extension=file_extension,
             session_id=session_id,
+            content_hash=content_hash,
         )
 
         # Update session with new document
-        with open(f"data/session_{session_id}.json", "r") as f:
-            session = Session.model_validate_json(f.read())
-            session.documents.append(document)
-
-        with open(f"data/session_{session_id}.json", "w") as f:
-            f.write(session.model_dump_json(indent=4))
+        session_store.add_item(session_id, "documents", document.id, document)
+        DOCUMENT_UPLOADS.inc(result="new")
 
         return document
 
+    @staticmethod
+    async def save_upload(file: UploadFile, session_id: str, block_size: int = 1024 * 1024) -> Document:
+        """Stream an upload to disk in blocks, hashing it on the way, without holding it in memory"""
+        os.makedirs(blob_store.root, exist_ok=True)
+
+        tmp_path = os.path.join(blob_store.root, f".upload-{uuid.uuid4()}.part")
+        digest = hashlib.sha256()
+        file_size = 0
+        try:
+            with STAGE_SECONDS.time(pipeline="document", stage="upload"), open(tmp_path, "wb") as f:
+                while block := await file.read(block_size):
+                    f.write(block)
+                    digest.update(block)
+                    file_size += len(block)
+            return await asyncio.to_thread(
+                DocumentService.add_document, tmp_path, digest.hexdigest(), file_size, file.filename, session_id
+            )
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @staticmethod
+    async def save_document(file_content: bytes, filename: str, session_id: str) -> Document:
+        """Save a document and create a Document object"""
+        os.makedirs(blob_store.root, exist_ok=True)
+
+        tmp_path = os.path.join(blob_store.root, f".upload-{uuid.uuid4()}.part")
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(file_content)
+            return DocumentService.add_document(
+                tmp_path, hashlib.sha256(file_content).hexdigest(), len(file_content), filename, session_id
+            )
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
     @staticmethod
     def delete_document(document_id: str, session_id: str) -> None:
-        """Delete a document from the session"""
+        """Delete a document from the session, dropping its reference to the stored file"""
         try:
-            with open(f"data/session_{session_id}.json", "r", encoding="utf-8") as f:
-                session = Session.model_validate_json(f.read())
-                original_length = len(session.documents)
-                session.documents = [doc for doc in session.documents if doc.id != document_id]
-                
-                if len(session.documents) == original_length:
-                    raise ValueError(f"Document {document_id} not found in session {session_id}")
-
-            with open(f"data/session_{session_id}.json", "w", encoding="utf-8") as f:
-                f.write(session.model_dump_json(indent=4))
+            document = session_store.pop_item(session_id, "documents", document_id)
+            if document is None:
+                raise ValueError(f"Document {document_id} not found in session {session_id}")
         except FileNotFoundError:
             raise ValueError(f"Session {session_id} not found")
         except Exception as e:
-            raise ValueError(f"Failed to delete document: {str(e)}") 
\ No newline at end of file
+            raise ValueError(f"Failed to delete document: {str(e)}")
+
+        if document.content_hash:
+            blob_store.release(document.content_hash)
@@ -0,0 +1,128 @@
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional
+from fastapi import HTTPException
+from models.job import Job, StageProgress
+from components.evaluation_engine import PipelineProgress
+from services.rag_service import RAGService
+
+# Finished jobs are kept this long so clients can still read their status and results
+JOB_RETENTION_SECONDS = 3600
+
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+
+class JobProgress(PipelineProgress):
+    """Records pipeline progress on a job and fans events out to stream subscribers"""
+    def __init__(self, job: Job):
+        self.job = job
+        self.results: List[Dict[str, Any]] = []
+        self.subscribers: List[asyncio.Queue] = []
+
+    def publish(self, event: str, data: Any) -> None:
+        for queue in self.subscribers:
+            queue.put_nowait((event, data))
+
+    def stage(self, name: str, completed: int, total: int) -> None:
+        self.job.stages[name] = StageProgress(completed=completed, total=total)
+        self.publish("progress", self.job.model_dump())
+
+    def result(self, index: int, result: Any) -> None:
+        payload = {"index": index, "answer": result.model_dump()}
+        self.results.append(payload)
+        self.publish("answer", payload)
+
+
+class JobService:
+    jobs: Dict[str, Job] = {}
+    progress: Dict[str, JobProgress] = {}
+    tasks: Dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    def submit_rag_job(query_llm: str, api_key: str, session_id: str, bypass_cache: bool = False, visualization_mode: str = "coordinates") -> Job:
+        """Start the RAG pipeline in the background and return the job handle"""
+        JobService.prune()
+
+        job = Job(id=str(uuid.uuid4()), session_id=session_id, kind="rag", created_at=time.time())
+        progress = JobProgress(job)
+        JobService.jobs[job.id] = job
+        JobService.progress[job.id] = progress
+        JobService.tasks[job.id] = asyncio.create_task(
+            JobService._run(job, progress, RAGService.run_rag_pipeline(query_llm, api_key, session_id, bypass_cache, progress, visualization_mode))
+        )
+        return job
+
+    @staticmethod
+    async def _run(job: Job, progress: JobProgress, pipeline) -> None:
+        job.status = "running"
+        progress.publish("progress", job.model_dump())
+        try:
+            await pipeline
+            job.status = "completed"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+        except HTTPException as e:
+            job.status = "failed"
+            job.error = str(e.detail)
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            JobService.tasks.pop(job.id, None)
+            progress.publish(job.status, job.model_dump())
+
+    @staticmethod
+    def get_job(job_id: str) -> Job:
+        if job_id not in JobService.jobs:
+            raise ValueError(f"Job {job_id} not found")
+        return JobService.jobs[job_id]
+
+    @staticmethod
+    def cancel_job(job_id: str) -> Job:
+        """Cancel outstanding work; answers already produced stay available"""
+        job = JobService.get_job(job_id)
+        task = JobService.tasks.get(job_id)
+        if task is not None and not task.done():
+            task.cancel()
+        return job
+
+    @staticmethod
+    async def stream_events(job_id: str) -> AsyncIterator[str]:
+        """Server-Sent Events stream: completed answers first, then live progress and answers"""
+        job = JobService.get_job(job_id)
+        progress = JobService.progress[job_id]
+        queue: asyncio.Queue = asyncio.Queue()
+        progress.subscribers.append(queue)
+        # Snapshot before the first yield so nothing is both replayed and queued
+        completed_results = list(progress.results)
+        try:
+            yield JobService.format_event("progress", job.model_dump())
+            for payload in completed_results:
+                yield JobService.format_event("answer", payload)
+            if job.status in FINISHED_STATUSES:
+                yield JobService.format_event(job.status, job.model_dump())
+                return
+
+            while True:
+                event, data = await queue.get()
+                yield JobService.format_event(event, data)
+                if event in FINISHED_STATUSES:
+                    return
+        finally:
+            progress.subscribers.remove(queue)
+
+    @staticmethod
+    def format_event(event: str, data: Any) -> str:
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    @staticmethod
+    def prune() -> None:
+        """Forget finished jobs older than the retention window"""
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        for job_id, job in list(JobService.jobs.items()):
+            if job.finished_at is not None and job.finished_at < cutoff:
+                JobService.jobs.pop(job_id, None)
+                JobService.progress.pop(job_id, None)
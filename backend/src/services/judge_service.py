@@ -1,20 +1,166 @@
 import json
-from typing import Dict, Any
+import math
+from typing import Dict, Any, List, Optional
 from services.session_service import SessionService
+from models.configuration import Configuration
 from models.llm_response import LLMResponse
-from components.genai import generate_judge_gemini_response, generate_judge_openai_response
+from models.session import Session
+from components.genai import (
+    generate_judge_gemini_response_async, generate_judge_openai_response_async,
+    user_prompt, question_judge_prompt, reduce_judge_prompt
+)
+from components.metrics import STAGE_SECONDS, timed_pipeline
+from components.evaluation_engine import gather_or_cancel
+
+# "single" sends the whole session in one call; "map_reduce" judges each question
+# separately and concurrently, then combines the verdicts in a final call
+JUDGE_MODES = ("single", "map_reduce")
+
+
+def _round(value: Optional[float], digits: int = 3) -> Optional[float]:
+    if value is None or math.isnan(value):
+        return None
+    return round(value, digits)
+
+
+def _compact(data: Any) -> str:
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
 
 class JudgeService:
     @staticmethod
+    async def judge(judge_llm: str, api_key: str, input_data: str, use_cache: bool, prompt_template: str = user_prompt) -> dict:
+        if judge_llm == "gemini-2.0-flash":
+            return await generate_judge_gemini_response_async(api_key=api_key, input_data=input_data, use_cache=use_cache, prompt_template=prompt_template)
+        elif judge_llm == "gpt-4o-mini":
+            return await generate_judge_openai_response_async(api_key=api_key, input_data=input_data, use_cache=use_cache, prompt_template=prompt_template)
+        raise ValueError("Invalid LLM model")
+
+    @staticmethod
+    def configuration_settings(configuration: Configuration) -> Dict[str, Any]:
+        """The settings that distinguish a configuration, without ids or sizes of unused strategies"""
+        sizes = {"sentence": "sentence_size", "paragraph": "paragraph_size", "page": "page_size", "tokens": "token_size"}
+        settings = configuration.model_dump(exclude={"id", "session_id", *sizes.values()}, exclude_none=True)
+        size_field = sizes.get(configuration.chunking_strategy)
+        if size_field and getattr(configuration, size_field) is not None:
+            settings["chunk_size"] = getattr(configuration, size_field)
+        if settings.get("retrieval_scope") == "document":
+            del settings["retrieval_scope"]
+        return settings
+
+    @staticmethod
+    def question_input(
+        question: str,
+        answers: List[LLMResponse],
+        configuration_ids: Dict[str, str],
+        configuration_settings: Dict[str, Dict[str, Any]],
+        document_ids: Dict[str, str]
+    ) -> str:
+        """
+        Compact judge input for one question. Configurations and answer texts are listed
+        once and referenced by short ids; chunk and RUS values are positional arrays.
+        """
+        answer_ids: Dict[str, str] = {}
+        results = []
+        for answer in answers:
+            if answer.answer not in answer_ids:
+                answer_ids[answer.answer] = f"A{len(answer_ids) + 1}"
+            result = {"configuration": configuration_ids.get(answer.configuration_id, "?")}
+            if len(document_ids) > 1 and answer.document_id in document_ids:
+                result["document"] = document_ids[answer.document_id]
+            result["answer"] = answer_ids[answer.answer]
+            metrics = answer.rus_metrics
+            result["rus"] = [_round(metrics.rus), _round(metrics.normalized_dcr), _round(metrics.scaled_correlation), _round(metrics.wasted_similarity_penalty)]
+            result["chunks"] = [[chunk.chunk_number, _round(chunk.similarity_score), _round(chunk.relevance_score, 1)] for chunk in answer.chunks]
+            results.append(result)
+
+        used = dict.fromkeys(result["configuration"] for result in results)
+        return _compact({
+            "question": question,
+            "configurations": {short_id: configuration_settings[short_id] for short_id in used if short_id in configuration_settings},
+            "answers": {short_id: text for text, short_id in answer_ids.items()},
+            "results": results,
+        })
+
+    @staticmethod
+    def answers_by_question(session: Session) -> List[tuple]:
+        """(question text, answers) per question, in session order; answers ordered by configuration"""
+        configuration_order = {configuration.id: position for position, configuration in enumerate(session.configurations)}
+        groups: Dict[str, tuple] = {}
+        for question in session.questions:
+            groups[question.id] = (question.question_string, [])
+        for answer in session.answers:
+            # Answers stored without a question id are grouped by the question text
+            key = answer.question_id if answer.question_id in groups else f"text:{answer.question}"
+            groups.setdefault(key, (answer.question, []))[1].append(answer)
+        return [
+            (question, sorted(answers, key=lambda answer: configuration_order.get(answer.configuration_id, len(configuration_order))))
+            for question, answers in groups.values() if answers
+        ]
+
+    @staticmethod
+    async def run_map_reduce(judge_llm: str, api_key: str, session: Session, bypass_cache: bool = False) -> Dict[str, Any]:
+        """
+        Judge every question independently and concurrently, then combine the verdicts.
+        Each per-question call is cached by its own prompt, so after adding a question
+        only that question (and the final combination) goes to the LLM.
+        """
+        configuration_ids = {configuration.id: f"C{position + 1}" for position, configuration in enumerate(session.configurations)}
+        configuration_settings = {
+            configuration_ids[configuration.id]: JudgeService.configuration_settings(configuration)
+            for configuration in session.configurations
+        }
+        document_ids = {document.id: f"D{position + 1}" for position, document in enumerate(session.documents)}
+        questions = JudgeService.answers_by_question(session)
+
+        with STAGE_SECONDS.time(pipeline="judge", stage="map"):
+            verdicts = await gather_or_cancel(*(
+                JudgeService.judge(
+                    judge_llm, api_key,
+                    JudgeService.question_input(question, answers, configuration_ids, configuration_settings, document_ids),
+                    not bypass_cache, question_judge_prompt
+                )
+                for question, answers in questions
+            ))
+
+        question_verdicts = [{"question": question, **verdict} for (question, _), verdict in zip(questions, verdicts)]
+        judged = [verdict for verdict in question_verdicts if "error" not in verdict]
+        if not judged:
+            errors = [verdict["error"] for verdict in question_verdicts]
+            return {"error": errors[0] if errors else "Error: no answers to judge", "question_verdicts": question_verdicts}
+
+        with STAGE_SECONDS.time(pipeline="judge", stage="reduce"):
+            judge_response = await JudgeService.judge(
+                judge_llm, api_key,
+                _compact({"configurations": configuration_settings, "verdicts": judged}),
+                not bypass_cache, reduce_judge_prompt
+            )
+        return {
+            **judge_response,
+            "question_verdicts": question_verdicts,
+            "configuration_ids": {short_id: configuration_id for configuration_id, short_id in configuration_ids.items()},
+        }
+
+    @staticmethod
+    @timed_pipeline("judge")
     async def run_judge_pipeline(
         judge_llm: Any,
         api_key: str,
-        session_id: str
+        session_id: str,
+        bypass_cache: bool = False,
+        mode: str = "single"
     ) -> Dict[str, Any]:
         """Run the judge pipeline to evaluate RAG responses"""
+        if mode not in JUDGE_MODES:
+            raise ValueError(f"Unknown judge mode: {mode}")
 
         # Get session data
         session = SessionService.get_session(session_id)
+        if mode == "map_reduce":
+            try:
+                return await JudgeService.run_map_reduce(judge_llm, api_key, session, bypass_cache)
+            except Exception as e:
+                return {"error": f"Error: {str(e)}"}
         configurations = session.configurations
         answers = session.answers
 
@@ -59,12 +205,8 @@ class JudgeService:
         judge_input_json = json.dumps(judge_input, indent=4)
         
         try:
-            if judge_llm == "gemini-2.0-flash":
-                judge_response = generate_judge_gemini_response(api_key=api_key, input_data=judge_input_json)
-            elif judge_llm == "gpt-4o-mini":
-                judge_response = generate_judge_openai_response(api_key=api_key, input_data=judge_input_json)
-            else:
-                raise ValueError("Invalid LLM model")
+            with STAGE_SECONDS.time(pipeline="judge", stage="llm"):
+                judge_response = await JudgeService.judge(judge_llm, api_key, judge_input_json, not bypass_cache)
             
             print(judge_response)
             return judge_response
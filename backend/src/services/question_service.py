@@ -1,5 +1,5 @@
 from models.question import Question
-from models.session import Session
+from components.session_store import session_store
 import uuid
 
 class QuestionService:
@@ -13,12 +13,7 @@ class QuestionService:
         )
         
         try:
-            with open(f"data/session_{session_id}.json", "r", encoding="utf-8") as f:
-                session = Session.model_validate_json(f.read())
-                session.questions.append(question)
-
-            with open(f"data/session_{session_id}.json", "w", encoding="utf-8") as f:
-                f.write(session.model_dump_json(indent=4))
+            session_store.add_item(session_id, "questions", question.id, question)
 
             return question
         except FileNotFoundError:
@@ -30,16 +25,8 @@ class QuestionService:
     def delete_question(question_id: str, session_id: str) -> None:
         """Delete a question from a session"""
         try:
-            with open(f"data/session_{session_id}.json", "r", encoding="utf-8") as f:
-                session = Session.model_validate_json(f.read())
-                original_length = len(session.questions)
-                session.questions = [q for q in session.questions if q.id != question_id]
-                
-                if len(session.questions) == original_length:
-                    raise ValueError(f"Question {question_id} not found in session {session_id}")
-
-            with open(f"data/session_{session_id}.json", "w", encoding="utf-8") as f:
-                f.write(session.model_dump_json(indent=4))
+            if not session_store.delete_item(session_id, "questions", question_id):
+                raise ValueError(f"Question {question_id} not found in session {session_id}")
         except FileNotFoundError:
             raise ValueError(f"Session {session_id} not found")
         except Exception as e:
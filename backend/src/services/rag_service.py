@@ -1,54 +1,294 @@
-from typing import List, Dict, Any
+import asyncio
+from typing import List, Dict, Any, Optional, Tuple
+from models.configuration import Configuration
+from models.document import Document
 from models.processed_document import ProcessedDocument
-from models.llm_response import LLMResponse, RUSMetrics
-from components.chunking import chunk_by_sentence, chunk_by_paragraph, chunk_by_page, chunk_by_tokens
+from models.question import Question
+from models.llm_response import LLMResponse, RUSMetrics, VisualizationCoordinates
+from components.chunking import DocumentSegments, TOKEN_OVERLAP
+from components.chunk_store import chunk_store
 from components.embedding import EmbeddingGenerator
+from components.inference_backend import model_variant
 from components.similarity_metrics import SimilarityCalculator
-from components.genai import generate_gemini_response, generate_openai_response, format_context_for_llm
+from components.genai import generate_gemini_response_async, generate_openai_response_async, format_context_for_llm
 from components.utils import calculate_rus
 from services.document_service import DocumentService
 from services.session_service import SessionService
+from services.visualization_service import VisualizationService
 from models.llm_response import Chunk
-from components.visualization import PCA_visualization, tSNE_visualization, UMAP_visualization
+from components.visualization import PCA_visualization, tSNE_visualization, UMAP_visualization, place_query_and_response, PROJECTION_METHODS
+from components.processed_store import processed_store, processed_key
+from components.vector_index import CorpusIndex, corpus_index_store
+from components.quantization import QuantizedEmbeddings
+from components.matryoshka import coarse_to_fine_search, truncate_embeddings
+from components.session_store import session_store
+from components.evaluation_engine import evaluation_engine, gather_or_cancel, PipelineProgress, StageCounter
+from components.metrics import CORPUS_INDEX_RECALL, STAGE_SECONDS, timed_pipeline
 from fastapi import HTTPException
-import json
+import logging
+import numpy as np
 import os
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Record the corpus index's recall against exact search on every retrieval (costs an exact search)
+MEASURE_INDEX_RECALL = os.getenv("RAG_INDEX_MEASURE_RECALL", "0") == "1"
 
 class RAGService:
     @staticmethod
-    def create_embeddings(
-        full_text: str,
-        pages: List[str],
-        chunking_strategy: str,
-        token_size: int,
-        sentence_size: int,
-        paragraph_size: int,
-        page_size: int,
-        embedding_model: str
-    ) -> tuple[List[str], List[List[float]]]:
-        """Create chunks and embeddings for a document"""
-        chunks = []
-
-        if chunking_strategy == "sentence":
-            chunks = chunk_by_sentence(full_text, size=sentence_size)
-        elif chunking_strategy == "paragraph":
-            chunks = chunk_by_paragraph(full_text, size=paragraph_size)
-        elif chunking_strategy == "page":
-            chunks = chunk_by_page(full_text, pages, size=page_size)
-        elif chunking_strategy == "tokens":
-            chunks = chunk_by_tokens(full_text, token_size=token_size)
-
-        embeddings = EmbeddingGenerator.get_embeddings(chunks, embedding_model)
-
-        return chunks, embeddings
+    def embed_queries(queries: List[str], embedding_model: str) -> np.ndarray:
+        """Embed all queries for one embedding model in a single call"""
+        if not queries:
+            return np.empty((0, 0), dtype=np.float32)
+        return EmbeddingGenerator.get_embeddings(queries, embedding_model)
+
+    @staticmethod
+    def retrieve(
+        query_embeddings: np.ndarray,
+        chunk_embeddings,
+        similarity_metric: str,
+        num_chunks: int,
+        corpus_index: Optional[CorpusIndex] = None,
+        nprobe: Optional[int] = None,
+        coarse_dimension: Optional[int] = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Score all queries against all chunks and select the top chunks per query"""
+        if len(query_embeddings) == 0:
+            return np.empty((0, len(chunk_embeddings)), dtype=np.float32), np.empty((0, 0), dtype=np.int64)
+        if corpus_index is not None:
+            if MEASURE_INDEX_RECALL and corpus_index.ivf is not None:
+                CORPUS_INDEX_RECALL.observe(
+                    corpus_index.recall(query_embeddings, similarity_metric, num_chunks, nprobe), similarity_metric=similarity_metric
+                )
+            return corpus_index.search(query_embeddings, similarity_metric, num_chunks, nprobe)
+        if isinstance(chunk_embeddings, QuantizedEmbeddings):
+            return chunk_embeddings.search(query_embeddings, similarity_metric, num_chunks)
+        if coarse_dimension and coarse_dimension < np.shape(chunk_embeddings)[1]:
+            return coarse_to_fine_search(query_embeddings, chunk_embeddings, similarity_metric, num_chunks, coarse_dimension)
+        similarity_matrix = SimilarityCalculator.similarity_matrix(query_embeddings, chunk_embeddings, similarity_metric)
+        top_indices = SimilarityCalculator.top_k_indices_batch(similarity_matrix, k=num_chunks)
+        return similarity_matrix, top_indices
+
+    @staticmethod
+    def processed_key_fields(document: Document, configuration: Configuration) -> Dict[str, Any]:
+        """Fields identifying the processed (document, chunking, model) entry for a work unit"""
+        return {
+            "content_hash": DocumentService.content_hash(document),
+            "chunking_strategy": configuration.chunking_strategy,
+            "token_size": configuration.token_size,
+            "sentence_size": configuration.sentence_size,
+            "paragraph_size": configuration.paragraph_size,
+            "page_size": configuration.page_size,
+            # Quantized-backend and truncated embeddings are stored apart from full fp32 ones
+            "embedding_model": model_variant(configuration.embedding_model) + (
+                f"@{configuration.embedding_dimension}" if configuration.embedding_dimension else ""
+            ),
+        }
+
+    @staticmethod
+    def configuration_embeddings(configuration: Configuration, embeddings: np.ndarray) -> np.ndarray:
+        """Embeddings as a configuration stores them: truncated to its Matryoshka dimension, if any"""
+        if configuration.embedding_dimension:
+            return truncate_embeddings(embeddings, configuration.embedding_dimension)
+        return embeddings
+
+    @staticmethod
+    def corpus_document(
+        documents: List[Document],
+        configuration: Configuration,
+        processed_documents: Dict[str, ProcessedDocument]
+    ) -> Tuple[ProcessedDocument, CorpusIndex]:
+        """
+        Combine every document processed with this configuration into one corpus: a
+        ProcessedDocument with the concatenated chunks (global chunk numbering) and its index.
+        """
+        keys = [processed_key(**RAGService.processed_key_fields(document, configuration)) for document in documents]
+        members = [processed_documents[key] for key in keys]
+        corpus_index = corpus_index_store.get(keys, [member.embeddings for member in members])
+        key_fields = RAGService.processed_key_fields(documents[0], configuration)
+        key_fields["content_hash"] = None
+        corpus = ProcessedDocument(
+            id=corpus_index.key,
+            file_name=None,
+            chunks=[chunk for member in members for chunk in member.chunks],
+            embeddings=corpus_index.matrix.matrix,
+            **key_fields
+        )
+        return corpus, corpus_index
+
+    @staticmethod
+    def chunk_spec(configuration: Configuration) -> Tuple[str, int, int]:
+        """(strategy, size, overlap) of a configuration; the chunk store key besides the document"""
+        strategy = configuration.chunking_strategy
+        sizes = {
+            "sentence": configuration.sentence_size,
+            "paragraph": configuration.paragraph_size,
+            "page": configuration.page_size,
+            "tokens": configuration.token_size,
+        }
+        return strategy, sizes.get(strategy), TOKEN_OVERLAP if strategy == "tokens" else 0
+
+    @staticmethod
+    def chunk_document(document: Document, chunk_specs: List[Tuple[str, int, int]]) -> None:
+        """
+        Chunk a document for every (strategy, size, overlap) it is used with (runs in a
+        worker process). Each segmentation is computed once and regrouped per size.
+        """
+        missing = [spec for spec in chunk_specs if chunk_store.get(document.content_hash, *spec) is None]
+        if not missing:
+            return
+        full_text, pages = DocumentService.process_document(document.file_path, document.content_hash)
+        segments = DocumentSegments(full_text, pages)
+        for strategy, size, overlap in missing:
+            chunk_store.put(document.content_hash, strategy, size, overlap, segments.chunk(strategy, size, overlap))
 
     @staticmethod
+    def process_document(document: Document, configuration: Configuration) -> ProcessedDocument:
+        """Embed a document's chunks for one configuration (runs on the model threads)"""
+        chunk_spec = RAGService.chunk_spec(configuration)
+        chunks = chunk_store.get(document.content_hash, *chunk_spec)
+        if chunks is None:
+            RAGService.chunk_document(document, [chunk_spec])
+            chunks = chunk_store.get(document.content_hash, *chunk_spec)
+        embeddings = EmbeddingGenerator.get_embeddings(chunks, configuration.embedding_model)
+        embeddings = RAGService.configuration_embeddings(configuration, embeddings)
+
+        return ProcessedDocument(
+            id=document.id,
+            file_name=document.file_name,
+            chunks=chunks,
+            embeddings=embeddings,
+            **RAGService.processed_key_fields(document, configuration)
+        )
+
+    @staticmethod
+    async def generate_answer(query_llm: str, query: str, context: str, api_key: str, use_cache: bool = True) -> dict:
+        if query_llm == "gemini-2.0-flash":
+            return await generate_gemini_response_async(query, context, api_key, use_cache=use_cache)
+        elif query_llm == "gpt-4o-mini":
+            return await generate_openai_response_async(query, context, api_key, use_cache=use_cache)
+        raise ValueError("Invalid LLM model")
+
+    @staticmethod
+    def embed_answer(answer_text: str, embedding_model: str, embedding_dimension: Optional[int] = None) -> np.ndarray:
+        """Embed an answer the way its configuration embeds chunks (runs on the model threads)"""
+        response_embedding = EmbeddingGenerator.get_embeddings([answer_text], embedding_model)[0]
+        if embedding_dimension:
+            response_embedding = truncate_embeddings(response_embedding, embedding_dimension)
+        return response_embedding
+
+    @staticmethod
+    def visualize_answer(
+        projection_key: str,
+        query_embedding: np.ndarray,
+        response_embedding: np.ndarray,
+        top_indices: List[int],
+        session_id: str,
+        question_id: str,
+        answer_id: Optional[str] = None,
+        visualization_mode: str = "coordinates"
+    ) -> tuple[List[str], Optional[VisualizationCoordinates]]:
+        """
+        Project the query and answer (runs in a worker process).
+        Projections fitted on the chunks are cached per processed document under projection_key;
+        the chunk embeddings are read from the memory-mapped store only to fit a missing one.
+        In "coordinates" mode only the query/response placements are computed and the PNGs
+        are rendered lazily when requested; "png" mode renders them immediately.
+        """
+        def chunk_embeddings():
+            return VisualizationService.projection_embeddings(projection_key)
+
+        if visualization_mode == "coordinates" and answer_id:
+            placed = place_query_and_response(chunk_embeddings, query_embedding, response_embedding, projection_key)
+            coordinates = VisualizationCoordinates(
+                projection_key=projection_key,
+                points={method: points.tolist() for method, points in placed.items()},
+                top_chunk_indices=top_indices
+            )
+            lazy_paths = [VisualizationService.lazy_plot_path(session_id, method, answer_id) for method in PROJECTION_METHODS]
+            return lazy_paths, coordinates
+
+        pca_path = PCA_visualization(chunk_embeddings, query_embedding, response_embedding, top_indices, session_id, question_id, projection_key)
+        tsne_path = tSNE_visualization(chunk_embeddings, query_embedding, response_embedding, top_indices, session_id, question_id, projection_key)
+        umap_path = UMAP_visualization(chunk_embeddings, query_embedding, response_embedding, top_indices, session_id, question_id, projection_key)
+        return [umap_path, tsne_path, pca_path], None  # Order: UMAP, tSNE, PCA
+
+    @staticmethod
+    def build_response(
+        question: Question,
+        configuration: Configuration,
+        document: Document,
+        processed_document: ProcessedDocument,
+        similarity_scores: List[float],
+        answer: dict,
+        visualization_plot: List[str],
+        visualization: Optional[VisualizationCoordinates] = None,
+        answer_id: Optional[str] = None,
+        corpus_index: Optional[CorpusIndex] = None,
+        corpus_document_ids: Optional[List[str]] = None
+    ) -> LLMResponse:
+        relevance_analysis = answer["relevance_analysis"]
+
+        # Calculate RUS
+        similarity_scores_list = [similarity_scores[chunk["chunk_number"] - 1] for chunk in relevance_analysis]
+        relevance_scores_list = [chunk["relevance_score"] / 100.0 for chunk in relevance_analysis]  # Normalize to 0-1
+        rus_result = calculate_rus(similarity_scores_list, relevance_scores_list)
+
+        # Chunk numbers of a corpus answer are global; attribute each chunk to its document,
+        # given in the order the corpus was built from
+        if corpus_index is not None:
+            positions, _ = corpus_index.locate([chunk["chunk_number"] - 1 for chunk in relevance_analysis])
+            chunk_document_ids = [corpus_document_ids[position] for position in positions]
+        else:
+            chunk_document_ids = [document.id for _ in relevance_analysis]
+
+        chunks_data = [
+            Chunk(
+                chunk_number=chunk["chunk_number"],
+                text=processed_document.chunks[chunk["chunk_number"] - 1],
+                relevance_score=chunk["relevance_score"],
+                similarity_score=similarity_scores[chunk["chunk_number"] - 1],
+                document_id=document_id
+            )
+            for chunk, document_id in zip(relevance_analysis, chunk_document_ids)
+        ]
+
+        return LLMResponse(
+            id=answer_id or str(uuid.uuid4()),
+            question=question.question_string,
+            answer=answer["answer"],
+            chunks=chunks_data,
+            visualization_plot=visualization_plot,
+            rus_metrics=RUSMetrics(
+                rus=rus_result["RUS"],
+                normalized_dcr=rus_result["Normalized_DCR"],
+                scaled_correlation=rus_result["Scaled_Correlation"],
+                wasted_similarity_penalty=rus_result["Wasted_Similarity_Penalty"]
+            ),
+            question_id=question.id,
+            configuration_id=configuration.id,
+            document_id=document.id if document is not None else None,
+            visualization=visualization
+        )
+
+    @staticmethod
+    @timed_pipeline("rag")
     async def run_rag_pipeline(
         query_llm: str,
         api_key: str,
-        session_id: str
+        session_id: str,
+        bypass_cache: bool = False,
+        progress: Optional[PipelineProgress] = None,
+        visualization_mode: str = "coordinates"
     ) -> Dict[str, Any]:
-        """Run the complete RAG pipeline"""
+        """
+        Run the complete RAG pipeline over every configuration x document x question
+        (configuration x question for corpus-scope configurations).
+        Answers are stored in that grid order regardless of completion order.
+        """
+        progress = progress or PipelineProgress()
         # Get session data
         try:
             session = SessionService.get_session(session_id)
@@ -56,177 +296,191 @@ class RAGService:
             # if session contains answers, delete them
             if session.answers:
                 session.answers = []
+                session_store.clear_items(session_id, "answers")
 
             configurations = session.configurations
             documents = session.documents
             questions = session.questions
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
-        
-        processed_doc_path = "data/processed_documents.json"
-
-        # Load existing processed documents
-        if os.path.exists(processed_doc_path):
-            with open(processed_doc_path, "r", encoding="utf-8") as f:
-                try:
-                    processed_documents = json.load(f)
-                    if not isinstance(processed_documents, list):
-                        processed_documents = []  # Reset if not a list
-                except json.JSONDecodeError:
-                    processed_documents = []  # Reset on JSON error
-        else:
-            processed_documents = []
 
-        for configuration in configurations:
-            try:
-                for document in documents:
-                    # Check if the document is already processed with the same configuration
-                    matched_document = next(
-                        (
-                            pd for pd in processed_documents
-                            if pd["file_name"] == document.file_name
-                            and pd["chunking_strategy"] == configuration.chunking_strategy
-                            and pd["embedding_model"] == configuration.embedding_model
-                            and pd["token_size"] == configuration.token_size
-                            and pd["sentence_size"] == configuration.sentence_size
-                            and pd["paragraph_size"] == configuration.paragraph_size
-                            and pd["page_size"] == configuration.page_size
-                        ),
-                        None
-                    )
+        engine = evaluation_engine
+        grid = [(configuration, document) for configuration in configurations for document in documents]
 
-                    if matched_document:
-                        processed_document = ProcessedDocument(**matched_document)
-
-                        print("Document already processed with the same configuration")
-
-                    else:
-                        # Process document
-                        full_text, pages = DocumentService.process_document(document.file_path)
-                        chunks, embeddings = RAGService.create_embeddings(
-                            full_text,
-                            pages,
-                            configuration.chunking_strategy,
-                            configuration.token_size,
-                            configuration.sentence_size,
-                            configuration.paragraph_size,
-                            configuration.page_size,
-                            configuration.embedding_model
-                        )
-
-                        processed_document = ProcessedDocument(
-                            id=document.id,
-                            file_name=document.file_name,
-                            full_text=full_text,
-                            pages=pages,
-                            chunks=chunks,
-                            embeddings=embeddings,
-                            chunking_strategy=configuration.chunking_strategy,
-                            token_size=configuration.token_size,
-                            sentence_size=configuration.sentence_size,
-                            paragraph_size=configuration.paragraph_size,
-                            page_size=configuration.page_size,
-                            embedding_model=configuration.embedding_model,
-                        )
-
-                        # Append the new processed document
-                        processed_documents.append(processed_document.model_dump())
-
-                        # Save back as a valid JSON array
-                        with open(processed_doc_path, "w", encoding="utf-8") as f:
-                            json.dump(processed_documents, f, indent=4)
+        try:
+            # Documents uploaded before content hashing are hashed here once; the hash is saved to the session
+            for document in documents:
+                if not document.content_hash:
+                    document.content_hash = await asyncio.to_thread(DocumentService.content_hash, document)
+
+            # Chunk and embed each distinct (document, chunking, model) once, in parallel
+            processed_documents = {}
+            pending = {}
+            for configuration, document in grid:
+                key_fields = RAGService.processed_key_fields(document, configuration)
+                key = processed_key(**key_fields)
+                if key in processed_documents or key in pending:
+                    continue
+                processed_document = processed_store.get(**key_fields)
+                if processed_document:
+                    logger.debug("Processed entry %s found for document %s", key, document.id)
+                    processed_documents[key] = processed_document
+                else:
+                    pending[key] = (document, configuration)
+
+            # Parse each pending PDF once, in parallel page ranges; workers then hit the text cache
+            pending_files = dict((document.content_hash, document.file_path) for document, _ in pending.values())
+            extraction_done = StageCounter(progress, "extraction", len(pending_files))
+            with STAGE_SECONDS.time(pipeline="rag", stage="extraction"):
+                for content_hash, file_path in pending_files.items():
+                    await DocumentService.extract_document(file_path, content_hash)
+                    extraction_done()
+
+            # Chunk each document once per distinct chunking, shared by every embedding model
+            chunk_specs = {}
+            for document, configuration in pending.values():
+                specs = chunk_specs.setdefault(document.content_hash, (document, []))[1]
+                if RAGService.chunk_spec(configuration) not in specs:
+                    specs.append(RAGService.chunk_spec(configuration))
+            chunking_done = StageCounter(progress, "chunking", len(chunk_specs))
+            with STAGE_SECONDS.time(pipeline="rag", stage="chunking"):
+                await engine.map_cpu(RAGService.chunk_document, chunk_specs.values(), on_done=chunking_done)
+
+            documents_done = StageCounter(progress, "documents", len(pending))
+            with STAGE_SECONDS.time(pipeline="rag", stage="embedding"):
+                results = await engine.map_model(RAGService.process_document, pending.values(), on_done=documents_done)
+            for (key, (document, configuration)), processed_document in zip(pending.items(), results):
+                processed_store.put(processed_document)
+                processed_documents[key] = processed_store.get(**RAGService.processed_key_fields(document, configuration))
 
-            except Exception as e:
-                raise HTTPException(status_code=500, detail=f"Error processing document: {str(e)}")
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error processing document: {str(e)}")
 
-            try:
-                # Process each question
-                for question in questions:
-                    query = question.question_string
-                    query_embedding = EmbeddingGenerator.get_embeddings([query], configuration.embedding_model)[0]
+        try:
+            # Embed every question once per embedding model
+            embedding_models = list(dict.fromkeys(configuration.embedding_model for configuration in configurations))
+            query_texts = [question.question_string for question in questions]
+            queries_done = StageCounter(progress, "query_embeddings", len(embedding_models))
+            with STAGE_SECONDS.time(pipeline="rag", stage="query_embedding"):
+                query_embeddings = await engine.map_model(RAGService.embed_queries, [(query_texts, model) for model in embedding_models], on_done=queries_done)
+            query_embeddings_by_model = dict(zip(embedding_models, query_embeddings))
 
-            except Exception as e:
-                raise HTTPException(status_code=500, detail=f"Embedding generation server error: {str(e)}")
-            
-            try:
-                # Calculate similarities and get top chunks
-                    similarity_scores = SimilarityCalculator.get_similarity_scores(
-                        query_embedding,
-                        processed_document.embeddings,
-                        configuration.similarity_metric
-                    )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Embedding generation server error: {str(e)}")
 
-                    top_chunks = SimilarityCalculator.get_top_k_chunks(
-                        processed_document.chunks,
-                        similarity_scores,
-                        k=configuration.num_chunks
+        try:
+            # Document-scope configurations retrieve from each document separately;
+            # corpus-scope ones search a single index over every document's chunks
+            targets = []
+            for configuration in configurations:
+                if configuration.retrieval_scope == "corpus" and documents:
+                    processed_document, corpus_index = await asyncio.to_thread(
+                        RAGService.corpus_document, documents, configuration, processed_documents
                     )
+                    targets.append((configuration, None, processed_document, corpus_index.key, corpus_index))
+                elif configuration.retrieval_scope != "corpus":
+                    for document in documents:
+                        key = processed_key(**RAGService.processed_key_fields(document, configuration))
+                        targets.append((configuration, document, processed_documents[key], key, None))
+
+            # Quantized configurations scan the compact codes of the stored embeddings
+            search_embeddings = [
+                await asyncio.to_thread(processed_store.get_quantized, key, configuration.embedding_quantization)
+                if configuration.embedding_quantization and corpus_index is None else processed_document.embeddings
+                for configuration, _, processed_document, key, corpus_index in targets
+            ]
+
+            progress.stage("retrieval", 0, len(targets))
+            retrieval_started = time.perf_counter()
+            retrievals = await gather_or_cancel(*(
+                asyncio.to_thread(
+                    RAGService.retrieve,
+                    RAGService.configuration_embeddings(configuration, query_embeddings_by_model[configuration.embedding_model]),
+                    chunk_embeddings,
+                    configuration.similarity_metric,
+                    configuration.num_chunks,
+                    corpus_index,
+                    configuration.nprobe,
+                    configuration.coarse_dimension
+                )
+                for (configuration, _, _, _, corpus_index), chunk_embeddings in zip(targets, search_embeddings)
+            ))
+
+            STAGE_SECONDS.observe(time.perf_counter() - retrieval_started, pipeline="rag", stage="retrieval")
+            progress.stage("retrieval", len(targets), len(targets))
+
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Similarity calculation server error: {str(e)}")
 
-            except Exception as e:  
-                raise HTTPException(status_code=500, detail=f"Similarity calculation server error: {str(e)}")
+        # Expand into retrieval target x question work units
+        units = []
+        for target, (similarity_matrix, top_indices) in zip(targets, retrievals):
+            for question_index, question in enumerate(questions):
+                units.append((*target, question, question_index, similarity_matrix, top_indices))
+
+        answers_done = StageCounter(progress, "answers", len(units))
+
+        async def evaluate_unit(unit_index, configuration, document, processed_document, projection_key, corpus_index, question, question_index, similarity_matrix, top_indices):
+            similarity_scores = similarity_matrix[question_index].tolist()
+            query_embedding = RAGService.configuration_embeddings(
+                configuration, query_embeddings_by_model[configuration.embedding_model][question_index]
+            )
 
             try:
                 # Format context and generate response
-                    top_chunk_texts = [(chunk, chunk_number) for chunk_number, (chunk, _) in top_chunks]
-                    context = format_context_for_llm(top_chunk_texts)
-
-                    if query_llm == "gemini-2.0-flash":
-                        answer = generate_gemini_response(query, context, api_key)
-                    elif query_llm == "gpt-4o-mini":
-                        answer = generate_openai_response(query, context, api_key)
-
-                    chunks_data = []
-                    relevance_analysis = answer["relevance_analysis"]
-
-                    # Calculate RUS
-                    similarity_scores_list = [similarity_scores[chunk["chunk_number"] - 1] for chunk in relevance_analysis]
-                    relevance_scores_list = [chunk["relevance_score"] / 100.0 for chunk in relevance_analysis]  # Normalize to 0-1
-                    rus_result = calculate_rus(similarity_scores_list, relevance_scores_list)
-
-                    for chunk in relevance_analysis:
-                        chunks_data.append(
-                            Chunk(
-                                chunk_number=chunk["chunk_number"],
-                                text=processed_document.chunks[chunk["chunk_number"] - 1],
-                                relevance_score=chunk["relevance_score"],
-                                similarity_score=similarity_scores[chunk["chunk_number"] - 1]
-                            )
-                        )
-
-            except Exception as e:  
+                top_chunk_texts = [(processed_document.chunks[chunk_number], int(chunk_number)) for chunk_number in top_indices[question_index]]
+                context = format_context_for_llm(top_chunk_texts)
+                with STAGE_SECONDS.time(pipeline="rag", stage="llm"):
+                    answer = await engine.run_io(RAGService.generate_answer, query_llm, question.question_string, context, api_key, not bypass_cache)
+                top_chunk_indices = [chunk["chunk_number"] - 1 for chunk in answer["relevance_analysis"]]
+
+            except Exception as e:
                 raise HTTPException(status_code=500, detail=f"LLM response generation server error: {str(e)}")
 
             try:
-                # Generate visualization plot
-                response_embedding = EmbeddingGenerator.get_embeddings([answer["answer"]], configuration.embedding_model)[0]
-                pca_path = PCA_visualization(processed_document.embeddings, query_embedding, response_embedding, [chunk["chunk_number"] - 1 for chunk in relevance_analysis], session_id, question.id)
-                tsne_path = tSNE_visualization(processed_document.embeddings, query_embedding, response_embedding, [chunk["chunk_number"] - 1 for chunk in relevance_analysis], session_id, question.id)
-                umap_path = UMAP_visualization(processed_document.embeddings, query_embedding, response_embedding, [chunk["chunk_number"] - 1 for chunk in relevance_analysis], session_id, question.id)
+                # Project the answer (PNG rendering is deferred unless visualization_mode is "png")
+                answer_id = str(uuid.uuid4())
+                with STAGE_SECONDS.time(pipeline="rag", stage="visualization"):
+                    response_embedding = await engine.run_model(
+                        RAGService.embed_answer, answer["answer"], configuration.embedding_model, configuration.embedding_dimension
+                    )
+                    visualization_plot, visualization = await engine.run_cpu(
+                        RAGService.visualize_answer,
+                        projection_key,
+                        query_embedding,
+                        response_embedding,
+                        top_chunk_indices,
+                        session_id,
+                        question.id,
+                        answer_id,
+                        visualization_mode
+                    )
 
             except Exception as e:
                 raise HTTPException(status_code=500, detail=f"Visualization plot saving server error: {str(e)}")
 
             try:
-                    llm_response = LLMResponse(
-                        question=question.question_string,
-                        answer=answer["answer"],
-                        chunks=chunks_data,
-                        visualization_plot=[umap_path, tsne_path, pca_path],  # Order: UMAP, tSNE, PCA
-                        rus_metrics=RUSMetrics(
-                            rus=rus_result["RUS"],
-                            normalized_dcr=rus_result["Normalized_DCR"],
-                            scaled_correlation=rus_result["Scaled_Correlation"],
-                            wasted_similarity_penalty=rus_result["Wasted_Similarity_Penalty"]
-                        )
-                    )
+                llm_response = RAGService.build_response(
+                    question, configuration, document, processed_document, similarity_scores, answer,
+                    visualization_plot, visualization, answer_id, corpus_index,
+                    [document.id for document in documents] if corpus_index is not None else None
+                )
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=f"LLM response generation server error: {str(e)}")
 
-                    # save to session
-                    session.answers.append(llm_response)
-                    with open(f"data/session_{session_id}.json", "w", encoding="utf-8") as f:
-                        f.write(session.model_dump_json(indent=4))
-                    
+            try:
+                # save to session; position keeps the grid order whatever the completion order
+                with STAGE_SECONDS.time(pipeline="rag", stage="session_write"):
+                    await asyncio.to_thread(session_store.add_item, session_id, "answers", llm_response.id, llm_response, unit_index)
 
             except Exception as e:
                 raise HTTPException(status_code=500, detail=f"LLM response saving server error: {str(e)}")
 
-        return session.model_dump()
\ No newline at end of file
+            progress.result(unit_index, llm_response)
+            answers_done()
+            return llm_response
+
+        # The first failed unit cancels the others instead of leaving their LLM calls running
+        session.answers.extend(await gather_or_cancel(*(evaluate_unit(unit_index, *unit) for unit_index, unit in enumerate(units))))
+
+        return session.model_dump()
@@ -0,0 +1,61 @@
+import math
+from typing import Any, Dict, List, Optional
+import numpy as np
+from services.session_service import SessionService
+from components.utils import pad_scores, calculate_rus_batch, weight_grid, rus_for_weights
+
+# Upper bound on alpha x beta x gamma combinations per sweep
+MAX_WEIGHT_COMBINATIONS = 10000
+
+
+def _finite(values) -> List[Optional[float]]:
+    """Floats for JSON; undefined values (e.g. a correlation over one chunk) become None"""
+    return [None if math.isnan(value) else float(value) for value in np.asarray(values, dtype=np.float64).ravel()]
+
+
+class RUSService:
+    @staticmethod
+    def sweep(session_id: str, alphas: List[float], betas: List[float], gammas: List[float]) -> Dict[str, Any]:
+        """
+        RUS of every stored answer under every (alpha, beta, gamma) combination, recomputed
+        from the answers' chunk scores; nothing is re-run. Also returns each configuration's
+        mean RUS per combination.
+        """
+        weights = weight_grid(alphas, betas, gammas)
+        if len(weights) > MAX_WEIGHT_COMBINATIONS:
+            raise ValueError(f"Too many weight combinations ({len(weights)}); the limit is {MAX_WEIGHT_COMBINATIONS}")
+
+        answers = SessionService.get_session(session_id).answers
+        # Same inputs as build_response: chunk scores in relevance-analysis order, relevance in 0-1
+        similarity, relevance, mask = pad_scores(
+            [[chunk.similarity_score for chunk in answer.chunks] for answer in answers],
+            [[chunk.relevance_score / 100.0 for chunk in answer.chunks] for answer in answers]
+        )
+        components = calculate_rus_batch(similarity, relevance, mask)
+        rus = rus_for_weights(components, weights) if len(answers) else np.empty((0, len(weights)))
+
+        configuration_means = {}
+        configuration_ids = np.array([answer.configuration_id or "" for answer in answers])
+        for configuration_id in dict.fromkeys(configuration_ids):
+            rows = rus[configuration_ids == configuration_id]
+            counts = (~np.isnan(rows)).sum(axis=0)
+            means = np.where(counts > 0, np.nansum(rows, axis=0) / np.maximum(counts, 1), np.nan)
+            configuration_means[configuration_id] = _finite(means)
+
+        return {
+            "weights": weights.tolist(),
+            "answers": [
+                {
+                    "answer_id": answer.id,
+                    "question_id": answer.question_id,
+                    "configuration_id": answer.configuration_id,
+                    "document_id": answer.document_id,
+                    "normalized_dcr": _finite([components["Normalized_DCR"][i]])[0],
+                    "scaled_correlation": _finite([components["Scaled_Correlation"][i]])[0],
+                    "wasted_similarity_penalty": _finite([components["Wasted_Similarity_Penalty"][i]])[0],
+                    "rus": _finite(rus[i]),
+                }
+                for i, answer in enumerate(answers)
+            ],
+            "configuration_means": configuration_means,
+        }
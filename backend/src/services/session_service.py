@@ -1,6 +1,6 @@
-import os
 import uuid
 from models.session import Session
+from components.session_store import session_store
 
 class SessionService:
     @staticmethod
@@ -11,10 +11,9 @@ class SessionService:
         session.documents = []
         session.questions = []
         session.configurations = []
-            
-        with open(f"data/session_{session.id}.json", "w", encoding="utf-8") as f:
-            f.write(session.model_dump_json(indent=4))
-        
+
+        session_store.create_session(session.id)
+
         return session
 
     @staticmethod
@@ -22,15 +21,11 @@ class SessionService:
         """Get a session by ID"""
 
         try:
-            file_path = f"data/session_{session_id}.json"
-            # Check if file exists
-            if not os.path.exists(file_path):
-                raise FileNotFoundError(f"Session file not found: {file_path}")
-                
-            with open(file_path, "r", encoding="utf-8") as f:
-                return Session.model_validate_json(f.read())
-        except FileNotFoundError:
-            raise ValueError(f"Session file not found: {file_path}")
+            session = session_store.get_session(session_id)
         except Exception as e:
             # Log the error or handle it appropriately
-            raise ValueError(f"Failed to retrieve session {session_id}: {str(e)}")
\ No newline at end of file
+            raise ValueError(f"Failed to retrieve session {session_id}: {str(e)}")
+
+        if session is None:
+            raise ValueError(f"Session not found: {session_id}")
+        return session
@@ -0,0 +1,103 @@
+import base64
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+from models.llm_response import LLMResponse
+from services.session_service import SessionService
+from components.processed_store import processed_store
+from components.projection_cache import projection_cache, Projection
+from components.vector_index import corpus_index_store
+from components.visualization import PROJECTION_METHODS, render_projection_plot
+
+ROLE_NAMES = ["other", "top", "query", "response"]
+
+class VisualizationService:
+    @staticmethod
+    def lazy_plot_path(session_id: str, method: str, answer_id: str) -> str:
+        """Path of a PNG that is only rendered when first requested"""
+        return str(Path("data") / "visualizations" / session_id / f"{method}_{answer_id}.png")
+
+    @staticmethod
+    def get_projection(projection_key: str, method: str) -> Projection:
+        if method not in PROJECTION_METHODS:
+            raise ValueError(f"Unknown projection method: {method}")
+        # The fitted projection is normally cached; embeddings are only loaded to fit it
+        return projection_cache.get(projection_key, method, lambda: VisualizationService.projection_embeddings(projection_key))
+
+    @staticmethod
+    def projection_embeddings(projection_key: str) -> np.ndarray:
+        """Chunk embeddings of a processed document or, for corpus answers, of the whole corpus"""
+        processed_document = processed_store.get_by_key(projection_key)
+        if processed_document is not None:
+            return processed_document.embeddings
+        manifest = corpus_index_store.manifest(projection_key)
+        if manifest is None:
+            raise ValueError(f"Processed document {projection_key} not found")
+        members = [processed_store.get_by_key(key) for key in manifest["processed_keys"]]
+        if any(member is None for member in members):
+            raise ValueError(f"Corpus {projection_key} references missing processed documents")
+        return np.concatenate([np.asarray(member.embeddings, dtype=np.float32) for member in members])
+
+    @staticmethod
+    def find_answer(session_id: str, answer_id: str) -> LLMResponse:
+        session = SessionService.get_session(session_id)
+        answer = next((answer for answer in session.answers if answer.id == answer_id), None)
+        if answer is None or answer.visualization is None:
+            raise ValueError(f"Answer {answer_id} has no visualization in session {session_id}")
+        return answer
+
+    @staticmethod
+    def get_coordinates(session_id: str, answer_id: str, method: str) -> Dict[str, Any]:
+        """
+        Compact coordinate payload for one answer: float32 (x, y) pairs for every chunk
+        followed by the query and response, with per-point roles and chunk indices.
+        """
+        answer = VisualizationService.find_answer(session_id, answer_id)
+        visualization = answer.visualization
+        projection = VisualizationService.get_projection(visualization.projection_key, method)
+
+        num_chunks = len(projection.chunk_coords)
+        coordinates = np.vstack([projection.chunk_coords, visualization.points[method]]).astype(np.float32)
+        roles = np.zeros(num_chunks + 2, dtype=np.uint8)
+        roles[visualization.top_chunk_indices] = ROLE_NAMES.index("top")
+        roles[num_chunks] = ROLE_NAMES.index("query")
+        roles[num_chunks + 1] = ROLE_NAMES.index("response")
+        chunk_indices = np.concatenate([np.arange(num_chunks, dtype=np.int32), np.array([-1, -1], dtype=np.int32)])
+
+        return {
+            "method": method,
+            "num_points": int(coordinates.shape[0]),
+            "dtype": "float32",
+            "coordinates": base64.b64encode(coordinates.tobytes()).decode("ascii"),
+            "chunk_indices": base64.b64encode(chunk_indices.tobytes()).decode("ascii"),
+            "roles": base64.b64encode(roles.tobytes()).decode("ascii"),
+            "role_names": ROLE_NAMES,
+        }
+
+    @staticmethod
+    def parse_plot_filename(filename: str) -> Optional[Tuple[str, str]]:
+        """Split '<method>_<answer_id>.png' into (method, answer_id)"""
+        if not filename.endswith(".png") or "_" not in filename:
+            return None
+        method, answer_id = filename[:-len(".png")].split("_", 1)
+        if method not in PROJECTION_METHODS:
+            return None
+        return method, answer_id
+
+    @staticmethod
+    def render_plot(session_id: str, filename: str) -> Optional[str]:
+        """Render a lazily requested PNG from stored coordinates; None if it is not a lazy plot"""
+        parsed = VisualizationService.parse_plot_filename(filename)
+        if parsed is None:
+            return None
+        method, answer_id = parsed
+        answer = VisualizationService.find_answer(session_id, answer_id)
+        visualization = answer.visualization
+        projection = VisualizationService.get_projection(visualization.projection_key, method)
+        return render_projection_plot(
+            method,
+            projection.chunk_coords,
+            np.asarray(visualization.points[method]),
+            visualization.top_chunk_indices,
+            VisualizationService.lazy_plot_path(session_id, method, answer_id)
+        )
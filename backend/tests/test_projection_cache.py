@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("sklearn")
+pytest.importorskip("umap")
+from components.projection_cache import MIN_FIT_CHUNKS, Projection, ProjectionCache
+
+
+@pytest.mark.parametrize("method", ["pca", "umap", "tsne"])
+@pytest.mark.parametrize("num_chunks", [1, 2, MIN_FIT_CHUNKS])
+def test_small_documents_are_projected(method, num_chunks):
+    rng = np.random.default_rng(5)
+    projection = Projection.fit(method, rng.normal(size=(num_chunks, 32)))
+    placed = projection.place(rng.normal(size=(2, 32)))
+
+    assert projection.chunk_coords.shape == (num_chunks, 2)
+    assert placed.shape == (2, 2)
+    assert np.isfinite(placed).all()
+
+
+def test_only_tsne_keeps_chunk_embeddings(tmp_path):
+    chunks = np.random.default_rng(6).normal(size=(40, 32))
+    cache = ProjectionCache(root=str(tmp_path))
+    for method in ("pca", "umap", "tsne"):
+        cache.get("document", method, chunks)
+
+    # Load the saved projections, as another worker would
+    reloaded = ProjectionCache(root=str(tmp_path))
+    assert reloaded.get("document", "pca", None).chunk_embeddings is None
+    assert reloaded.get("document", "umap", None).chunk_embeddings is None
+    assert reloaded.get("document", "tsne", None).chunk_embeddings.shape == (40, 32)
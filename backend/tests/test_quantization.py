@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+from components.quantization import QuantizedEmbeddings, pack_binary, quantize
+from components.similarity_metrics import SimilarityCalculator
+from services.configuration_service import ConfigurationService
+
+
+@pytest.fixture
+def embeddings():
+    rng = np.random.default_rng(11)
+    return rng.normal(size=(500, 64)).astype(np.float32), rng.normal(size=(6, 64)).astype(np.float32)
+
+
+@pytest.mark.parametrize("quantization", ["float16", "int8"])
+@pytest.mark.parametrize("similarity_metric", ["cosine", "euclidean"])
+def test_quantized_search_matches_exact_top_k(embeddings, quantization, similarity_metric):
+    chunks, queries = embeddings
+    codes, scales = quantize(chunks, quantization)
+    index = QuantizedEmbeddings(quantization, codes, scales, chunks, pack_binary(chunks))
+
+    similarity_matrix, top_indices = index.search(queries, similarity_metric, k=5)
+    exact_matrix = SimilarityCalculator.similarity_matrix(queries, chunks, similarity_metric)
+    assert np.array_equal(top_indices, SimilarityCalculator.top_k_indices_batch(exact_matrix, 5))
+    # Returned chunks carry their exact (rescored) similarity
+    assert np.allclose(np.take_along_axis(similarity_matrix, top_indices, axis=1), np.take_along_axis(exact_matrix, top_indices, axis=1), atol=1e-5)
+
+
+@pytest.mark.parametrize("options, message", [
+    ({"embedding_quantization": "int4"}, "Unknown embedding quantization"),
+    ({"retrieval_scope": "global"}, "Unknown retrieval scope"),
+    ({"retrieval_scope": "corpus", "embedding_quantization": "int8"}, "not supported with corpus retrieval"),
+    ({"retrieval_scope": "corpus", "coarse_dimension": 128}, "not supported with corpus retrieval"),
+    ({"embedding_quantization": "float16", "coarse_dimension": 128}, "cannot be combined"),
+])
+def test_unsupported_retrieval_options_are_rejected(options, message):
+    with pytest.raises(ValueError, match=message):
+        ConfigurationService.add_configuration("session", "tokens", token_size=256, embedding_model="fine-tuned-financial",
+                                               similarity_metric="cosine", num_chunks=5, **options)
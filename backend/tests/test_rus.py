@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from components.utils import calculate_rus, calculate_rus_batch, pad_scores, rus_for_weights, weight_grid
+
+# The scalar reference warns when a correlation is undefined; the batch version returns NaN silently
+pytestmark = pytest.mark.filterwarnings("ignore:An input array is constant")
+
+KEYS = ["RUS", "Normalized_DCR", "Scaled_Correlation", "Wasted_Similarity_Penalty"]
+
+
+@pytest.fixture
+def answers():
+    rng = np.random.default_rng(5)
+    similarity_lists, relevance_lists = [], []
+    for length in [1, 2, 3, 5, 8, 8, 13]:
+        similarity_lists.append(rng.uniform(0, 1, length).round(2).tolist())
+        # Repeated relevance values exercise tied ranks
+        relevance_lists.append((rng.integers(0, 5, length) / 4).tolist())
+    # Constant relevance leaves the correlation undefined
+    similarity_lists.append([0.9, 0.7, 0.4])
+    relevance_lists.append([0.5, 0.5, 0.5])
+    return similarity_lists, relevance_lists
+
+
+def assert_matches_scalar(batch_value, scalar_value):
+    if np.isnan(scalar_value):
+        assert np.isnan(batch_value)
+    else:
+        assert batch_value == pytest.approx(scalar_value, abs=1e-9)
+
+
+def test_batch_rus_matches_scalar_rus(answers):
+    similarity_lists, relevance_lists = answers
+    batch = calculate_rus_batch(*pad_scores(similarity_lists, relevance_lists))
+    for i, (similarity_scores, relevance_scores) in enumerate(zip(similarity_lists, relevance_lists)):
+        scalar = calculate_rus(similarity_scores, relevance_scores)
+        for key in KEYS:
+            assert_matches_scalar(batch[key][i], scalar[key])
+
+
+def test_weight_sweep_matches_scalar_rus_per_weights(answers):
+    similarity_lists, relevance_lists = answers
+    weights = weight_grid([0.2, 0.5], [0.4, 0.6], [0.0, 0.1])
+    rus = rus_for_weights(calculate_rus_batch(*pad_scores(similarity_lists, relevance_lists)), weights)
+    assert rus.shape == (len(similarity_lists), len(weights))
+    for i, (similarity_scores, relevance_scores) in enumerate(zip(similarity_lists, relevance_lists)):
+        for j, (alpha, beta, gamma) in enumerate(weights):
+            assert_matches_scalar(rus[i, j], calculate_rus(similarity_scores, relevance_scores, alpha, beta, gamma)["RUS"])
@@ -0,0 +1,88 @@
+import json
+import pytest
+from components.session_store import SessionStore
+from models.configuration import Configuration
+from models.document import Document
+from models.llm_response import Chunk, LLMResponse, RUSMetrics
+from models.question import Question
+from models.session import Session
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SessionStore(db_path=str(tmp_path / "sessions.sqlite"), legacy_dir=str(tmp_path))
+
+
+def make_document(document_id: str, session_id: str = "session") -> Document:
+    return Document(id=document_id, file_name=f"{document_id}.pdf", file_path=f"data/documents/{document_id}.pdf",
+                    file_type="application/pdf", file_size=10, file_extension=".pdf", session_id=session_id)
+
+
+def make_answer(answer_id: str) -> LLMResponse:
+    return LLMResponse(
+        id=answer_id, question="What?", answer="This.", visualization_plot=["umap.png", "tsne.png", "pca.png"],
+        chunks=[Chunk(chunk_number=1, text="chunk", relevance_score=80, similarity_score=0.7, document_id="d1")],
+        rus_metrics=RUSMetrics(rus=0.5, normalized_dcr=1.0, scaled_correlation=0.5, wasted_similarity_penalty=0.1),
+        question_id="q1", configuration_id="c1", document_id="d1"
+    )
+
+
+def test_session_round_trip(store):
+    store.create_session("session")
+    store.add_item("session", "documents", "d1", make_document("d1"))
+    store.add_item("session", "documents", "d2", make_document("d2"))
+    store.add_item("session", "questions", "q1", Question(id="q1", question_string="What?", session_id="session"))
+    store.add_item("session", "configurations", "c1", Configuration(id="c1", session_id="session", chunking_strategy="tokens", token_size=256))
+    # Answers finishing out of order keep their grid position
+    store.add_item("session", "answers", "a2", make_answer("a2"), position=1)
+    store.add_item("session", "answers", "a1", make_answer("a1"), position=0)
+
+    session = store.get_session("session")
+    assert [document.id for document in session.documents] == ["d1", "d2"]
+    assert session.questions[0].question_string == "What?"
+    assert session.configurations[0].token_size == 256
+    assert [answer.id for answer in session.answers] == ["a1", "a2"]
+    assert session.answers[0] == make_answer("a1")
+
+    updated = make_document("d1")
+    updated.content_hash = "abc"
+    assert store.update_item("session", "documents", "d1", updated)
+    assert [(document.id, document.content_hash) for document in store.get_session("session").documents] == [("d1", "abc"), ("d2", None)]
+
+    assert store.pop_item("session", "documents", "d1") == updated
+    assert not store.delete_item("session", "documents", "d1")
+    store.clear_items("session", "answers")
+    session = store.get_session("session")
+    assert [document.id for document in session.documents] == ["d2"]
+    assert session.answers == []
+
+
+def test_missing_session(store):
+    assert store.get_session("missing") is None
+    with pytest.raises(FileNotFoundError):
+        store.add_item("missing", "questions", "q1", Question(id="q1", question_string="What?", session_id="missing"))
+
+
+def test_legacy_json_sessions_are_migrated(store, tmp_path):
+    legacy = Session(
+        id="legacy",
+        documents=[make_document("d1", "legacy")],
+        questions=[Question(id="q1", question_string="What?", session_id="legacy")],
+        configurations=[Configuration(id="c1", session_id="legacy", chunking_strategy="page", page_size=1)],
+        answers=[make_answer("a1"), make_answer("a2")],
+    )
+    (tmp_path / "session_legacy.json").write_text(legacy.model_dump_json())
+    (tmp_path / "session_lazy.json").write_text(json.dumps({"id": "lazy", "questions": [{"id": "q9", "question_string": "Why?", "session_id": "lazy"}]}))
+
+    assert sorted(store.migrate_json_sessions()) == ["lazy", "legacy"]
+    assert store.get_session("legacy") == legacy
+    # Already imported sessions are not imported again
+    assert store.migrate_json_sessions() == []
+
+
+def test_legacy_json_session_is_imported_on_first_access(store, tmp_path):
+    (tmp_path / "session_lazy.json").write_text(json.dumps({"id": "lazy", "questions": [{"id": "q9", "question_string": "Why?", "session_id": "lazy"}]}))
+    session = store.get_session("lazy")
+    assert [question.id for question in session.questions] == ["q9"]
+    store.add_item("lazy", "questions", "q10", Question(id="q10", question_string="How?", session_id="lazy"))
+    assert [question.id for question in store.get_session("lazy").questions] == ["q9", "q10"]
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from components.vector_index import CorpusIndex, CorpusIndexStore, IVFIndex
+
+
+@pytest.fixture
+def corpus():
+    rng = np.random.default_rng(7)
+    centers = rng.normal(size=(8, 32)) * 4
+    embeddings = np.vstack([center + rng.normal(size=(60, 32)) for center in centers]).astype(np.float32)
+    queries = (centers[:3] + rng.normal(size=(3, 32))).astype(np.float32)
+    return embeddings, queries
+
+
+@pytest.mark.parametrize("similarity_metric", ["cosine", "euclidean"])
+def test_ivf_search_matches_exact_top_k_on_clustered_data(corpus, similarity_metric):
+    embeddings, queries = corpus
+    index = CorpusIndex("corpus", [len(embeddings)], embeddings, IVFIndex.build(embeddings, n_lists=8))
+
+    _, exact_top = index.exact_search(queries, similarity_metric, k=10)
+    _, ivf_top = index.search(queries, similarity_metric, k=10, nprobe=4)
+    assert np.array_equal(ivf_top, exact_top)
+
+
+def test_ivf_search_never_returns_unscored_chunks():
+    rng = np.random.default_rng(3)
+    embeddings = np.vstack([rng.normal(size=(200, 16)) + 6, rng.normal(size=(4, 16)) - 6]).astype(np.float32)
+    index = CorpusIndex("corpus", [len(embeddings)], embeddings, IVFIndex.build(embeddings, n_lists=16))
+    queries = (rng.normal(size=(2, 16)) - 6).astype(np.float32)
+
+    similarity_matrix, top_indices = index.search(queries, "cosine", k=20, nprobe=1)
+    exact_matrix, _ = index.exact_search(queries, "cosine", k=20)
+    assert top_indices.shape == (2, 20)
+    assert np.allclose(np.take_along_axis(similarity_matrix, top_indices, axis=1), np.take_along_axis(exact_matrix, top_indices, axis=1), atol=1e-5)
+    assert (np.take_along_axis(similarity_matrix, top_indices, axis=1) != 0).all()
+
+
+def test_corpus_index_is_shared_across_sessions_without_document_ids(tmp_path, corpus):
+    embeddings, _ = corpus
+    store = CorpusIndexStore(root=str(tmp_path))
+    first = store.get(["a", "b"], [embeddings[:200], embeddings[200:]])
+    second = store.get(["a", "b"], [embeddings[:200], embeddings[200:]])
+    assert first is second
+    assert "document_ids" not in store.manifest(first.key)
+
+    positions, local = first.locate([0, 199, 200, len(embeddings) - 1])
+    assert positions.tolist() == [0, 0, 1, 1]
+    assert local.tolist() == [0, 199, 0, len(embeddings) - 201]
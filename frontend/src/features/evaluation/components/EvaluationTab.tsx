@@ -6,8 +6,10 @@ import { Label } from "@/components/ui/label";
 import { Input } from "@/components/ui/input";
 import { useRagResults } from "../../../hooks/useRagResults";
 import { useJudge } from "../../../hooks/useJudge";
+import { useRusSweep } from "../../../hooks/useRusSweep";
 import { RagResultCard } from "./RagResultCard";
 import { JudgeResultCard } from "./JudgeResultCard";
+import { RusWeightsCard } from "./RusWeightsCard";
 import { Alert, AlertDescription } from "@/components/ui/alert";
 
 interface EvaluationTabProps {
@@ -19,9 +21,18 @@ export const EvaluationTab = ({ sessionId }: EvaluationTabProps) => {
   const [queryApiKey, setQueryApiKey] = useState<string>("");
   const [judgeLLM, setJudgeLLM] = useState<string>("");
   const [judgeApiKey, setJudgeApiKey] = useState<string>("");
+  const [judgeMode, setJudgeMode] = useState<'single' | 'map_reduce'>('single');
 
   const { results, configurations, isLoading: isRagLoading, error: ragError, fetchRagResults } = useRagResults();
   const { judgeResult, isLoading: isJudgeLoading, error: judgeError, evaluateResults } = useJudge();
+  const { sweepResult, isLoading: isSweepLoading, error: sweepError, sweepWeights } = useRusSweep();
+
+  // Re-weighted RUS per answer id; answers from an earlier run are not in it
+  const reweightedRus = useMemo(() => {
+    const byAnswer = new Map<string, number | null>();
+    sweepResult?.answers.forEach((answer) => byAnswer.set(answer.answer_id, answer.rus[0]));
+    return byAnswer;
+  }, [sweepResult]);
 
   const showQueryApiKey = useMemo(() => {
     return queryLLM.includes("gpt") || queryLLM.includes("gemini");
@@ -43,7 +54,11 @@ export const EvaluationTab = ({ sessionId }: EvaluationTabProps) => {
       return;
     }
     const apiKeyToUse = judgeLLM === queryLLM ? queryApiKey : judgeApiKey;
-    await evaluateResults(judgeLLM, apiKeyToUse, sessionId);
+    await evaluateResults(judgeLLM, apiKeyToUse, sessionId, judgeMode);
+  };
+
+  const handleReweight = async (alpha: number, beta: number, gamma: number) => {
+    await sweepWeights(sessionId, [alpha], [beta], [gamma]);
   };
 
   return (
@@ -96,6 +111,18 @@ export const EvaluationTab = ({ sessionId }: EvaluationTabProps) => {
               /> 
             )}
           </div>
+          <div className="flex flex-col gap-2">
+            <Label>Judge Mode</Label>
+            <Select value={judgeMode} onValueChange={(value) => setJudgeMode(value as 'single' | 'map_reduce')}>
+              <SelectTrigger>
+                <SelectValue placeholder="Select Judge Mode" />
+              </SelectTrigger>
+              <SelectContent>
+                <SelectItem value="single">Single call (all results at once)</SelectItem>
+                <SelectItem value="map_reduce">Per question, then combined</SelectItem>
+              </SelectContent>
+            </Select>
+          </div>
         </div>
 
         <div className="h-6"></div>
@@ -130,10 +157,22 @@ export const EvaluationTab = ({ sessionId }: EvaluationTabProps) => {
                   key={index} 
                   result={result} 
                   configurations={configurations}
-                  configIndex={index % configurations.length}
+                  configIndex={
+                    result.configuration_id
+                      ? Math.max(0, configurations.findIndex((config) => config.id === result.configuration_id))
+                      : index % configurations.length
+                  }
+                  reweightedRus={result.id ? reweightedRus.get(result.id) : undefined}
                 />
               ))}
             </div>
+            <RusWeightsCard
+              configurations={configurations}
+              configurationMeans={sweepResult?.configuration_means ?? null}
+              isLoading={isSweepLoading}
+              error={sweepError}
+              onApply={handleReweight}
+            />
           </div>
         )}
 
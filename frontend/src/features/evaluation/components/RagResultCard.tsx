@@ -17,9 +17,11 @@ interface RagResultCardProps {
   result: LLMResponse;
   configurations: Configuration[];
   configIndex?: number;
+  // RUS under user-chosen weights; undefined shows the stored score
+  reweightedRus?: number | null;
 }
 
-export const RagResultCard = ({ result, configurations, configIndex = 0 }: RagResultCardProps) => {
+export const RagResultCard = ({ result, configurations, configIndex = 0, reweightedRus }: RagResultCardProps) => {
   const config = configurations[configIndex];
   const [activePlot, setActivePlot] = useState(0); // 0: UMAP, 1: tSNE, 2: PCA
   const [imageErrors, setImageErrors] = useState<{[key: number]: boolean}>({});
@@ -139,7 +141,9 @@ export const RagResultCard = ({ result, configurations, configIndex = 0 }: RagRe
                   <div className="flex items-center gap-2">
                     <span>View Chunks</span>
                     <span className="text-sm text-muted-foreground">
-                      RUS: {(result.rus_metrics.rus * 100).toFixed(1)}%
+                      {reweightedRus === undefined
+                        ? `RUS: ${(result.rus_metrics.rus * 100).toFixed(1)}%`
+                        : `Re-weighted RUS: ${reweightedRus === null ? "n/a" : `${(reweightedRus * 100).toFixed(1)}%`}`}
                     </span>
                   </div>
                 </AccordionTrigger>
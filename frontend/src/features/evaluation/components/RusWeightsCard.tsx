@@ -0,0 +1,80 @@
+import { useState } from "react";
+import { Button } from "@/components/ui/button";
+import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
+import { Input } from "@/components/ui/input";
+import { Label } from "@/components/ui/label";
+import { Alert, AlertDescription } from "@/components/ui/alert";
+import { Configuration } from "@/models/configuration";
+
+interface RusWeightsCardProps {
+  configurations: Configuration[];
+  configurationMeans: Record<string, (number | null)[]> | null;
+  isLoading: boolean;
+  error: string | null;
+  onApply: (alpha: number, beta: number, gamma: number) => void;
+}
+
+const formatRus = (value: number | null | undefined) =>
+  value === null || value === undefined ? "n/a" : `${(value * 100).toFixed(1)}%`;
+
+export const RusWeightsCard = ({ configurations, configurationMeans, isLoading, error, onApply }: RusWeightsCardProps) => {
+  // Defaults match the weights the backend scores answers with
+  const [alpha, setAlpha] = useState("0.5");
+  const [beta, setBeta] = useState("0.4");
+  const [gamma, setGamma] = useState("0.1");
+
+  const weights = [alpha, beta, gamma].map(Number);
+  const isValid = weights.every((weight) => !Number.isNaN(weight));
+
+  return (
+    <Card className="mt-6">
+      <CardHeader>
+        <CardTitle className="text-lg">RUS Weights</CardTitle>
+      </CardHeader>
+      <CardContent>
+        <div className="grid grid-cols-3 gap-4">
+          <div className="flex flex-col gap-2">
+            <Label>Normalized DCR (alpha)</Label>
+            <Input type="number" step="0.05" value={alpha} onChange={(e) => setAlpha(e.target.value)} />
+          </div>
+          <div className="flex flex-col gap-2">
+            <Label>Scaled Correlation (beta)</Label>
+            <Input type="number" step="0.05" value={beta} onChange={(e) => setBeta(e.target.value)} />
+          </div>
+          <div className="flex flex-col gap-2">
+            <Label>Wasted Similarity (gamma)</Label>
+            <Input type="number" step="0.05" value={gamma} onChange={(e) => setGamma(e.target.value)} />
+          </div>
+        </div>
+
+        <Button
+          className="mt-4"
+          variant="secondary"
+          disabled={isLoading || !isValid}
+          onClick={() => onApply(weights[0], weights[1], weights[2])}
+        >
+          {isLoading ? "Re-weighting..." : "Re-weight RUS"}
+        </Button>
+
+        {error && (
+          <Alert variant="destructive" className="mt-4">
+            <AlertDescription>{error}</AlertDescription>
+          </Alert>
+        )}
+
+        {configurationMeans && (
+          <div className="mt-4 grid grid-cols-2 gap-x-4 gap-y-1 text-sm">
+            {configurations.map((config, index) => (
+              <div key={config.id ?? index} className="contents">
+                <div className="font-medium">
+                  Configuration {index + 1} ({config.chunking_strategy}, {config.embedding_model}):
+                </div>
+                <div>Mean RUS {formatRus(config.id ? configurationMeans[config.id]?.[0] : undefined)}</div>
+              </div>
+            ))}
+          </div>
+        )}
+      </CardContent>
+    </Card>
+  );
+};
@@ -13,9 +13,11 @@ export interface RUSMetrics {
 }
 
 export interface LLMResponse {
+  id?: string;
   question: string;
   answer: string;
   chunks: Chunk[];
   visualization_plot: string | null;
   rus_metrics: RUSMetrics;
+  configuration_id?: string;
 } 
\ No newline at end of file
@@ -9,7 +9,7 @@ interface UseJudgeReturn {
   judgeResult: JudgeResult | null;
   isLoading: boolean;
   error: string | null;
-  evaluateResults: (judgeLLM: string, judgeApiKey: string, sessionId: string) => Promise<void>;
+  evaluateResults: (judgeLLM: string, judgeApiKey: string, sessionId: string, mode?: 'single' | 'map_reduce') => Promise<void>;
 }
 
 export const useJudge = (): UseJudgeReturn => {
@@ -17,7 +17,7 @@ export const useJudge = (): UseJudgeReturn => {
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
 
-  const evaluateResults = async (judgeLLM: string, judgeApiKey: string, sessionId: string) => {
+  const evaluateResults = async (judgeLLM: string, judgeApiKey: string, sessionId: string, mode: 'single' | 'map_reduce' = 'single') => {
     setIsLoading(true);
     setError(null);
     setJudgeResult(null);
@@ -32,6 +32,7 @@ export const useJudge = (): UseJudgeReturn => {
           judge_llm: judgeLLM,
           api_key: judgeApiKey,
           session_id: sessionId,
+          mode,
         }),
       });
 
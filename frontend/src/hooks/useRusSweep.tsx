@@ -0,0 +1,69 @@
+import { useState } from 'react';
+
+interface RusSweepAnswer {
+  answer_id: string;
+  question_id: string | null;
+  configuration_id: string | null;
+  document_id: string | null;
+  normalized_dcr: number | null;
+  scaled_correlation: number | null;
+  wasted_similarity_penalty: number | null;
+  rus: (number | null)[];
+}
+
+interface RusSweepResult {
+  weights: [number, number, number][];
+  answers: RusSweepAnswer[];
+  configuration_means: Record<string, (number | null)[]>;
+}
+
+interface UseRusSweepReturn {
+  sweepResult: RusSweepResult | null;
+  isLoading: boolean;
+  error: string | null;
+  sweepWeights: (sessionId: string, alphas: number[], betas: number[], gammas: number[]) => Promise<void>;
+}
+
+export const useRusSweep = (): UseRusSweepReturn => {
+  const [sweepResult, setSweepResult] = useState<RusSweepResult | null>(null);
+  const [isLoading, setIsLoading] = useState(false);
+  const [error, setError] = useState<string | null>(null);
+
+  const sweepWeights = async (sessionId: string, alphas: number[], betas: number[], gammas: number[]) => {
+    setIsLoading(true);
+    setError(null);
+
+    try {
+      const response = await fetch('http://localhost:8000/api/rus/sweep', {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+          session_id: sessionId,
+          alphas,
+          betas,
+          gammas,
+        }),
+      });
+
+      if (!response.ok) {
+        const errorData = await response.json().catch(() => null);
+        throw new Error(errorData?.detail || `Failed to re-weight RUS: ${response.status} ${response.statusText}`);
+      }
+      const data = await response.json();
+      setSweepResult(data);
+    } catch (err) {
+      setError(err instanceof Error ? err.message : 'An error occurred while processing your request');
+    } finally {
+      setIsLoading(false);
+    }
+  };
+
+  return {
+    sweepResult,
+    isLoading,
+    error,
+    sweepWeights,
+  };
+};
@@ -10,4 +10,9 @@ export interface Configuration {
     embedding_model: string;
     similarity_metric: string;
     num_chunks: number;
+    retrieval_scope?: string;
+    nprobe?: number;
+    embedding_quantization?: string;
+    embedding_dimension?: number;
+    coarse_dimension?: number;
 }
\ No newline at end of file
@@ -3,6 +3,7 @@ export interface Chunk {
   text: string;
   relevance_score: number;
   similarity_score: number;
+  document_id?: string;
 }
 
 export interface RUSMetrics {
@@ -12,10 +13,21 @@ export interface RUSMetrics {
   wasted_similarity_penalty: number;
 }
 
+export interface VisualizationCoordinates {
+  projection_key: string;
+  points: { [method: string]: number[][] };
+  top_chunk_indices: number[];
+}
+
 export interface LLMResponse {
+  id?: string;
   question: string;
   answer: string;
   chunks: Chunk[];
   visualization_plot: string[];
   rus_metrics: RUSMetrics;
+  question_id?: string;
+  configuration_id?: string;
+  document_id?: string;
+  visualization?: VisualizationCoordinates;
 }